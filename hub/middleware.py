@@ -1,7 +1,11 @@
+import time
+
 from django.conf import settings
 from django.middleware.locale import LocaleMiddleware as DjangoLocaleMiddleware
 from django.utils.deprecation import MiddlewareMixin
 
+from kpi.utils.request_metrics import collect_metrics, get_current_metrics
+
 
 class LocaleMiddleware(DjangoLocaleMiddleware):
     def process_response(self, request, response):
@@ -38,3 +42,51 @@ class UsernameInResponseHeaderMiddleware(MiddlewareMixin):
         if user.is_authenticated:
             response['X-KoBoNaUt'] = request.user.username
         return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Collect the time spent by each request in databases, MongoDB and the cache
+    and report it in the `Server-Timing` HTTP header, to superusers only unless
+    `settings.REQUEST_METRICS_SERVER_TIMING` is `True`.
+
+    The content of streaming responses is produced after the header is sent,
+    thus its queries are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.ENABLE_REQUEST_METRICS:
+            return self.get_response(request)
+
+        with collect_metrics(f'{request.method} {request.path}') as metrics:
+            response = self.get_response(request)
+            if resolver_match := request.resolver_match:
+                metrics.name = f'{request.method} {resolver_match.view_name}'
+            if self._show_server_timing(request):
+                response['Server-Timing'] = metrics.get_server_timing()
+
+        return response
+
+    def process_template_response(self, request, response):
+        if not (metrics := get_current_metrics()):
+            return response
+
+        render_started_at = time.perf_counter()
+
+        def record_render_duration(rendered_response):
+            metrics.render_duration += time.perf_counter() - render_started_at
+
+        response.add_post_render_callback(record_render_duration)
+        return response
+
+    @staticmethod
+    def _show_server_timing(request) -> bool:
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            return True
+
+        # Timings disclose details about the infrastructure
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_superuser)
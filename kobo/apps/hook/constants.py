@@ -4,6 +4,9 @@ KOBO_INTERNAL_ERROR_STATUS_CODE = None
 
 SUBMISSION_PLACEHOLDER = '%SUBMISSION%'
 
+# Delay (in seconds) before the first retry of a submission
+RETRY_BACKOFF = 60
+
 # Status codes that trigger a retry
 RETRIABLE_STATUS_CODES = [
     # status.HTTP_429_TOO_MANY_REQUESTS,
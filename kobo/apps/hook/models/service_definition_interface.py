@@ -13,31 +13,40 @@ from kpi.utils.log import logging
 from kpi.utils.strings import split_lines_to_list
 from ..constants import KOBO_INTERNAL_ERROR_STATUS_CODE, RETRIABLE_STATUS_CODES
 from ..exceptions import HookRemoteServerDownError
+from ..utils.session import get_session
 from .hook import Hook
 from .hook_log import HookLog, HookLogStatus
 
 
 class ServiceDefinitionInterface(metaclass=ABCMeta):
 
-    def __init__(self, hook, submission_id):
+    def __init__(self, hook, submission_id, submission=None, log=None):
+        """
+        `submission` can be passed when it has already been retrieved (e.g. in
+        bulk for several logs) to avoid fetching it again.
+        `log` is the `HookLog` already claimed (i.e. marked as PROCESSING) by
+        the caller for this attempt.
+        """
         self._hook = hook
         self._submission_id = submission_id
+        self._log = log
 
         # Only fetch data if hook is active;
         # send() returns false immediately without processing if inactive.
         if self._hook.active:
-            self._data = self._get_data()
+            self._data = self._get_data(submission)
 
-    def _get_data(self):
+    def _get_data(self, submission=None):
         """
         Retrieves data from deployment backend of the asset.
         """
         try:
-            submission = self._hook.asset.deployment.get_submission(
-                self._submission_id,
-                user=self._hook.asset.owner,
-                format_type=self._hook.export_type,
-            )
+            if submission is None:
+                submission = self._hook.asset.deployment.get_submission(
+                    self._submission_id,
+                    user=self._hook.asset.owner,
+                    format_type=self._hook.export_type,
+                )
             return self._parse_data(submission, self._hook.subset_fields)
         except Exception as e:
             logging.error(
@@ -77,6 +86,9 @@ class ServiceDefinitionInterface(metaclass=ABCMeta):
 
     @property
     def _tries(self):
+        if self._log is not None:
+            return self._log.tries
+
         try:
             return int(
                 HookLog.objects.values_list('tries', flat=True).get(
@@ -170,11 +182,13 @@ class ServiceDefinitionInterface(metaclass=ABCMeta):
         # execution. This distinguishes it from the initial PENDING state created in
         # call_services() before the task was scheduled, confirming the task was
         # successfully dequeued and is actively running.
-        self.save_log(
-            log_status=HookLogStatus.PROCESSING,
-            status_code=KOBO_INTERNAL_ERROR_STATUS_CODE,
-            message='Submission is being queued for processing',
-        )
+        # Logs claimed by the caller are already PROCESSING.
+        if self._log is None:
+            self.save_log(
+                log_status=HookLogStatus.PROCESSING,
+                status_code=KOBO_INTERNAL_ERROR_STATUS_CODE,
+                message='Submission is being queued for processing',
+            )
 
         status_code = KOBO_INTERNAL_ERROR_STATUS_CODE
         message = ''
@@ -182,7 +196,9 @@ class ServiceDefinitionInterface(metaclass=ABCMeta):
 
         try:
             SSRFProtect.validate(self._hook.endpoint, options=ssrf_protect_options)
-            response = requests.post(self._hook.endpoint, timeout=30, **request_kwargs)
+            response = get_session(self._hook.endpoint).post(
+                self._hook.endpoint, timeout=30, **request_kwargs
+            )
             response.raise_for_status()
             status_code = response.status_code
             message = response.text
@@ -282,6 +298,9 @@ class ServiceDefinitionInterface(metaclass=ABCMeta):
                 log.message = message
                 log.save()
 
+            # Keep the log to read the number of tries without querying it again
+            self._log = log
+
         except Exception as e:
             logging.error(
                 f'ServiceDefinitionInterface.save_log - {str(e)}',
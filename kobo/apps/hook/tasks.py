@@ -3,6 +3,7 @@ from datetime import timedelta
 
 from celery import shared_task
 from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import EmailMultiAlternatives, get_connection
 from django.db.models import Q
 from django.template.loader import get_template
@@ -11,16 +12,24 @@ from django_celery_beat.models import PeriodicTask
 
 from kobo.celery import celery_app
 from kpi.utils.log import logging
-from .constants import KOBO_INTERNAL_ERROR_STATUS_CODE
+from .constants import KOBO_INTERNAL_ERROR_STATUS_CODE, RETRY_BACKOFF
 from .exceptions import HookRemoteServerDownError
 from .models import Hook
 from .models.hook_log import HookLog, HookLogStatus
+from .utils.delivery import (
+    acquire_delivery_slot,
+    claim_pending_hook_logs,
+    get_delivery_scheduled_key,
+    get_submissions_by_id,
+    has_pending_hook_logs,
+    mark_delivery_as_scheduled,
+)
 from .utils.lazy import LazyMaxRetriesInt
 
 
 @celery_app.task(
     autoretry_for=(HookRemoteServerDownError,),
-    retry_backoff=60,
+    retry_backoff=RETRY_BACKOFF,
     retry_backoff_max=1200,
     max_retries=LazyMaxRetriesInt(),
     queue='kpi_low_priority_queue',
@@ -38,6 +47,82 @@ def service_definition_task(hook_id: int, submission_id: int) -> bool:
     return service_definition.send()
 
 
+@celery_app.task(queue='kpi_low_priority_queue')
+def deliver_pending_hook_logs(hook_id: int) -> int:
+    """
+    Sends, by batches, the submissions which have never been tried yet to the
+    endpoint of the hook, and returns how many have been processed.
+
+    At most `settings.HOOK_MAX_CONCURRENT_DELIVERIES_PER_HOST` tasks deliver
+    to the same host simultaneously. Extra tasks are requeued until a slot is
+    free, since the running ones may belong to other hooks of the same host.
+    Failures which can be retried are handed over to `service_definition_task`.
+    """
+    scheduled_key = get_delivery_scheduled_key(hook_id)
+
+    try:
+        hook = Hook.objects.select_related('asset', 'asset__owner').get(
+            pk=hook_id, active=True
+        )
+    except Hook.DoesNotExist:
+        cache.delete(scheduled_key)
+        return 0
+
+    if not (slot_key := acquire_delivery_slot(hook.endpoint)):
+        if not has_pending_hook_logs(hook_id):
+            cache.delete(scheduled_key)
+            return 0
+        # Keep the delivery scheduled, new submissions are left to the
+        # requeued task.
+        cache.set(scheduled_key, True, settings.HOOK_DELIVERY_SLOT_TIMEOUT)
+        deliver_pending_hook_logs.apply_async(
+            (hook_id,), countdown=settings.HOOK_DELIVERY_REQUEUE_COUNTDOWN
+        )
+        return 0
+
+    # From now on, new submissions must schedule another task, which helps
+    # this one until all delivery slots of the host are taken.
+    cache.delete(scheduled_key)
+
+    processed = 0
+    # Use camelcase (even if it's not PEP-8 compliant)
+    # because variable represents the class, not the instance.
+    ServiceDefinition = hook.get_service_definition()  # noqa
+    try:
+        while logs := claim_pending_hook_logs(hook):
+            submissions = get_submissions_by_id(
+                hook, [log.submission_id for log in logs]
+            )
+            for log in logs:
+                service_definition = ServiceDefinition(
+                    hook,
+                    log.submission_id,
+                    submission=submissions.get(log.submission_id),
+                    log=log,
+                )
+                try:
+                    service_definition.send()
+                except HookRemoteServerDownError:
+                    service_definition_task.apply_async(
+                        (hook_id, log.submission_id), countdown=RETRY_BACKOFF
+                    )
+                except Exception:
+                    # Already logged and saved in the hook log by `send()`
+                    pass
+                processed += 1
+
+            cache.touch(slot_key, settings.HOOK_DELIVERY_SLOT_TIMEOUT)
+    finally:
+        cache.delete(slot_key)
+
+    # Submissions received after the last batch may have been left to this task
+    # while it still held its slot.
+    if has_pending_hook_logs(hook_id) and mark_delivery_as_scheduled(hook_id):
+        deliver_pending_hook_logs.delay(hook_id)
+
+    return processed
+
+
 @shared_task
 def retry_all_task(hooklogs_ids: int):
     hook_logs = HookLog.objects.filter(id__in=hooklogs_ids)
@@ -176,6 +261,9 @@ def retry_stalled_pending_submissions():
 
     These represent submissions where the Celery task was killed before it could
     even start processing (e.g., pod restart during queuing).
+
+    Logs of hooks with a scheduled delivery are left to `deliver_pending_hook_logs`,
+    which may be waiting for a free slot of a busy host.
     """
     stalled_pending_cutoff_time = timezone.now() - timedelta(
         minutes=settings.HOOK_STALLED_PENDING_TIMEOUT
@@ -199,6 +287,17 @@ def retry_stalled_pending_submissions():
         hook__active=True,
     ).select_related('hook')
 
+    stalled_hook_ids = (
+        stalled_logs.values_list('hook_id', flat=True).order_by().distinct()
+    )
+    scheduled_keys = {
+        get_delivery_scheduled_key(hook_id): hook_id for hook_id in stalled_hook_ids
+    }
+    scheduled_hook_ids = [
+        scheduled_keys[key] for key in cache.get_many(scheduled_keys.keys())
+    ]
+    stalled_logs = stalled_logs.exclude(hook_id__in=scheduled_hook_ids)
+
     retried_count = 0
     for log in stalled_logs:
         # Re-queue the submission
@@ -1,7 +1,11 @@
 from datetime import timedelta
-from unittest.mock import patch
+from ipaddress import ip_address
+from unittest.mock import MagicMock, patch
 
+import requests
 from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
 from django.utils import timezone
 from rest_framework import status
 
@@ -9,10 +13,15 @@ from kobo.apps.hook.constants import KOBO_INTERNAL_ERROR_STATUS_CODE
 from kobo.apps.hook.models.hook import Hook
 from kobo.apps.hook.models.hook_log import HookLog, HookLogStatus
 from kobo.apps.hook.tasks import (
+    deliver_pending_hook_logs,
     mark_zombie_processing_submissions,
     retry_stalled_pending_submissions,
 )
 from kobo.apps.hook.tests.base import BaseHookTestCase
+from kobo.apps.hook.utils.delivery import (
+    acquire_delivery_slot,
+    get_delivery_scheduled_key,
+)
 
 
 class HookRetryStalledSubmissionTestCase(BaseHookTestCase):
@@ -151,6 +160,33 @@ class HookRetryStalledSubmissionTestCase(BaseHookTestCase):
 
             assert mock_delay.call_count == 3
 
+    def test_ignores_stalled_submissions_of_scheduled_delivery(self):
+        """
+        Should NOT retry submissions of a hook whose delivery is scheduled, e.g.
+        requeued until its host has a free delivery slot
+        """
+        old_time = timezone.now() - timedelta(hours=3)
+
+        log = HookLog.objects.create(
+            hook=self.hook,
+            submission_id=300,
+            status=HookLogStatus.PENDING,
+            status_code=KOBO_INTERNAL_ERROR_STATUS_CODE,
+            message='',
+        )
+        HookLog.objects.filter(pk=log.pk).update(date_modified=old_time)
+        cache.set(get_delivery_scheduled_key(self.hook.pk), True)
+
+        try:
+            with patch(
+                'kobo.apps.hook.tasks.service_definition_task.delay'
+            ) as mock_delay:
+                retry_stalled_pending_submissions()
+
+                mock_delay.assert_not_called()
+        finally:
+            cache.delete(get_delivery_scheduled_key(self.hook.pk))
+
     def test_do_retry_if_hook_is_deactived(self):
         """
         Should not retry stalled submissions from deactivated hook
@@ -362,3 +398,127 @@ class HookMarkZombieSubmissionTestCase(BaseHookTestCase):
         assert 'verify manually' in message.lower()
         assert 'remote server' in message.lower()
         assert 'avoid duplicate' in message.lower()
+
+
+@patch(
+    'ssrf_protect.ssrf_protect.SSRFProtect._get_ip_address',
+    new=MagicMock(return_value=ip_address('1.2.3.4')),
+)
+class HookDeliverPendingLogsTestCase(BaseHookTestCase):
+    """
+    Tests for deliver_pending_hook_logs task
+    """
+
+    def setUp(self):
+        super().setUp()
+        self._setup_hook_and_submission()
+        self.log = HookLog.objects.create(
+            hook=self.hook, submission_id=self.submission_id
+        )
+
+    def _mock_response(self, status_code):
+        mock_response = MagicMock()
+        mock_response.status_code = status_code
+        mock_response.text = ''
+        return mock_response
+
+    def test_delivers_pending_logs_with_one_submission_fetch(self):
+        with patch(
+            'kobo.apps.hook.utils.session.requests.Session.post',
+            return_value=self._mock_response(status.HTTP_200_OK),
+        ) as mock_post, patch.object(
+            type(self.asset.deployment),
+            'get_submission',
+            side_effect=AssertionError('Submission must be fetched in bulk'),
+        ):
+            assert deliver_pending_hook_logs(self.hook.pk) == 1
+
+        mock_post.assert_called_once()
+        self.log.refresh_from_db()
+        assert self.log.status == HookLogStatus.SUCCESS
+        assert self.log.status_code == status.HTTP_200_OK
+        assert self.log.tries == 1
+
+    def test_hands_retriable_failures_over_to_service_definition_task(self):
+        mock_response = self._mock_response(status.HTTP_503_SERVICE_UNAVAILABLE)
+        mock_response.raise_for_status.side_effect = (
+            requests.exceptions.RequestException('HTTP 503')
+        )
+        with patch(
+            'kobo.apps.hook.utils.session.requests.Session.post',
+            return_value=mock_response,
+        ), patch(
+            'kobo.apps.hook.tasks.service_definition_task.apply_async'
+        ) as mock_apply_async:
+            deliver_pending_hook_logs(self.hook.pk)
+
+        mock_apply_async.assert_called_once()
+        assert mock_apply_async.call_args.args[0] == (
+            self.hook.pk,
+            self.submission_id,
+        )
+        self.log.refresh_from_db()
+        assert self.log.status == HookLogStatus.PENDING
+        assert self.log.tries == 1
+
+    @override_settings(HOOK_MAX_CONCURRENT_DELIVERIES_PER_HOST=1)
+    def test_leaves_pending_logs_when_host_is_busy(self):
+        slot_key = acquire_delivery_slot(self.hook.endpoint)
+        try:
+            with patch(
+                'kobo.apps.hook.utils.session.requests.Session.post'
+            ) as mock_post, patch(
+                'kobo.apps.hook.tasks.deliver_pending_hook_logs.apply_async'
+            ):
+                assert deliver_pending_hook_logs(self.hook.pk) == 0
+        finally:
+            cache.delete(slot_key)
+
+        mock_post.assert_not_called()
+        self.log.refresh_from_db()
+        assert self.log.status == HookLogStatus.PENDING
+        assert self.log.tries == 0
+
+    @override_settings(HOOK_MAX_CONCURRENT_DELIVERIES_PER_HOST=1)
+    def test_requeues_delivery_when_host_is_busy_with_another_hook(self):
+        other_hook = Hook.objects.create(
+            asset=self.asset,
+            name='Other Hook',
+            endpoint='https://example.com/other-endpoint',
+            active=True,
+            export_type='json',
+        )
+        other_log = HookLog.objects.create(
+            hook=other_hook, submission_id=self.submission_id
+        )
+        scheduled_key = get_delivery_scheduled_key(other_hook.pk)
+        cache.set(scheduled_key, True)
+
+        # The only slot of the host is taken by the delivery of `self.hook`
+        slot_key = acquire_delivery_slot(self.hook.endpoint)
+        try:
+            with patch(
+                'kobo.apps.hook.tasks.deliver_pending_hook_logs.apply_async'
+            ) as mock_apply_async:
+                assert deliver_pending_hook_logs(other_hook.pk) == 0
+            # New submissions of the other hook do not schedule another task
+            assert cache.get(scheduled_key)
+        finally:
+            cache.delete(slot_key)
+
+        mock_apply_async.assert_called_once_with(
+            (other_hook.pk,), countdown=settings.HOOK_DELIVERY_REQUEUE_COUNTDOWN
+        )
+        other_log.refresh_from_db()
+        assert other_log.status == HookLogStatus.PENDING
+
+        # Once the slot is released, the requeued task delivers the logs
+        with patch(
+            'kobo.apps.hook.utils.session.requests.Session.post',
+            return_value=self._mock_response(status.HTTP_200_OK),
+        ):
+            assert deliver_pending_hook_logs(other_hook.pk) == 1
+
+        assert cache.get(scheduled_key) is None
+        other_log.refresh_from_db()
+        assert other_log.status == HookLogStatus.SUCCESS
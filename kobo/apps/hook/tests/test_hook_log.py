@@ -30,7 +30,7 @@ class HookLogStatusTransitionsTestCase(BaseHookTestCase):
         'ssrf_protect.ssrf_protect.SSRFProtect._get_ip_address',
         new=MagicMock(return_value=ip_address('1.2.3.4')),
     )
-    @patch('kobo.apps.hook.models.service_definition_interface.requests.post')
+    @patch('kobo.apps.hook.utils.session.requests.Session.post')
     def test_status_transition_pending_to_processing_to_success(self, mock_post):
         """
         Test the normal success flow: PENDING -> PROCESSING -> SUCCESS
@@ -47,7 +47,7 @@ class HookLogStatusTransitionsTestCase(BaseHookTestCase):
         mock_post.return_value = mock_response
 
         # Step 1: call_services creates initial log
-        with patch('kobo.apps.hook.utils.services.service_definition_task.delay'):
+        with patch('kobo.apps.hook.utils.services.deliver_pending_hook_logs.delay'):
             success = call_services(self.asset.uid, self.submission_id)
 
         assert success is True
@@ -74,7 +74,7 @@ class HookLogStatusTransitionsTestCase(BaseHookTestCase):
         'ssrf_protect.ssrf_protect.SSRFProtect._get_ip_address',
         new=MagicMock(return_value=ip_address('1.2.3.4')),
     )
-    @patch('kobo.apps.hook.models.service_definition_interface.requests.post')
+    @patch('kobo.apps.hook.utils.session.requests.Session.post')
     def test_status_transition_pending_to_processing_to_failed(self, mock_post):
         """
         Test the failure flow: PENDING -> PROCESSING -> FAILED
@@ -94,7 +94,7 @@ class HookLogStatusTransitionsTestCase(BaseHookTestCase):
         mock_post.return_value = mock_response
 
         # Step 1: call_services creates initial log
-        with patch('kobo.apps.hook.utils.services.service_definition_task.delay'):
+        with patch('kobo.apps.hook.utils.services.deliver_pending_hook_logs.delay'):
             call_services(self.asset.uid, self.submission_id)
 
         log = HookLog.objects.get(hook=self.hook, submission_id=self.submission_id)
@@ -116,7 +116,7 @@ class HookLogStatusTransitionsTestCase(BaseHookTestCase):
         assert log.status_code == 400
         assert 'Bad request' in log.message
 
-    @patch('kobo.apps.hook.models.service_definition_interface.requests.post')
+    @patch('kobo.apps.hook.utils.session.requests.Session.post')
     def test_oom_killed_before_processing_update(self, mock_post):
         """
         Simulate OOM kill BEFORE the task updates status to PROCESSING
@@ -129,7 +129,7 @@ class HookLogStatusTransitionsTestCase(BaseHookTestCase):
         """
 
         # Step 1: call_services creates initial log
-        with patch('kobo.apps.hook.utils.services.service_definition_task.delay'):
+        with patch('kobo.apps.hook.utils.services.deliver_pending_hook_logs.delay'):
             call_services(self.asset.uid, self.submission_id)
 
         log = HookLog.objects.get(hook=self.hook, submission_id=self.submission_id)
@@ -151,7 +151,7 @@ class HookLogStatusTransitionsTestCase(BaseHookTestCase):
         'ssrf_protect.ssrf_protect.SSRFProtect._get_ip_address',
         new=MagicMock(return_value=ip_address('1.2.3.4')),
     )
-    @patch('kobo.apps.hook.models.service_definition_interface.requests.post')
+    @patch('kobo.apps.hook.utils.session.requests.Session.post')
     def test_process_terminated(self, mock_post):
         """
         Simulate pod termination during HTTP request, but the finally block successfully
@@ -168,7 +168,7 @@ class HookLogStatusTransitionsTestCase(BaseHookTestCase):
         """
 
         # Step 1: call_services creates initial log
-        with patch('kobo.apps.hook.utils.services.service_definition_task.delay'):
+        with patch('kobo.apps.hook.utils.services.deliver_pending_hook_logs.delay'):
             call_services(self.asset.uid, self.submission_id)
 
         # Step 2: Task starts and executes normally
@@ -193,7 +193,7 @@ class HookLogStatusTransitionsTestCase(BaseHookTestCase):
         assert log.status_code == KOBO_INTERNAL_ERROR_STATUS_CODE
         assert 'Process terminated during HTTP request' in log.message
 
-    @patch('kobo.apps.hook.models.service_definition_interface.requests.post')
+    @patch('kobo.apps.hook.utils.session.requests.Session.post')
     def test_oom_killed(self, mock_post):
         """
         Simulate OOM kill during or after the HTTP request, preventing the finally
@@ -210,7 +210,7 @@ class HookLogStatusTransitionsTestCase(BaseHookTestCase):
         """
 
         # Step 1: call_services creates initial log
-        with patch('kobo.apps.hook.utils.services.service_definition_task.delay'):
+        with patch('kobo.apps.hook.utils.services.deliver_pending_hook_logs.delay'):
             call_services(self.asset.uid, self.submission_id)
 
         # Step 2: Task starts and updates status to PROCESSING
@@ -256,7 +256,7 @@ class HookLogStatusTransitionsTestCase(BaseHookTestCase):
         'ssrf_protect.ssrf_protect.SSRFProtect._get_ip_address',
         new=MagicMock(return_value=ip_address('1.2.3.4')),
     )
-    @patch('kobo.apps.hook.models.service_definition_interface.requests.post')
+    @patch('kobo.apps.hook.utils.session.requests.Session.post')
     @override_config(HOOK_MAX_RETRIES=3)
     def test_retry_logic_respects_max_retries(self, mock_post):
         """
@@ -280,7 +280,7 @@ class HookLogStatusTransitionsTestCase(BaseHookTestCase):
         mock_post.return_value = mock_response
 
         # Create initial log
-        with patch('kobo.apps.hook.utils.services.service_definition_task.delay'):
+        with patch('kobo.apps.hook.utils.services.deliver_pending_hook_logs.delay'):
             call_services(self.asset.uid, self.submission_id)
 
         ServiceDefinition = self.hook.get_service_definition()
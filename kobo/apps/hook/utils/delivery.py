@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from kpi.constants import SUBMISSION_FORMAT_TYPE_JSON
+
+from ..constants import KOBO_INTERNAL_ERROR_STATUS_CODE
+from ..models.hook import Hook
+from ..models.hook_log import HookLog, HookLogStatus
+from .session import get_endpoint_host
+
+
+def acquire_delivery_slot(endpoint: str) -> str | None:
+    """
+    Reserve one of the `settings.HOOK_MAX_CONCURRENT_DELIVERIES_PER_HOST`
+    delivery slots of the host of `endpoint`.
+
+    Return the cache key of the slot, or `None` if all of them are taken.
+    """
+    host = get_endpoint_host(endpoint)
+    for index in range(settings.HOOK_MAX_CONCURRENT_DELIVERIES_PER_HOST):
+        slot_key = f'hook_delivery_slot:{host}:{index}'
+        if cache.add(
+            slot_key, True, timeout=settings.HOOK_DELIVERY_SLOT_TIMEOUT
+        ):
+            return slot_key
+    return None
+
+
+def claim_pending_hook_logs(hook: Hook) -> list[HookLog]:
+    """
+    Mark as PROCESSING the next batch of logs of `hook` which have never been
+    tried yet, and return them.
+
+    Locked rows are skipped, thus concurrent delivery tasks of the same hook
+    never claim the same logs.
+    """
+    with transaction.atomic():
+        logs = list(
+            HookLog.objects.select_for_update(skip_locked=True)
+            .filter(hook_id=hook.pk, status=HookLogStatus.PENDING, tries=0)
+            .order_by('pk')[: settings.HOOK_DELIVERY_BATCH_SIZE]
+        )
+        HookLog.objects.filter(pk__in=[log.pk for log in logs]).update(
+            status=HookLogStatus.PROCESSING,
+            status_code=KOBO_INTERNAL_ERROR_STATUS_CODE,
+            message='Submission is being queued for processing',
+            date_modified=timezone.now(),
+        )
+
+    return logs
+
+
+def get_submissions_by_id(hook: Hook, submission_ids: list[int]) -> dict:
+    """
+    Retrieve the submissions of `submission_ids` with one query, indexed by
+    their id.
+
+    Only JSON submissions carry their id. XML ones are left to
+    `ServiceDefinitionInterface`, which retrieves them one by one.
+    """
+    if hook.export_type != SUBMISSION_FORMAT_TYPE_JSON:
+        return {}
+
+    submissions = hook.asset.deployment.get_submissions(
+        user=hook.asset.owner,
+        format_type=hook.export_type,
+        submission_ids=submission_ids,
+    )
+    return {submission['_id']: submission for submission in submissions}
+
+
+def has_pending_hook_logs(hook_id: int) -> bool:
+    return HookLog.objects.filter(
+        hook_id=hook_id, status=HookLogStatus.PENDING, tries=0
+    ).exists()
+
+
+def mark_delivery_as_scheduled(hook_id: int) -> bool:
+    """
+    Return whether the caller is the first one to schedule a delivery of
+    `hook_id` since the last delivery task started.
+    """
+    return cache.add(
+        get_delivery_scheduled_key(hook_id),
+        True,
+        timeout=settings.HOOK_DELIVERY_SLOT_TIMEOUT,
+    )
+
+
+def get_delivery_scheduled_key(hook_id: int) -> str:
+    return f'hook_delivery_scheduled:{hook_id}'
@@ -2,13 +2,17 @@ from django.db import transaction
 
 from ..models.hook import Hook
 from ..models.hook_log import HookLog
-from ..tasks import service_definition_task
+from ..tasks import deliver_pending_hook_logs
+from .delivery import mark_delivery_as_scheduled
 
 
 def call_services(asset_uid: str, submission_id: int) -> bool:
     """
     Delegates to Celery data submission to remote servers.
 
+    Submissions are not sent one task at a time: pending logs of each hook
+    are delivered by batches (see `deliver_pending_hook_logs`).
+
     This function is called within KoboCAT's advisory lock transaction context.
     It ensures that the logger.Instance (submission) is fully saved to the database
     before triggering the asynchronous tasks that will send data to external endpoints.
@@ -38,6 +42,15 @@ def call_services(asset_uid: str, submission_id: int) -> bool:
             if created:
                 success = True
                 transaction.on_commit(
-                    lambda: service_definition_task.delay(hook_id, submission_id)
+                    lambda hook_id_=hook_id: schedule_hook_delivery(hook_id_)
                 )
     return success
+
+
+def schedule_hook_delivery(hook_id: int):
+    """
+    Queues a delivery task for `hook_id`, unless one is already waiting in
+    the queue.
+    """
+    if mark_delivery_as_scheduled(hook_id):
+        deliver_pending_hook_logs.delay(hook_id)
@@ -0,0 +1,51 @@
+from http.cookiejar import DefaultCookiePolicy
+from threading import Lock
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+_sessions = {}
+_sessions_lock = Lock()
+
+
+def get_endpoint_host(endpoint: str) -> str:
+    """
+    Return the scheme and the network location of `endpoint`,
+    e.g. `https://example.com:8443`
+    """
+    parts = urlsplit(endpoint)
+    return f'{parts.scheme}://{parts.netloc}'.lower()
+
+
+def get_session(endpoint: str) -> requests.Session:
+    """
+    Return the HTTP session shared by all hooks whose endpoint is on the same
+    host as `endpoint`.
+
+    The session keeps its connections alive between deliveries, so a burst of
+    submissions to the same endpoint reuses a few TLS connections instead of
+    opening a new one per submission.
+    """
+    host = get_endpoint_host(endpoint)
+
+    with _sessions_lock:
+        try:
+            return _sessions[host]
+        except KeyError:
+            pass
+
+        session = requests.Session()
+        # Several hooks (from different users) may point to the same host.
+        # Do not let cookies set by one endpoint leak into another's requests.
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.HOOK_MAX_CONCURRENT_DELIVERIES_PER_HOST,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _sessions[host] = session
+
+    return session
@@ -109,10 +109,11 @@ class TestXFormSubmissionApi(TestAbstractViewSet):
                 UsageType.STORAGE_BYTES: None,
                 UsageType.SUBMISSION: {
                     'exceeded': True,
+                    'balance_value': -1,
                 },
             }
             with patch(
-                'kobo.apps.openrosa.libs.utils.logger_tools.ServiceUsageCalculator.get_usage_balances',  # noqa: E501
+                'kpi.utils.usage_calculator.ServiceUsageCalculator.get_usage_balances',  # noqa: E501
                 return_value=mock_balances,
             ):
                 request = self.factory.post('/submission', data, format='json')
@@ -123,11 +124,12 @@ class TestXFormSubmissionApi(TestAbstractViewSet):
             mock_balances = {
                 UsageType.STORAGE_BYTES: {
                     'exceeded': True,
+                    'balance_value': -1,
                 },
                 UsageType.SUBMISSION: None,
             }
             with patch(
-                'kobo.apps.openrosa.libs.utils.logger_tools.ServiceUsageCalculator.get_usage_balances',  # noqa: E501
+                'kpi.utils.usage_calculator.ServiceUsageCalculator.get_usage_balances',  # noqa: E501
                 return_value=mock_balances,
             ):
                 request = self.factory.post('/submission', data, format='json')
@@ -139,7 +141,7 @@ class TestXFormSubmissionApi(TestAbstractViewSet):
         not settings.STRIPE_ENABLED, reason='Requires stripe functionality'
     )
     @patch(
-        'kobo.apps.openrosa.libs.utils.logger_tools.ServiceUsageCalculator.get_usage_balances'  # noqa: E501
+        'kpi.utils.usage_calculator.ServiceUsageCalculator.get_usage_balances'  # noqa: E501
     )
     def test_over_limit_submission_rejection_authenticated(self, mock_usage):
         """
@@ -163,6 +165,7 @@ class TestXFormSubmissionApi(TestAbstractViewSet):
                 UsageType.STORAGE_BYTES: None,
                 UsageType.SUBMISSION: {
                     'exceeded': True,
+                    'balance_value': -1,
                 },
             }
             mock_usage.return_value = mock_balances
@@ -181,6 +184,7 @@ class TestXFormSubmissionApi(TestAbstractViewSet):
             mock_balances = {
                 UsageType.STORAGE_BYTES: {
                     'exceeded': True,
+                    'balance_value': -1,
                 },
                 UsageType.SUBMISSION: None,
             }
@@ -223,14 +227,16 @@ class TestXFormSubmissionApi(TestAbstractViewSet):
             mock_balances = {
                 UsageType.STORAGE_BYTES: {
                     'exceeded': True,
+                    'balance_value': -1,
                 },
                 UsageType.SUBMISSION: {
                     'exceeded': True,
+                    'balance_value': -1,
                 },
             }
             with override_config(USAGE_LIMIT_ENFORCEMENT=False):
                 with patch(
-                    'kobo.apps.openrosa.libs.utils.logger_tools.ServiceUsageCalculator.get_usage_balances',  # noqa: E501
+                    'kpi.utils.usage_calculator.ServiceUsageCalculator.get_usage_balances',  # noqa: E501
                     return_value=mock_balances,
                 ):
                     request = self.factory.post('/submission', data, format='json')
@@ -240,7 +246,7 @@ class TestXFormSubmissionApi(TestAbstractViewSet):
                     self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
             with patch(
-                'kobo.apps.openrosa.libs.utils.logger_tools.ServiceUsageCalculator.get_usage_balances',  # noqa: E501
+                'kpi.utils.usage_calculator.ServiceUsageCalculator.get_usage_balances',  # noqa: E501
                 return_value=mock_balances,
             ):
                 request = self.factory.post('/submission', data, format='json')
@@ -297,7 +303,7 @@ class TestXFormSubmissionApi(TestAbstractViewSet):
                 s + '.xml',
             )
             with patch(
-                'kobo.apps.openrosa.libs.utils.logger_tools.ServiceUsageCalculator.get_usage_balances'  # noqa
+                'kpi.utils.usage_calculator.ServiceUsageCalculator.get_usage_balances'  # noqa
             ) as patched_balances:
                 with open(submission_path) as sf:
                     data = {'xml_submission_file': sf, 'media_file': f}
@@ -8,7 +8,11 @@ from django.conf import settings
 from kobo.apps.kobo_auth.shortcuts import User
 from kobo.apps.openrosa.apps.logger.models.attachment import Attachment
 from kobo.apps.openrosa.apps.logger.models.xform import XForm
-from kobo.apps.openrosa.libs.utils.image_tools import resize
+from kobo.apps.openrosa.libs.utils.image_tools import (
+    delete_thumbnails_record,
+    has_thumbnails,
+    resize,
+)
 from kobo.apps.openrosa.libs.utils.model_tools import queryset_iterator
 from kobo.apps.openrosa.libs.utils.viewer_tools import get_optimized_image_path
 from kpi.deployment_backends.kc_access.storage import (
@@ -60,30 +64,21 @@ class Command(BaseCommand):
 
         for att in queryset_iterator(attachments_qs):
             filename = att.media_file.name
-            full_path = get_optimized_image_path(filename, 'small')
             if kwargs.get('force') is not None:
                 for suffix in settings.THUMB_CONF.keys():
                     fp = get_optimized_image_path(filename, suffix)
                     if default_storage.exists(fp):
                         default_storage.delete(fp)
+                delete_thumbnails_record(filename)
 
-            if not default_storage.exists(full_path):
-                try:
-                    resize(filename)
-                    if default_storage.exists(
-                        get_optimized_image_path(filename, 'small')
-                    ):
-                        print(
-                            'Thumbnails created for %(file)s'
-                            % {'file': filename}
-                        )
-                    else:
-                        print(
-                            'Problem with the file %(file)s'
-                            % {'file': filename}
-                        )
-                except (IOError, OSError) as e:
+            if not has_thumbnails(filename):
+                if resize(filename):
+                    print(
+                        'Thumbnails created for %(file)s'
+                        % {'file': filename}
+                    )
+                else:
                     print(
-                        'Error on %(filename)s: %(error)s'
-                        % {'filename': filename, 'error': e}
+                        'Problem with the file %(file)s'
+                        % {'file': filename}
                     )
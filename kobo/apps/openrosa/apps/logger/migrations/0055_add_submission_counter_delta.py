@@ -0,0 +1,47 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('logger', '0054_add_null_root_uuid_partial_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionCounterDelta',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('date_created', models.DateTimeField()),
+                ('num_of_submissions', models.IntegerField(default=0)),
+                ('attachment_storage_bytes', models.BigIntegerField(default=0)),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    'xform',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to='logger.xform',
+                    ),
+                ),
+            ],
+        ),
+    ]
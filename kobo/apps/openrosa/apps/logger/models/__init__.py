@@ -8,5 +8,8 @@ from kobo.apps.openrosa.apps.logger.models.monthly_xform_submission_counter impo
     MonthlyXFormSubmissionCounter,
 )
 from kobo.apps.openrosa.apps.logger.models.note import Note
+from kobo.apps.openrosa.apps.logger.models.submission_counter_delta import (
+    SubmissionCounterDelta,
+)
 from kobo.apps.openrosa.apps.logger.models.survey_type import SurveyType
 from kobo.apps.openrosa.apps.logger.models.xform import XForm
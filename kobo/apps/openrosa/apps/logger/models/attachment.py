@@ -4,13 +4,16 @@ from typing import Optional
 from urllib.parse import quote as urlquote
 
 from django.conf import settings
-from django.core.files.base import ContentFile
 from django.db import models
 from django.utils.http import urlencode
 
 from kobo.apps.kobo_auth.models import User
 from kobo.apps.openrosa.apps.logger.models.xform import XForm
-from kobo.apps.openrosa.libs.utils.image_tools import get_optimized_image_path, resize
+from kobo.apps.openrosa.libs.utils.image_tools import (
+    get_optimized_image_path,
+    has_thumbnails,
+    resize,
+)
 from kpi.constants import SAFE_INLINE_MIMETYPES
 from kpi.deployment_backends.kc_access.storage import (
     default_kobocat_storage as default_storage,
@@ -110,14 +113,12 @@ class Attachment(AbstractTimeStampedModel, AudioTranscodingMixin):
         attachment. Otherwise, return the AWS url (e.g. https://...)
         """
 
-        if not default_storage.exists(self.mp3_storage_path):
-            content = self.get_transcoded_audio('mp3')
-            default_storage.save(self.mp3_storage_path, ContentFile(content))
+        mp3_storage_path = self.get_transcoded_audio_storage_path('mp3')
 
         if is_filesystem_storage(default_storage):
-            return f'{self.media_file.path}.mp3'
+            return default_storage.path(mp3_storage_path)
 
-        return default_storage.url(self.mp3_storage_path)
+        return default_storage.url(mp3_storage_path)
 
     @property
     def absolute_path(self):
@@ -170,7 +171,7 @@ class Attachment(AbstractTimeStampedModel, AudioTranscodingMixin):
             optimized_image_path = get_optimized_image_path(
                 self.media_file.name, suffix
             )
-            if not default_storage.exists(optimized_image_path):
+            if not has_thumbnails(self.media_file.name):
                 resize(self.media_file.name)
 
         if is_filesystem_storage(default_storage):
@@ -0,0 +1,22 @@
+from django.db import models
+
+from kobo.apps.kobo_auth.shortcuts import User
+
+
+class SubmissionCounterDelta(models.Model):
+    """
+    Pending increment of the counters of an XForm and of its owner, recorded
+    instead of updating them directly when `SUBMISSION_COUNTERS_WRITE_BEHIND`
+    is enabled. Deltas are folded into the counters periodically by the
+    `flush_submission_counter_deltas` task.
+    """
+
+    xform = models.ForeignKey(
+        'logger.XForm', related_name='+', on_delete=models.CASCADE
+    )
+    user = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    # Date of the submission (not of the delta), used by the daily and monthly
+    # counters and by `XForm.last_submission_time`
+    date_created = models.DateTimeField()
+    num_of_submissions = models.IntegerField(default=0)
+    attachment_storage_bytes = models.BigIntegerField(default=0)
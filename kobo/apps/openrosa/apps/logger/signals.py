@@ -5,6 +5,7 @@ from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Case, F, When
 from django.db.models.signals import post_delete, post_save, pre_delete
+from django.db.transaction import get_connection
 from django.dispatch import receiver
 
 from kobo.apps.kobo_auth.shortcuts import User
@@ -17,7 +18,10 @@ from kobo.apps.openrosa.apps.logger.models.monthly_xform_submission_counter impo
     MonthlyXFormSubmissionCounter,
 )
 from kobo.apps.openrosa.apps.logger.models.xform import XForm
-from kobo.apps.openrosa.libs.utils.image_tools import get_optimized_image_path
+from kobo.apps.openrosa.libs.utils.image_tools import (
+    delete_thumbnails_record,
+    get_optimized_image_path,
+)
 from kpi.deployment_backends.kc_access.storage import (
     default_kobocat_storage as default_storage,
 )
@@ -74,6 +78,12 @@ def pre_delete_attachment(instance, **kwargs):
             default_storage.delete(
                 get_optimized_image_path(media_file_name, suffix)
             )
+        delete_thumbnails_record(media_file_name)
+        if attachment.mimetype.startswith(
+            Attachment.SUPPORTED_INPUT_MIMETYPE_PREFIXES
+        ):
+            for audio_format in Attachment.AVAILABLE_OUTPUT_FORMATS:
+                default_storage.delete(f'{media_file_name}.{audio_format}')
     except Exception as e:
         logging.error('Failed to delete attachment: ' + str(e), exc_info=True)
 
@@ -82,14 +92,26 @@ def pre_delete_attachment(instance, **kwargs):
 def post_save_attachment(instance, created, **kwargs):
     """
     Update the attachment_storage_bytes field in the UserProfile model
-    when an attachment is added
+    when an attachment is added, and generate its thumbnails if it is an image
     """
+    from kobo.apps.openrosa.apps.logger.tasks import generate_thumbnails
     from kobo.apps.openrosa.apps.logger.utils.counters import update_storage_counters
 
     if not created:
         return
 
     attachment = instance
+    if (
+        settings.GENERATE_THUMBNAILS_ON_SAVE
+        and attachment.media_file
+        and attachment.mimetype.startswith('image/')
+    ):
+        # Generate them before the first request for one of them, once the
+        # attachment is committed for the worker to find it
+        get_connection(settings.OPENROSA_DB_ALIAS).on_commit(
+            lambda: generate_thumbnails.delay(attachment.pk)
+        )
+
     if getattr(attachment, 'defer_counting', False):
         return
 
@@ -269,6 +291,12 @@ def update_xform_submission_count_delete(sender, instance, **kwargs):
         xform_id = instance.pk
         xform = instance
 
+    from kobo.apps.openrosa.apps.logger.utils.counters import (
+        flush_pending_counter_deltas,
+    )
+
+    flush_pending_counter_deltas(xform_id)
+
     with conditional_kc_transaction_atomic():
         # Like `update_xform_submission_count()`, update with `F` expression
         # instead of `select_for_update` to avoid locks, and `save()` which
@@ -295,6 +323,21 @@ def update_xform_submission_count_delete(sender, instance, **kwargs):
         )
 
 
+@receiver(pre_delete, sender=XForm, dispatch_uid='flush_xform_counter_deltas')
+def flush_xform_counter_deltas(sender, instance, **kwargs):
+    """
+    Fold the pending counter deltas of the XForm before its counters are moved
+    to the catch-all ones (see below) and its deltas are deleted in cascade.
+    """
+    from kobo.apps.openrosa.apps.logger.utils.counters import (
+        flush_pending_counter_deltas,
+    )
+
+    if flush_pending_counter_deltas(instance.pk):
+        # `update_profile_num_submissions()` relies on it
+        instance.refresh_from_db(fields=['num_of_submissions'])
+
+
 # signals are fired during cascade deletion (i.e. deletion initiated by the
 # removal of a related object), whereas the `delete()` model method is not
 # called. We need call this signal before cascade deletion. Otherwise,
@@ -17,15 +17,17 @@ from django_redis import get_redis_connection
 
 from kobo.apps.kobo_auth.shortcuts import User
 from kobo.celery import celery_app
+from kobo.apps.openrosa.libs.utils.image_tools import resize
 from kpi.deployment_backends.kc_access.storage import (
     default_kobocat_storage as default_storage,
 )
 from kpi.utils.log import logging
 from ..main.models import UserProfile
 from .constants import SUBMISSIONS_SUSPENDED_HEARTBEAT_KEY
-from .models import Instance, XForm
+from .models import Attachment, Instance, XForm
 from .models.daily_xform_submission_counter import DailyXFormSubmissionCounter
 from .models.instance import InstanceHistory
+from .utils.counters import flush_counter_deltas
 
 
 @celery_app.task()
@@ -39,6 +41,34 @@ def delete_daily_counters():
     xform_daily_counters.delete()
 
 
+@celery_app.task()
+def flush_submission_counter_deltas():
+    """
+    Fold the counter increments recorded with `SUBMISSION_COUNTERS_WRITE_BEHIND`
+    into the counters. Runs even if the setting is disabled, to drain the
+    deltas recorded before it was.
+    """
+    batch_size = settings.SUBMISSION_COUNTERS_FLUSH_BATCH_SIZE
+    # Stop on a partial batch, deltas created in the meantime are left to the
+    # next run
+    while flush_counter_deltas(batch_size) == batch_size:
+        pass
+
+
+@celery_app.task
+def generate_thumbnails(attachment_id: int):
+    """
+    Generate the thumbnails of an image attachment, for them to be ready
+    when they are requested
+    """
+    try:
+        attachment = Attachment.objects.only('media_file').get(pk=attachment_id)
+    except Attachment.DoesNotExist:
+        return
+
+    resize(attachment.media_file.name)
+
+
 # ## ISSUE 242 TEMPORARY FIX ##
 # See https://github.com/kobotoolbox/kobocat/issues/242
 
@@ -1,14 +1,20 @@
 import os
+from unittest.mock import patch
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.base import ContentFile
 from django.core.management import call_command
 
 from kobo.apps.kobo_auth.models import User
 from kobo.apps.openrosa.apps.logger.models import Attachment, Instance
 from kobo.apps.openrosa.apps.logger.models.xform import XForm
+from kobo.apps.openrosa.apps.logger.utils.instance import delete_instances
 from kobo.apps.openrosa.apps.main.tests.test_base import TestBase
-from kobo.apps.openrosa.libs.utils.image_tools import image_url
+from kobo.apps.openrosa.libs.utils.image_tools import (
+    get_thumbnails_cache_key,
+    image_url,
+)
 from kpi.constants import SAFE_INLINE_MIMETYPES
 from kpi.deployment_backends.kc_access.storage import (
     default_kobocat_storage as default_storage,
@@ -55,6 +61,64 @@ class TestAttachment(TestBase):
                 thumbnail = f'{filename}-{size}.jpg'
                 self.assertFalse(default_storage.exists(thumbnail))
 
+    def test_transcoded_audio_deleted_with_submission(self):
+        audio_attachment = Attachment.objects.create(
+            instance=self.instance,
+            media_file=ContentFile(b'audio', name='audio.ogg'),
+            mimetype='audio/ogg',
+        )
+        media_file_name = audio_attachment.media_file.name
+        for audio_format in Attachment.AVAILABLE_OUTPUT_FORMATS:
+            default_storage.save(
+                f'{media_file_name}.{audio_format}', ContentFile(b'audio')
+            )
+
+        delete_instances(
+            self.instance.xform, {'submission_ids': [self.instance.pk]}
+        )
+
+        self.assertFalse(default_storage.exists(media_file_name))
+        for audio_format in Attachment.AVAILABLE_OUTPUT_FORMATS:
+            self.assertFalse(
+                default_storage.exists(f'{media_file_name}.{audio_format}')
+            )
+
+    def test_thumbnails_record_deleted_with_submission(self):
+        media_file_name = self.attachment.media_file.name
+        image_url(self.attachment, 'small')
+        self.assertTrue(cache.get(get_thumbnails_cache_key(media_file_name)))
+
+        delete_instances(
+            self.instance.xform, {'submission_ids': [self.instance.pk]}
+        )
+
+        self.assertIsNone(cache.get(get_thumbnails_cache_key(media_file_name)))
+
+    def test_thumbnails_generated_on_save(self):
+        with (
+            self.captureOnCommitCallbacks(execute=True),
+            open(self.attachment.media_file.path, 'rb') as f,
+        ):
+            attachment = Attachment.objects.create(
+                instance=self.instance,
+                media_file=ContentFile(f.read(), name=self.media_file),
+            )
+
+        filename = attachment.media_file.name.replace('.jpg', '')
+        for size in settings.THUMB_CONF:
+            self.assertTrue(default_storage.exists(f'{filename}-{size}.jpg'))
+
+        # Thumbnails are known to exist, storage is not probed anymore
+        with patch.object(
+            default_storage, 'exists', side_effect=AssertionError
+        ) as patched_exists:
+            url = image_url(attachment, 'small')
+            attachment.protected_path(suffix='medium')
+        patched_exists.assert_not_called()
+        self.assertNotEqual(url.find(f'{filename}-small.jpg'), -1)
+
+        attachment.delete()
+
     def test_heic_named_file_generates_jpg_thumbnails(self):
         media_file_name = 'test_image.heic'
         media_file = os.path.join(
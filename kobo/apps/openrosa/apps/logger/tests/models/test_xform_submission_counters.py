@@ -2,13 +2,20 @@
 from datetime import timedelta
 
 from django.conf import settings
+from django.test import override_settings
 from django.utils import timezone
 
 from kobo.apps.kobo_auth.shortcuts import User
-from kobo.apps.openrosa.apps.logger.models import XForm
+from kobo.apps.openrosa.apps.logger.models import SubmissionCounterDelta, XForm
 from kobo.apps.openrosa.apps.logger.models.daily_xform_submission_counter import DailyXFormSubmissionCounter
 from kobo.apps.openrosa.apps.logger.models.monthly_xform_submission_counter import MonthlyXFormSubmissionCounter
-from kobo.apps.openrosa.apps.logger.tasks import delete_daily_counters
+from kobo.apps.openrosa.apps.logger.tasks import (
+    delete_daily_counters,
+    flush_submission_counter_deltas,
+)
+from kobo.apps.openrosa.apps.logger.utils.counters import (
+    get_pending_num_of_submissions,
+)
 from kobo.apps.openrosa.apps.main.tests.test_base import TestBase
 
 
@@ -129,3 +136,55 @@ class TestXFormSubmissionCounters(TestBase):
         assert (
             DailyXFormSubmissionCounter.objects.get(**criteria).counter == 2
         )
+
+    @override_settings(SUBMISSION_COUNTERS_WRITE_BEHIND=True)
+    def test_write_behind_counters(self):
+        """
+        Test counters are only updated when pending deltas are flushed, but
+        pending deltas are counted in the meantime
+        """
+        self._publish_transportation_form_and_submit_instance()
+        xform = XForm.objects.get(user__username='bob')
+        assert xform.num_of_submissions == 0
+        assert not DailyXFormSubmissionCounter.objects.filter(
+            user__username='bob'
+        ).exists()
+        assert SubmissionCounterDelta.objects.filter(xform=xform).count() == 1
+        assert get_pending_num_of_submissions(xform.pk) == 1
+
+        flush_submission_counter_deltas()
+
+        xform.refresh_from_db()
+        assert xform.num_of_submissions == 1
+        assert xform.last_submission_time is not None
+        assert xform.user.profile.num_of_submissions == 1
+        assert (
+            DailyXFormSubmissionCounter.objects.get(user__username='bob').counter
+            == 1
+        )
+        assert (
+            MonthlyXFormSubmissionCounter.objects.get(user__username='bob').counter
+            == 1
+        )
+        assert not SubmissionCounterDelta.objects.exists()
+        assert get_pending_num_of_submissions(xform.pk) == 0
+
+    @override_settings(SUBMISSION_COUNTERS_WRITE_BEHIND=True)
+    def test_pending_deltas_are_merged_on_xform_deletion(self):
+        """
+        Test that pending deltas are folded into the catch-all counters when
+        their xform is deleted
+        """
+        today = timezone.now().date()
+        self._publish_transportation_form_and_submit_instance()
+        XForm.objects.filter(user__username='bob').first().delete()
+        assert not SubmissionCounterDelta.objects.exists()
+        assert (
+            MonthlyXFormSubmissionCounter.objects.get(
+                year=today.year,
+                month=today.month,
+                user__username='bob',
+                xform=None,
+            ).counter
+            == 1
+        )
@@ -1,9 +1,16 @@
 # coding: utf-8
 import os
 import re
+import timeit
+from glob import glob
+
+import pytest
+from django.test import SimpleTestCase
 
 from kobo.apps.openrosa.apps.logger.models import XForm
 from kobo.apps.openrosa.apps.logger.xform_instance_parser import (
+    XFORM_INSTANCE_PARSER_ENGINE_ITERPARSE,
+    XFORM_INSTANCE_PARSER_ENGINE_MINIDOM,
     XFormInstanceParser,
     _xml_node_to_dict,
     clean_and_parse_xml,
@@ -243,3 +250,132 @@ class TestXFormInstanceParser(TestBase):
                 f'{id_string}/signature',
             ]
             assert sorted(expected) == sorted(get_xform_media_question_xpaths(xf))
+
+
+class TestXFormInstanceParserEngines(SimpleTestCase):
+    """
+    Ensure the `iterparse` engine produces the same results as the legacy
+    `minidom` engine on every submission fixture of the project.
+    """
+
+    ENGINES = (
+        XFORM_INSTANCE_PARSER_ENGINE_MINIDOM,
+        XFORM_INSTANCE_PARSER_ENGINE_ITERPARSE,
+    )
+
+    def setUp(self):
+        openrosa_dir = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), '../../..'
+        )
+        self.xml_files = sorted(
+            glob(
+                os.path.join(openrosa_dir, '**', 'instances', '**', '*.xml'),
+                recursive=True,
+            )
+        )
+
+    def test_engines_parity_on_fixtures(self):
+        assert self.xml_files
+        for xml_file in self.xml_files:
+            with open(xml_file) as f:
+                xml_str = f.read()
+
+            # Parse once without repeats, then once with every node flagged as
+            # a repeat to exercise both code paths
+            all_xpaths = list(self._get_all_xpaths(xml_str))
+            for repeats in [[], all_xpaths]:
+                with self.subTest(xml_file=xml_file, repeats=bool(repeats)):
+                    results = [
+                        self._parse(xml_str, repeats, engine)
+                        for engine in self.ENGINES
+                    ]
+                    assert results[0] == results[1]
+
+    def test_engines_parity_on_edge_cases(self):
+        xml_strings = [
+            # Namespaces, attributes, CDATA, comments, mixed content and
+            # duplicated nodes which are not repeats
+            (
+                '<?xml version="1.0" encoding="ISO-8859-1"?>'
+                '<data xmlns:jr="http://openrosa.org/javarosa" '
+                'xmlns="http://opendatakit.org/submissions" id="f" jr:version="3">'
+                '<g jr:template=""><q>é</q></g><g><q>2</q><r>x<!--c-->y</r></g>'
+                '<orx:meta xmlns:orx="http://openrosa.org/xforms">'
+                '<orx:instanceID>uuid:1</orx:instanceID></orx:meta>'
+                '<e/><c><![CDATA[<b>]]></c><m>t<i>1</i>u</m><d>1</d><d>2</d>'
+                '</data>'
+            ),
+            '<data id="f"><w xml:lang="en">  hi  </w><n>  </n></data>',
+            '<data>hello</data>',
+        ]
+        for xml_str in xml_strings:
+            with self.subTest(xml_str=xml_str):
+                results = [
+                    self._parse(xml_str, ['g'], engine) for engine in self.ENGINES
+                ]
+                assert results[0] == results[1]
+
+    def test_root_node_is_available_with_iterparse_engine(self):
+        xml_str = '<data id="f"><q>1</q></data>'
+        parser = XFormInstanceParser(
+            xml_str,
+            None,
+            delay_parse=True,
+            engine=XFORM_INSTANCE_PARSER_ENGINE_ITERPARSE,
+        )
+        parser.parse(xml_str, repeats=[])
+        assert parser.get_root_node_name() == 'data'
+        assert parser.get_root_node().getAttribute('id') == 'f'
+
+    @pytest.mark.performance
+    def test_iterparse_engine_speed(self):
+        xml_strings = []
+        for xml_file in self.xml_files:
+            with open(xml_file) as f:
+                xml_strings.append(f.read())
+        # Add a repeat-heavy submission
+        xml_strings.append(
+            '<data id="f">'
+            + ''.join(
+                f'<rep><a>{i}</a><g><b>{i}</b><c>x</c></g></rep>' for i in range(5000)
+            )
+            + '</data>'
+        )
+
+        durations = {}
+        for engine in self.ENGINES:
+            durations[engine] = timeit.timeit(
+                lambda engine=engine: [
+                    self._parse(xml_str, ['rep'], engine) for xml_str in xml_strings
+                ],
+                number=5,
+            )
+        assert (
+            durations[XFORM_INSTANCE_PARSER_ENGINE_ITERPARSE]
+            < durations[XFORM_INSTANCE_PARSER_ENGINE_MINIDOM]
+        )
+
+    @staticmethod
+    def _get_all_xpaths(xml_str: str):
+        def _walk(node_, prefix_):
+            for child in node_.childNodes:
+                if child.nodeType == child.ELEMENT_NODE:
+                    xpath = '/'.join(prefix_ + [child.nodeName])
+                    yield xpath
+                    yield from _walk(child, prefix_ + [child.nodeName])
+
+        yield from _walk(clean_and_parse_xml(xml_str).documentElement, [])
+
+    @staticmethod
+    def _parse(xml_str: str, repeats: list, engine: str):
+        parser = XFormInstanceParser(xml_str, None, delay_parse=True, engine=engine)
+        try:
+            parser.parse(xml_str, repeats=repeats)
+        except Exception as e:
+            return type(e).__name__
+        return (
+            parser.to_dict(),
+            parser.to_flat_dict(),
+            parser.get_attributes(),
+            parser.get_root_node_name(),
+        )
@@ -1,8 +1,22 @@
-from django.db.models import Case, F, When
+from collections import Counter, defaultdict
+from datetime import date
 
-from kpi.deployment_backends.kc_access.utils import conditional_kc_transaction_atomic
+from django.conf import settings
+from django.db.models import Case, F, Sum, When
+from django.db.models.functions import TruncDate
+
+from kpi.deployment_backends.kc_access.utils import (
+    conditional_kc_transaction_atomic,
+    kc_transaction_atomic,
+)
 from ...main.models import UserProfile
-from ..models import Instance, XForm
+from ..models import (
+    DailyXFormSubmissionCounter,
+    Instance,
+    MonthlyXFormSubmissionCounter,
+    SubmissionCounterDelta,
+    XForm,
+)
 
 
 def decrement_counters_after_deletion(
@@ -12,6 +26,10 @@ def decrement_counters_after_deletion(
     Decrement submission count and (optionally) storage bytes for both XForm
     and UserProfile in two UPDATE queries.
     """
+    # Pending increments must be applied first, otherwise the decrement could
+    # be clamped to 0 before they are.
+    flush_pending_counter_deltas(xform_id)
+
     sub_count_decrement = Case(
         When(num_of_submissions__gte=count, then=F('num_of_submissions') - count),
         default=0,
@@ -82,6 +100,230 @@ def delete_null_user_daily_counters(apps, *args):
     DailyXFormSubmissionCounter.objects.filter(user=None).delete()
 
 
+def flush_counter_deltas(
+    batch_size: int = settings.SUBMISSION_COUNTERS_FLUSH_BATCH_SIZE,
+    xform_id: int | None = None,
+) -> int:
+    """
+    Fold (up to `batch_size`) pending `SubmissionCounterDelta` objects into the
+    XForm, UserProfile, daily and monthly counters, and delete them.
+
+    Deltas locked by a concurrent flush are skipped. Return the number of
+    deltas folded.
+    """
+    with kc_transaction_atomic():
+        queryset = SubmissionCounterDelta.objects.select_for_update(
+            skip_locked=True
+        )
+        if xform_id is not None:
+            queryset = queryset.filter(xform_id=xform_id)
+
+        deltas = list(queryset.order_by('pk')[:batch_size])
+        if not deltas:
+            return 0
+
+        xform_counters = defaultdict(Counter)
+        last_submission_times = {}
+        profile_counters = defaultdict(Counter)
+        daily_counters = Counter()
+        monthly_counters = Counter()
+
+        for delta in deltas:
+            xform_counters[delta.xform_id].update(
+                num_of_submissions=delta.num_of_submissions,
+                attachment_storage_bytes=delta.attachment_storage_bytes,
+            )
+            profile_counters[delta.user_id].update(
+                num_of_submissions=delta.num_of_submissions,
+                attachment_storage_bytes=delta.attachment_storage_bytes,
+            )
+            if not delta.num_of_submissions:
+                continue
+
+            last_submission_times[delta.xform_id] = max(
+                delta.date_created,
+                last_submission_times.get(delta.xform_id, delta.date_created),
+            )
+            date_created = delta.date_created.date()
+            daily_counters[
+                (date_created, delta.xform_id, delta.user_id)
+            ] += delta.num_of_submissions
+            monthly_counters[
+                (date_created.year, date_created.month, delta.xform_id, delta.user_id)
+            ] += delta.num_of_submissions
+
+        # Rows are updated in a consistent order to avoid deadlocks between
+        # concurrent flushes.
+        for pk, counters in sorted(xform_counters.items()):
+            fields_to_update = _get_increments(counters)
+            if pk in last_submission_times:
+                fields_to_update['last_submission_time'] = last_submission_times[pk]
+            XForm.objects.filter(pk=pk).update(**fields_to_update)
+
+        for user_id, counters in sorted(profile_counters.items()):
+            if not (fields_to_update := _get_increments(counters)):
+                continue
+            if not UserProfile.objects.filter(user_id=user_id).update(
+                **fields_to_update
+            ):
+                UserProfile.objects.only('pk').get_or_create(user_id=user_id)
+                UserProfile.objects.filter(user_id=user_id).update(**fields_to_update)
+
+        for (date_, pk, user_id), count in sorted(daily_counters.items()):
+            DailyXFormSubmissionCounter.objects.get_or_create(
+                date=date_, xform_id=pk, user_id=user_id
+            )
+            DailyXFormSubmissionCounter.objects.filter(
+                date=date_, xform_id=pk
+            ).update(counter=F('counter') + count)
+
+        for (year, month, pk, user_id), count in sorted(monthly_counters.items()):
+            MonthlyXFormSubmissionCounter.objects.get_or_create(
+                year=year, month=month, xform_id=pk, user_id=user_id
+            )
+            MonthlyXFormSubmissionCounter.objects.filter(
+                year=year, month=month, xform_id=pk
+            ).update(counter=F('counter') + count)
+
+        SubmissionCounterDelta.objects.filter(
+            pk__in=[delta.pk for delta in deltas]
+        ).delete()
+
+    return len(deltas)
+
+
+def flush_pending_counter_deltas(xform_id: int) -> bool:
+    """
+    Fold all pending deltas of `xform_id` into the counters, e.g. before
+    they are decremented or moved to the catch-all counters.
+
+    Return whether any delta has been folded.
+    """
+    if not settings.SUBMISSION_COUNTERS_WRITE_BEHIND:
+        return False
+
+    flushed = False
+    while flush_counter_deltas(xform_id=xform_id):
+        flushed = True
+    return flushed
+
+
+def get_pending_daily_counts(
+    xform_id: int, date_range: tuple[date, date] | None = None
+) -> dict[date, int]:
+    """
+    Return the number of submissions per day of `xform_id` which have not
+    been folded into `DailyXFormSubmissionCounter` yet.
+    """
+    if not settings.SUBMISSION_COUNTERS_WRITE_BEHIND:
+        return {}
+
+    queryset = SubmissionCounterDelta.objects.filter(
+        xform_id=xform_id, num_of_submissions__gt=0
+    ).annotate(date=TruncDate('date_created'))
+    if date_range:
+        queryset = queryset.filter(date__range=date_range)
+
+    return {
+        row['date']: row['count']
+        for row in queryset.values('date').annotate(
+            count=Sum('num_of_submissions')
+        )
+    }
+
+
+def get_pending_num_of_submissions(xform_id: int) -> int:
+    """
+    Return the number of submissions of `xform_id` which have not been folded
+    into `XForm.num_of_submissions` yet.
+    """
+    if not settings.SUBMISSION_COUNTERS_WRITE_BEHIND:
+        return 0
+
+    return (
+        SubmissionCounterDelta.objects.filter(xform_id=xform_id).aggregate(
+            count=Sum('num_of_submissions')
+        )['count']
+        or 0
+    )
+
+
+def get_pending_num_of_submissions_by_user_id(
+    user_ids: list[int] | None = None,
+    date_range: tuple[date, date] | None = None,
+) -> dict[int, int]:
+    """
+    Return the number of submissions of each user of `user_ids` (all users if
+    `None`), received within `date_range` if provided, which have not been
+    folded into `UserProfile.num_of_submissions` and
+    `DailyXFormSubmissionCounter` yet.
+    """
+    if not settings.SUBMISSION_COUNTERS_WRITE_BEHIND:
+        return {}
+
+    queryset = SubmissionCounterDelta.objects.filter(num_of_submissions__gt=0)
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    if date_range:
+        queryset = queryset.filter(date_created__date__range=date_range)
+
+    return {
+        row['user_id']: row['count']
+        for row in queryset.values('user_id').annotate(
+            count=Sum('num_of_submissions')
+        )
+    }
+
+
+def get_pending_storage_bytes_by_user_id(
+    user_ids: list[int] | None = None,
+) -> dict[int, int]:
+    """
+    Return the attachment storage bytes of each user of `user_ids` (all users
+    if `None`) which have not been folded into
+    `UserProfile.attachment_storage_bytes` yet.
+    """
+    if not settings.SUBMISSION_COUNTERS_WRITE_BEHIND:
+        return {}
+
+    queryset = SubmissionCounterDelta.objects.filter(attachment_storage_bytes__gt=0)
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+
+    return {
+        row['user_id']: row['total']
+        for row in queryset.values('user_id').annotate(
+            total=Sum('attachment_storage_bytes')
+        )
+    }
+
+
+def record_counter_deltas(
+    instance: Instance,
+    user_id: int,
+    attachment_storage_bytes: int = 0,
+    increase_num_of_submissions: bool = False,
+):
+    """
+    Write-behind counterpart of `update_user_counters()` and of the daily and
+    monthly counter signals.
+
+    Instead of updating the XForm and UserProfile rows, which are shared by
+    all concurrent submissions of the same project or account, it only inserts
+    one row. See `flush_counter_deltas()`.
+    """
+    if not (attachment_storage_bytes or increase_num_of_submissions):
+        return
+
+    SubmissionCounterDelta.objects.create(
+        xform_id=instance.xform_id,
+        user_id=user_id,
+        date_created=instance.date_created,
+        num_of_submissions=1 if increase_num_of_submissions else 0,
+        attachment_storage_bytes=attachment_storage_bytes,
+    )
+
+
 def update_storage_counters(xform_id: int, user_id: int, total_bytes: int):
 
     with conditional_kc_transaction_atomic():
@@ -135,3 +377,9 @@ def update_user_counters(
             # new submission.
             UserProfile.objects.only('pk').get_or_create(user_id=instance.xform.user_id)
             UserProfile.objects.filter(user_id=user_id).update(**fields_to_update)
+
+
+def _get_increments(counters: Counter) -> dict:
+    return {
+        field: F(field) + value for field, value in counters.items() if value
+    }
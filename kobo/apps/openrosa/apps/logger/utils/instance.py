@@ -21,6 +21,7 @@ from kobo.apps.openrosa.apps.logger.utils.counters import (
 )
 from kobo.apps.openrosa.apps.viewer.models import InstanceModification, ParsedInstance
 from kobo.apps.openrosa.apps.viewer.signals import remove_from_mongo
+from kobo.apps.openrosa.libs.utils.image_tools import delete_thumbnails_record
 from kobo.apps.openrosa.libs.utils.viewer_tools import get_optimized_image_path
 from kobo.apps.trash_bin.models.attachment import AttachmentTrash
 from kpi.deployment_backends.kc_access.storage import default_kobocat_storage
@@ -110,6 +111,7 @@ def delete_instances(xform: XForm, request_data: dict) -> int:
 
         total_storage_bytes = 0
         files_to_delete = set()
+        image_files_to_delete = []
 
         with kc_transaction_atomic(), transaction.atomic():
             # One query: collect PKs + aggregate storage bytes before deleting.
@@ -140,10 +142,18 @@ def delete_instances(xform: XForm, request_data: dict) -> int:
                     if media_file := attachment_row['media_file']:
                         files_to_delete.add(media_file)
                         if attachment_row['mimetype'].startswith('image/'):
+                            image_files_to_delete.append(media_file)
                             for suffix in settings.THUMB_CONF:
                                 files_to_delete.add(
                                     get_optimized_image_path(media_file, suffix)
                                 )
+                        elif attachment_row['mimetype'].startswith(
+                            Attachment.SUPPORTED_INPUT_MIMETYPE_PREFIXES
+                        ):
+                            # Transcoded audio derivatives persisted next to
+                            # the original file (see `pre_delete_attachment`).
+                            for audio_format in Attachment.AVAILABLE_OUTPUT_FORMATS:
+                                files_to_delete.add(f'{media_file}.{audio_format}')
 
                 att_trash_qs = AttachmentTrash.objects.using(DEFAULT_DB_ALIAS).filter(
                     attachment_id__in=attachment_ids
@@ -192,6 +202,8 @@ def delete_instances(xform: XForm, request_data: dict) -> int:
         # File deletion is outside the transaction to avoid locking tables for
         # too long.
         bulk_delete_files(files_to_delete, default_kobocat_storage)
+        for media_file in image_files_to_delete:
+            delete_thumbnails_record(media_file)
     finally:
         # Reconnect signals that were temporarily disabled above.
         pre_delete.connect(pre_delete_attachment, sender=Attachment)
@@ -3,14 +3,17 @@ from __future__ import annotations
 import re
 import sys
 from datetime import datetime
+from io import BytesIO
 from typing import Optional, Union
 from xml.dom import Node
 from xml.dom.minidom import Document
 
 import dateutil.parser
 import six
+from django.conf import settings
 from django.utils.encoding import smart_str
 from django.utils.translation import gettext as t
+from lxml import etree
 from pyxform.survey_element import SurveyElement
 
 from kobo.apps.openrosa.apps.logger.exceptions import InstanceEmptyError
@@ -18,6 +21,11 @@ from kobo.apps.openrosa.libs.utils.common_tags import XFORM_ID_STRING
 from kpi.utils.log import logging
 from kpi.utils.xml import minidom_parsestring
 
+XFORM_INSTANCE_PARSER_ENGINE_ITERPARSE = 'iterparse'
+XFORM_INSTANCE_PARSER_ENGINE_MINIDOM = 'minidom'
+
+_XML_NAMESPACE = 'http://www.w3.org/XML/1998/namespace'
+
 
 def add_uuid_prefix(uuid_: str) -> str:
     if ':' in uuid_:
@@ -119,10 +127,14 @@ def get_deprecated_uuid_from_xml(xml):
 
 
 def clean_and_parse_xml(xml_string: str) -> Document:
+    xml_obj = minidom_parsestring(clean_xml(xml_string))
+    return xml_obj
+
+
+def clean_xml(xml_string: str) -> str:
     clean_xml_str = xml_string.strip()
     clean_xml_str = re.sub(r'>\s+<', '><', smart_str(clean_xml_str))
-    xml_obj = minidom_parsestring(clean_xml_str)
-    return xml_obj
+    return clean_xml_str
 
 
 def set_meta(xml_str: str, meta_name: str, new_value: str) -> str:
@@ -209,6 +221,131 @@ def _xml_node_to_dict(node: Node, repeats: list = []) -> dict:
             return {node.nodeName: value}
 
 
+def _iterparse_xml(xml_str: str, repeats: list) -> tuple[str, Optional[dict], dict]:
+    """
+    Parse `xml_str` in a single pass with lxml `iterparse()` and return
+    the root node name, the same dict as `_xml_node_to_dict()` and the same
+    attributes as `_get_all_attributes()` (first occurrence wins).
+
+    Elements are freed as soon as they have been converted, so memory usage
+    does not grow with the number of repeated groups.
+
+    Known difference with the minidom engine: a CDATA section mixed with other
+    nodes in the same element is merged with the surrounding text.
+    """
+    # Keys of `repeats` are compared to the xpaths of the nodes, use a set to
+    # make the lookup O(1)
+    repeats = set(repeats)
+    attributes = {}
+    # Each frame holds the name of the node and the values of its children
+    names = []
+    values = []
+    root_name = None
+    result = None
+
+    context = etree.iterparse(
+        # Mimic minidom: the XML declaration encoding is ignored, the string
+        # has already been decoded.
+        BytesIO(clean_xml(xml_str).encode()),
+        events=('start', 'end'),
+        encoding='utf-8',
+    )
+    for event, element in context:
+        if not isinstance(element.tag, str):
+            # Comments and processing instructions are not yielded with these
+            # events, but be defensive.
+            continue
+
+        if event == 'start':
+            node_name = _get_qualified_name(element, element.tag)
+            if root_name is None:
+                root_name = node_name
+            names.append(node_name)
+            values.append({})
+            _collect_attributes(element, attributes)
+            continue
+
+        node_name = names.pop()
+        value = values.pop()
+        if len(element) == 0:
+            # A leaf node. Like minidom, `None` if there is no data
+            node_value = element.text if element.text else None
+        else:
+            # An internal node. Text mixed with children is ignored
+            node_value = value if value else None
+
+        # Free memory, previous siblings are not needed anymore
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+        if not names:
+            # End of the root node
+            result = node_value
+            continue
+
+        if node_value is None:
+            continue
+
+        parent_value = values[-1]
+        # `names[0]` is the root node, which is not part of xpaths
+        xpath = '/'.join(names[1:] + [node_name])
+        if xpath in repeats:
+            parent_value.setdefault(node_name, []).append(node_value)
+        elif node_name not in parent_value:
+            parent_value[node_name] = node_value
+        else:
+            # Same as `_xml_node_to_dict()`, aggregate duplicate nodes which
+            # are not declared as repeats.
+            if not isinstance(parent_value[node_name], list):
+                parent_value[node_name] = [parent_value[node_name]]
+            parent_value[node_name].append(node_value)
+
+    del context
+
+    if result is None:
+        return root_name, None, attributes
+
+    return root_name, {root_name: result}, attributes
+
+
+def _collect_attributes(element: etree._Element, attributes: dict):
+    """
+    Add attributes of `element` to `attributes` if they are not already present.
+    Like minidom, namespace declarations are considered as attributes.
+    """
+    parent = element.getparent()
+    parent_nsmap = parent.nsmap if parent is not None else {}
+    for prefix, uri in element.nsmap.items():
+        if parent_nsmap.get(prefix) != uri:
+            attributes.setdefault(f'xmlns:{prefix}' if prefix else 'xmlns', uri)
+
+    for key, value in element.attrib.items():
+        attributes.setdefault(_get_qualified_name(element, key), value)
+
+
+def _get_qualified_name(element: etree._Element, name: str) -> str:
+    """
+    Convert lxml Clark notation (`{uri}local`) to the qualified name
+    (`prefix:local`) returned by minidom
+    """
+    if not name.startswith('{'):
+        return name
+
+    uri, local_name = name[1:].split('}', 1)
+    if uri == _XML_NAMESPACE:
+        return f'xml:{local_name}'
+
+    if name == element.tag:
+        prefix = element.prefix
+    else:
+        prefix = next(
+            (p for p, u in element.nsmap.items() if u == uri and p), None
+        )
+
+    return f'{prefix}:{local_name}' if prefix else local_name
+
+
 def _flatten_dict(d, prefix):
     """
     Return a list of XPath, value pairs.
@@ -311,12 +448,23 @@ def _get_attributes_by_node(node):
 
 
 class XFormInstanceParser:
+    """
+    Convert a submission XML to the dict, flat dict and attributes stored
+    in Mongo.
+
+    Parsing is done with lxml `iterparse()` by default. The legacy minidom
+    engine can be selected with `settings.XFORM_INSTANCE_PARSER_ENGINE` or
+    `engine`.
+    """
 
-    def __init__(self, xml_str, data_dictionary, delay_parse=False):
+    def __init__(self, xml_str, data_dictionary, delay_parse=False, engine=None):
         self.dd = data_dictionary
+        self.engine = engine or settings.XFORM_INSTANCE_PARSER_ENGINE
         # The two following variables need to be initialized in the constructor, in case parsing fails.
         self._flat_dict = {}
         self._attributes = {}
+        self._xml_str = xml_str
+        self._root_node = None
         if delay_parse:
             return
         try:
@@ -332,25 +480,47 @@ class XFormInstanceParser:
             six.reraise(*sys.exc_info())
 
     def parse(self, xml_str, repeats=None):
-        self._xml_obj = clean_and_parse_xml(xml_str)
-        self._root_node = self._xml_obj.documentElement
+        self._xml_str = xml_str
         if repeats is None:
             repeats = [
                 get_abbreviated_xpath(e)
                 for e in self.dd.get_survey_elements_of_type('repeat')
             ]
-        self._dict = _xml_node_to_dict(self._root_node, repeats)
+
+        if self.engine == XFORM_INSTANCE_PARSER_ENGINE_MINIDOM:
+            self._xml_obj = clean_and_parse_xml(xml_str)
+            self._root_node = self._xml_obj.documentElement
+            self._root_node_name = self._root_node.nodeName
+            self._dict = _xml_node_to_dict(self._root_node, repeats)
+        else:
+            self._root_node_name, self._dict, attributes = _iterparse_xml(
+                xml_str, repeats
+            )
+
         if self._dict is None:
             raise InstanceEmptyError
         for path, value in _flatten_dict_nest_repeats(self._dict, []):
             self._flat_dict['/'.join(path[1:])] = value
-        self._set_attributes()
+
+        if self.engine == XFORM_INSTANCE_PARSER_ENGINE_MINIDOM:
+            self._set_attributes()
+        else:
+            self._attributes = attributes
 
     def get_root_node(self):
+        """
+        Return the root node as a minidom element.
+
+        With the `iterparse` engine, the XML is only loaded in a DOM tree
+        when this method is called.
+        """
+        if self._root_node is None:
+            self._xml_obj = clean_and_parse_xml(self._xml_str)
+            self._root_node = self._xml_obj.documentElement
         return self._root_node
 
     def get_root_node_name(self):
-        return self._root_node.nodeName
+        return self._root_node_name
 
     def get(self, abbreviated_xpath):
         return self.to_flat_dict()[abbreviated_xpath]
@@ -23,39 +23,23 @@ class Command(BaseCommand):
                             help="id string of the form")
 
     def handle(self, *args, **kwargs):
-        ids = None
+        from kobo.apps.openrosa.apps.logger.models import XForm, Instance
+
         # check for username AND id_string - if one exists so must the other
         if (kwargs.get('username') and not kwargs.get('id_string')) or (
                 not kwargs.get('username') and kwargs.get('id_string')):
             raise CommandError("username and id_string must either both be "
                                "specified or neither")
-        elif kwargs.get('username') and kwargs.get('id_string'):
-            from kobo.apps.openrosa.apps.logger.models import XForm, Instance
+
+        queryset = Instance.objects.filter(parsed_instance__isnull=False)
+        if kwargs.get('username') and kwargs.get('id_string'):
             xform = XForm.objects.get(user__username=kwargs.get('username'),
                                       id_string=kwargs.get('id_string'))
-            ids = [i.pk for i in Instance.objects.filter(xform=xform)]
-        # num records per run
-        batchsize = kwargs['batchsize']
-        start = 0
-        end = start + batchsize
-        filter_queryset = ParsedInstance.objects.all()
-        # instance ids for when we have a username and id_string
-        if ids:
-            filter_queryset = ParsedInstance.objects.filter(instance__in=ids)
-        # total number of records
-        record_count = filter_queryset.count()
-        i = 0
-        while start < record_count:
-            print('Querying record %s to %s' % (start, end-1))
-            queryset = filter_queryset.order_by('pk')[start:end]
-            for pi in queryset.iterator():
-                if pi.update_mongo(asynchronous=False):
-                    i += 1
-                else:
-                    print("\033[91m[ERROR] Could not parse instance {}\033[0m".format(pi.instance.uuid))
-
-            start = start + batchsize
-            end = min(record_count, start + batchsize)
+            queryset = queryset.filter(xform=xform)
+
+        ParsedInstance.bulk_update_mongo(
+            queryset, chunk_size=kwargs['batchsize'], stdout=self.stdout
+        )
         # add indexes after writing so the writing operation above is not
         # slowed
         settings.MONGO_DB.instances.create_index(USERFORM_ID)
@@ -1,20 +1,26 @@
 import json
+import time
 from collections import defaultdict
-from typing import Optional
+from typing import Optional, TextIO
 
 from bson import json_util
 from dateutil import parser
 from django.conf import settings
 from django.db import models
+from django.db.models.query import QuerySet
 from django.db.transaction import get_connection
 from django.utils.translation import gettext as t
-from pymongo import UpdateOne
+from pymongo import ReplaceOne, UpdateOne
 from pymongo.errors import PyMongoError
 
 from kobo.apps.hook.utils.services import call_services
 from kobo.apps.openrosa.apps.logger.models import Attachment, Instance, XForm
 from kobo.apps.openrosa.apps.logger.models.attachment import AttachmentDeleteStatus
-from kobo.apps.openrosa.apps.logger.xform_instance_parser import add_uuid_prefix
+from kobo.apps.openrosa.apps.logger.xform_instance_parser import (
+    XFormInstanceParser,
+    add_uuid_prefix,
+    get_abbreviated_xpath,
+)
 from kobo.apps.openrosa.libs.utils.common_tags import (
     ATTACHMENTS,
     GEOLOCATION,
@@ -294,17 +300,26 @@ class ParsedInstance(models.Model):
         cursor.batch_size = cls.DEFAULT_BATCHSIZE
         return cursor
 
-    def to_dict_for_mongo(self):
+    def to_dict_for_mongo(self, attachments: Optional[list[dict]] = None):
+        """
+        Return the MongoDB document of the instance.
+
+        `attachments` can be provided when they have already been retrieved,
+        e.g. with `_get_grouped_attachments_for_instances()`.
+        """
         d = self.to_dict()
         # TODO remove this check when `root_uuid` has been backfilled
         #   by long-running migration 0005.
         root_uuid = self.instance.root_uuid or self.instance.uuid
 
+        if attachments is None:
+            attachments = _get_attachments_from_instance(self.instance.pk)
+
         data = {
             UUID: self.instance.uuid,
             META_ROOT_UUID: add_uuid_prefix(root_uuid),
             ID: self.instance.id,
-            ATTACHMENTS: _get_attachments_from_instance(self.instance.pk),
+            ATTACHMENTS: attachments,
             self.STATUS: self.instance.status,
             GEOLOCATION: [self.lat, self.lng],
             SUBMISSION_TIME: self.instance.date_created.strftime(MONGO_STRFTIME),
@@ -356,6 +371,134 @@ class ParsedInstance(models.Model):
 
         return True
 
+    @classmethod
+    def bulk_update_mongo(
+        cls,
+        queryset: QuerySet,
+        chunk_size: int = DEFAULT_BATCHSIZE,
+        stdout: Optional[TextIO] = None,
+    ) -> int:
+        """
+        Rebuild the MongoDB documents of all instances of `queryset`.
+
+        Instances are processed by chunks of `chunk_size`. For each chunk,
+        attachments are retrieved with a single query and documents are
+        upserted with a single `bulk_write()`. Missing `ParsedInstance` objects
+        are created along the way, without calling REST services.
+
+        Progress and throughput are written to `stdout` if provided.
+
+        Returns the number of documents written to MongoDB.
+        """
+        queryset = queryset.select_related(
+            'parsed_instance', 'user', 'xform', 'xform__user'
+        ).order_by('pk')
+        total = queryset.count() if stdout else None
+        repeats_by_xform = {}
+        processed = 0
+        written = 0
+        last_pk = 0
+        start_time = time.monotonic()
+
+        while instances := list(queryset.filter(pk__gt=last_pk)[:chunk_size]):
+            last_pk = instances[-1].pk
+            processed += len(instances)
+            grouped_attachments = _get_grouped_attachments_for_instances(
+                [instance.pk for instance in instances]
+            )
+            parsed_instances_to_create = []
+            parsed_instances_to_update = []
+            documents = []
+            mongo_userform_ids = set()
+            synced_instance_ids = []
+
+            for instance in instances:
+                # The form structure is only parsed once per XForm
+                if instance.xform_id not in repeats_by_xform:
+                    data_dictionary = instance.xform.data_dictionary(use_cache=True)
+                    repeats_by_xform[instance.xform_id] = [
+                        get_abbreviated_xpath(e)
+                        for e in data_dictionary.get_survey_elements_of_type(
+                            'repeat'
+                        )
+                    ]
+
+                parser = XFormInstanceParser(
+                    instance.xml, data_dictionary=None, delay_parse=True
+                )
+                try:
+                    parser.parse(
+                        instance.xml, repeats=repeats_by_xform[instance.xform_id]
+                    )
+                except Exception:
+                    logging.error(
+                        f'Could not parse instance #{instance.pk}', exc_info=True
+                    )
+                    continue
+
+                try:
+                    parsed_instance = instance.parsed_instance
+                except cls.DoesNotExist:
+                    parsed_instance = cls(instance=instance)
+                    parsed_instance._set_geopoint()
+                    parsed_instances_to_create.append(parsed_instance)
+
+                submitted_by = parsed_instance.submitted_by
+                parsed_instance.set_submitted_by()
+                if parsed_instance.pk and parsed_instance.submitted_by != submitted_by:
+                    parsed_instances_to_update.append(parsed_instance)
+
+                parsed_instance.mongo_dict_override = (
+                    parser.get_flat_dict_with_attributes()
+                )
+                document = parsed_instance.to_dict_for_mongo(
+                    attachments=grouped_attachments.get(instance.pk, [])
+                )
+                if document.get('_xform_id_string') is None:
+                    # Instance could not be parsed, do not update Mongo
+                    continue
+
+                documents.append(
+                    ReplaceOne({'_id': document['_id']}, document, upsert=True)
+                )
+                mongo_userform_ids.add(document[cls.USERFORM_ID])
+                synced_instance_ids.append(instance.pk)
+
+            if parsed_instances_to_create:
+                cls.objects.bulk_create(
+                    parsed_instances_to_create, ignore_conflicts=True
+                )
+
+            if parsed_instances_to_update:
+                cls.objects.bulk_update(parsed_instances_to_update, ['submitted_by'])
+
+            if documents:
+                try:
+                    xform_instances.bulk_write(documents, ordered=False)
+                except PyMongoError as e:
+                    raise Exception('Submissions could not be saved to Mongo') from e
+
+                # Documents may have been replaced, cached report counters
+                # cannot be updated incrementally
+                MongoHelper.invalidate_report_stats(mongo_userform_ids)
+
+                Instance.objects.filter(
+                    pk__in=synced_instance_ids, is_synced_with_mongo=False
+                ).update(is_synced_with_mongo=True)
+                written += len(documents)
+
+            if stdout:
+                elapsed = time.monotonic() - start_time
+                throughput = processed / elapsed if elapsed else processed
+                stdout.write(
+                    f'{processed}/{total} instances processed '
+                    f'({processed / total * 100:.2f} %), '
+                    f'{throughput:.0f} instances/s\n'
+                )
+                stdout.flush()
+
+        return written
+
     @staticmethod
     def bulk_update_validation_statuses(query, validation_status):
         return MongoHelper.update_many(query, {VALIDATION_STATUS: validation_status})
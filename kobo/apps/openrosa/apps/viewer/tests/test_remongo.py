@@ -1,5 +1,6 @@
 # coding: utf-8
 import os
+from io import StringIO
 from unittest.mock import patch
 
 from django.conf import settings
@@ -7,6 +8,7 @@ from django.core.management import call_command
 from django_digest.test import DigestAuth
 from mock.mock import PropertyMock
 
+from kobo.apps.openrosa.apps.logger.models import Instance
 from kobo.apps.openrosa.apps.main.tests.test_base import TestBase
 from kobo.apps.openrosa.apps.viewer.management.commands.remongo import Command
 from kobo.apps.openrosa.apps.viewer.models.parsed_instance import ParsedInstance
@@ -138,3 +140,33 @@ class TestRemongo(TestBase):
             # call the important internal method
             _update_mongo_for_xform(self.xform, only_update_missing=False)
         patched_get_survey.assert_called_once()
+
+    def test_bulk_update_mongo(self):
+        self._publish_transportation_form()
+        # submit 4 instances
+        self._make_submissions()
+        expected_documents = list(
+            settings.MONGO_DB.instances.find(
+                {USERFORM_ID: get_mongo_userform_id(self.xform, self.user.username)}
+            ).sort('_id', 1)
+        )
+        self.assertEqual(len(expected_documents), 4)
+        # clear mongo and one parsed instance, which must be recreated
+        settings.MONGO_DB.instances.drop()
+        ParsedInstance.objects.filter(
+            instance_id=expected_documents[0]['_id']
+        ).delete()
+
+        stdout = StringIO()
+        written = ParsedInstance.bulk_update_mongo(
+            Instance.objects.filter(xform=self.xform), chunk_size=3, stdout=stdout
+        )
+
+        self.assertEqual(written, 4)
+        self.assertEqual(ParsedInstance.objects.count(), 4)
+        documents = list(settings.MONGO_DB.instances.find().sort('_id', 1))
+        self.assertEqual(documents, expected_documents)
+        # progress is reported once per chunk
+        progress = stdout.getvalue().splitlines()
+        self.assertEqual(len(progress), 2)
+        self.assertTrue(progress[-1].startswith('4/4 instances processed (100.00 %)'))
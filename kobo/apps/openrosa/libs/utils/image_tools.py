@@ -1,11 +1,10 @@
 # coding: utf-8
-from io import BytesIO
 from mimetypes import guess_type
-from tempfile import NamedTemporaryFile
+from tempfile import SpooledTemporaryFile
 
-import requests
 from django.conf import settings
-from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.files.base import File
 from PIL import Image
 from pillow_heif import register_heif_opener
 
@@ -14,7 +13,9 @@ from kpi.constants import UNSUPPORTED_INLINE_MIMETYPES
 from kpi.deployment_backends.kc_access.storage import (
     default_kobocat_storage as default_storage,
 )
-from kpi.utils.storage import is_filesystem_storage
+from kpi.utils.log import logging
+
+THUMBNAILS_CACHE_KEY = 'thumbnails:{filename}'
 
 
 def flat(*nums):
@@ -41,66 +42,108 @@ def get_dimensions(size_, longest_side):
     return flat(width, height)
 
 
-def _save_thumbnails(image, original_path, size, suffix):
-    img_format = image.format
-
-    # Change format to JPEG for unsupported inline mimetypes
-    mimetype, _ = guess_type(original_path)
-    if mimetype in UNSUPPORTED_INLINE_MIMETYPES:
-        img_format = 'JPEG'
+def get_thumbnails_cache_key(filename: str) -> str:
+    return THUMBNAILS_CACHE_KEY.format(filename=filename)
 
-    # Thumbnail format will be set by original file extension.
-    # Use same format to keep transparency of GIF/PNG
-    nm = NamedTemporaryFile(suffix='.%s' % img_format)
-    try:
-        # Ensure conversion to float in operations
-        image.thumbnail(get_dimensions(image.size, float(size)), Image.LANCZOS)
-    except ZeroDivisionError:
-        pass
-    try:
-        image.save(nm.name)
-    except IOError:
-        # e.g. `IOError: cannot write mode P as JPEG`, which gets raised when
-        # someone uploads an image in an indexed-color format like GIF
-        image.convert('RGB').save(nm.name)
-
-    # Try to delete file with the same name if it already exists to avoid useless file.
-    # i.e. if `file_<suffix>.jpg` exists, Storage will save `a_<suffix>_<random_string>.jpg`
-    # but nothing in the code is aware about this `<random_string>
-    try:
-        default_storage.delete(get_optimized_image_path(original_path, suffix))
-    except IOError:
-        pass
 
-    default_storage.save(
-        get_optimized_image_path(original_path, suffix), ContentFile(nm.read())
-    )
+def has_thumbnails(filename: str) -> bool:
+    """
+    Return whether the thumbnails of `filename` exist.
 
-    nm.close()
+    The answer comes from the record kept in the cache by `resize()`. Storage
+    is only probed (once) when there is no record, e.g. for images whose
+    thumbnails were generated before records were kept.
+    """
+    cache_key = get_thumbnails_cache_key(filename)
+    if cache.get(cache_key):
+        return True
+
+    # The smallest thumbnail is saved last, all the others exist if it does
+    smallest_suffix = min(settings.THUMB_CONF, key=settings.THUMB_CONF.get)
+    if default_storage.exists(get_optimized_image_path(filename, smallest_suffix)):
+        cache.set(cache_key, True, settings.THUMBNAILS_CACHE_TTL)
+        return True
+
+    return False
+
+
+def delete_thumbnails_record(filename: str):
+    cache.delete(get_thumbnails_cache_key(filename))
+
+
+def _save_thumbnail(image, img_format, original_path, suffix):
+    # Stream the thumbnail to the storage from a temporary file which stays in
+    # memory unless it is big
+    with SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    ) as thumbnail:
+        try:
+            image.save(thumbnail, format=img_format)
+        except OSError:
+            # e.g. `IOError: cannot write mode P as JPEG`, which gets raised when
+            # someone uploads an image in an indexed-color format like GIF
+            thumbnail.seek(0)
+            thumbnail.truncate()
+            image.convert('RGB').save(thumbnail, format=img_format)
+        thumbnail.seek(0)
+
+        # Try to delete file with the same name if it already exists to avoid
+        # useless file. i.e. if `file_<suffix>.jpg` exists, Storage will save
+        # `a_<suffix>_<random_string>.jpg` but nothing in the code is aware
+        # about this `<random_string>`
+        thumbnail_path = get_optimized_image_path(original_path, suffix)
+        try:
+            default_storage.delete(thumbnail_path)
+        except OSError:
+            pass
+
+        default_storage.save(thumbnail_path, File(thumbnail))
+
+
+def resize(filename: str) -> bool:
+    """
+    Generate all the thumbnails of `filename`, as configured in
+    `settings.THUMB_CONF`, and record that they exist.
 
+    The original is read from the storage and decoded only once. Each
+    thumbnail is made from the previous (bigger) one, from the largest size
+    down to the smallest.
 
-def resize(filename):
-    image = None
+    Return `False` if the original cannot be read.
+    """
     register_heif_opener()
-    if is_filesystem_storage(default_storage):
-        path = default_storage.path(filename)
-        image = Image.open(path)
-        original_path = filename
-    else:
-        path = default_storage.url(filename)
-        original_path = filename
-        req = requests.get(path)
-        if req.status_code == 200:
-            im = BytesIO(req.content)
-            image = Image.open(im)
-
-    if image:
-        [
-            _save_thumbnails(
-                image, original_path, size, suffix
-            )
-            for suffix, size in settings.THUMB_CONF.items()
-        ]
+
+    # Change format to JPEG for unsupported inline mimetypes
+    mimetype, _ = guess_type(filename)
+    force_jpeg = mimetype in UNSUPPORTED_INLINE_MIMETYPES
+
+    try:
+        with default_storage.open(filename, 'rb') as original:
+            image = Image.open(original)
+            # Thumbnail format will be set by original file extension.
+            # Use same format to keep transparency of GIF/PNG
+            img_format = 'JPEG' if force_jpeg else image.format
+            for suffix, size in sorted(
+                settings.THUMB_CONF.items(), key=lambda item: item[1], reverse=True
+            ):
+                try:
+                    # Ensure conversion to float in operations
+                    image.thumbnail(
+                        get_dimensions(image.size, float(size)), Image.LANCZOS
+                    )
+                except ZeroDivisionError:
+                    pass
+                _save_thumbnail(image, img_format, filename, suffix)
+    except OSError as e:
+        logging.warning(
+            f'Could not generate thumbnails of {filename}: {e}', exc_info=True
+        )
+        return False
+
+    cache.set(
+        get_thumbnails_cache_key(filename), True, settings.THUMBNAILS_CACHE_TTL
+    )
+    return True
 
 
 def image_url(attachment, suffix):
@@ -114,22 +157,9 @@ def image_url(attachment, suffix):
     else:
         if suffix in settings.THUMB_CONF:
             filename = attachment.media_file.name
-            if default_storage.exists(filename):
-                if (
-                    default_storage.exists(
-                        get_optimized_image_path(filename, suffix)
-                    )
-                    and default_storage.size(
-                        get_optimized_image_path(filename, suffix)
-                    )
-                    > 0
-                ):
-                    url = default_storage.url(
-                        get_optimized_image_path(filename, suffix)
-                    )
-                else:
-                    resize(filename)
-                    return image_url(attachment, suffix)
-            else:
+            if not has_thumbnails(filename) and not (
+                default_storage.exists(filename) and resize(filename)
+            ):
                 return None
+            url = default_storage.url(get_optimized_image_path(filename, suffix))
     return url
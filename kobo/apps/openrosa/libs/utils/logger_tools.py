@@ -37,6 +37,7 @@ from django.http import (
 from django.utils import timezone as dj_timezone
 from django.utils.encoding import DjangoUnicodeDecodeError, smart_str
 from django.utils.translation import gettext as t
+from lxml import etree
 from modilabs.utils.subprocess_timeout import ProcessTimedOut
 from pyxform.errors import PyXFormError
 from pyxform.xform2json import create_survey_element_from_xml
@@ -72,11 +73,12 @@ from kobo.apps.openrosa.apps.logger.signals import (
     update_xform_daily_counter,
     update_xform_monthly_counter,
 )
-from kobo.apps.openrosa.apps.logger.utils.counters import update_user_counters
+from kobo.apps.openrosa.apps.logger.utils.counters import (
+    record_counter_deltas,
+    update_user_counters,
+)
 from kobo.apps.openrosa.apps.logger.xform_instance_parser import (
-    XFormInstanceParser,
     clean_and_parse_xml,
-    get_abbreviated_xpath,
     get_deprecated_uuid_from_xml,
     get_root_uuid_from_xml,
     get_submission_date_from_xml,
@@ -89,7 +91,11 @@ from kobo.apps.openrosa.libs.utils import common_tags
 from kobo.apps.openrosa.libs.utils.model_tools import queryset_iterator, set_uuid
 from kobo.apps.openrosa.libs.utils.viewer_tools import get_mongo_userform_id
 from kobo.apps.organizations.constants import UsageType
-from kobo.apps.stripe.utils.limit_enforcement import check_exceeded_limit
+from kobo.apps.stripe.utils.limit_enforcement import (
+    check_exceeded_limit,
+    consume_usage_tokens,
+    get_exceeded_usage_type,
+)
 from kpi.constants import PERM_ADD_SUBMISSIONS, PERM_CHANGE_SUBMISSIONS
 from kpi.deployment_backends.kc_access.storage import (
     default_kobocat_storage as default_storage,
@@ -98,7 +104,6 @@ from kpi.deployment_backends.kc_access.utils import kc_transaction_atomic
 from kpi.utils.hash import calculate_hash
 from kpi.utils.mongo_helper import MongoHelper
 from kpi.utils.object_permission import get_database_user
-from kpi.utils.usage_calculator import ServiceUsageCalculator
 from kpi.utils.xml import fromstring_preserve_root_xmlns
 
 OPEN_ROSA_VERSION_HEADER = 'X-OpenRosa-Version'
@@ -233,20 +238,18 @@ def create_instance(
     xml_hash = Instance.get_hash(xml)
     xform = get_xform_from_submission(xml, username, uuid)
     check_submission_permissions(request, xform)
+    # `get_exceeded_usage_type()` only reads the remaining quota tokens of the
+    # organization. Usage is calculated only when they have expired.
     if (
         settings.STRIPE_ENABLED
         and constance.config.USAGE_LIMIT_ENFORCEMENT
         and check_usage_limits
+        and (usage_type := get_exceeded_usage_type(xform.user))
     ):
-        calculator = ServiceUsageCalculator(xform.user)
-        balances = calculator.get_usage_balances()
-        for usage_type in [UsageType.STORAGE_BYTES, UsageType.SUBMISSION]:
-            balance = balances[usage_type]
-            if balance and balance['exceeded']:
-                check_exceeded_limit(xform.user, UsageType.SUBMISSION)
-                check_exceeded_limit(xform.user, UsageType.STORAGE_BYTES)
+        check_exceeded_limit(xform.user, UsageType.SUBMISSION)
+        check_exceeded_limit(xform.user, UsageType.STORAGE_BYTES)
 
-                raise ExceededUsageLimitError({'type': usage_type})
+        raise ExceededUsageLimitError({'type': usage_type})
 
     # get root uuid
     root_uuid, fallback_on_uuid = get_root_uuid_from_xml(xml)
@@ -279,7 +282,7 @@ def create_instance(
             else:
                 # Update Mongo via the related ParsedInstance
                 existing_instance.parsed_instance.save(asynchronous=False)
-                update_user_counters(
+                _update_counters(
                     existing_instance,
                     existing_instance.xform.user_id,
                     attachment_storage_bytes=total_bytes,
@@ -332,20 +335,23 @@ def create_instance(
                 # Remove the Python-only attribute
                 del instance.defer_counting
 
-                update_xform_daily_counter(
-                    sender=Instance,
-                    instance=instance,
-                    created=True,
-                    xform=instance.xform,
-                )
-                update_xform_monthly_counter(
-                    sender=Instance,
-                    instance=instance,
-                    created=True,
-                    xform=instance.xform,
-                )
+                # With write-behind counters, daily and monthly counters are
+                # updated by `flush_submission_counter_deltas` too.
+                if not settings.SUBMISSION_COUNTERS_WRITE_BEHIND:
+                    update_xform_daily_counter(
+                        sender=Instance,
+                        instance=instance,
+                        created=True,
+                        xform=instance.xform,
+                    )
+                    update_xform_monthly_counter(
+                        sender=Instance,
+                        instance=instance,
+                        created=True,
+                        xform=instance.xform,
+                    )
 
-            update_user_counters(
+            _update_counters(
                 instance,
                 instance.xform.user_id,
                 attachment_storage_bytes=total_bytes,
@@ -353,8 +359,12 @@ def create_instance(
             )
 
             if settings.STRIPE_ENABLED:
-                check_exceeded_limit(xform.user, UsageType.SUBMISSION)
-                check_exceeded_limit(xform.user, UsageType.STORAGE_BYTES)
+                for usage_type in consume_usage_tokens(
+                    xform.user,
+                    submissions=1 if defer_counting else 0,
+                    storage_bytes=total_bytes,
+                ):
+                    check_exceeded_limit(xform.user, usage_type)
 
             return instance
 
@@ -583,7 +593,7 @@ def http_open_rosa_error_handler(func, request):
     except XForm.DoesNotExist:
         result.error = t('Form does not exist on this account')
         result.http_error_response = OpenRosaResponseNotFound(result.error)
-    except (ExpatError, ParseError):
+    except (ExpatError, ParseError, etree.XMLSyntaxError):
         result.error = t('Improperly formatted XML.')
         result.http_error_response = OpenRosaResponseBadRequest(result.error)
     except (ConflictingSubmissionUUIDError, ConflictingAttachmentBasenameError) as e:
@@ -1267,6 +1277,13 @@ def _has_edit_xform_permission(
     return False
 
 
+def _update_counters(instance: Instance, user_id: int, **kwargs):
+    if settings.SUBMISSION_COUNTERS_WRITE_BEHIND:
+        record_counter_deltas(instance, user_id, **kwargs)
+    else:
+        update_user_counters(instance, user_id, **kwargs)
+
+
 def _update_mongo_for_xform(xform, only_update_missing=True):
     xform.refresh_from_db(fields=xform.get_deferred_fields())
 
@@ -1292,48 +1309,13 @@ def _update_mongo_for_xform(xform, only_update_missing=True):
 
     # get instances
     sys.stdout.write('Total no of instances to update: %d\n' % len(instance_ids))
-    instances = Instance.objects.only('id', 'xml', 'json').in_bulk(
-        [id_ for id_ in instance_ids]
-    )
-    total = len(instances)
-    done = 0
-
-    data_dict = xform.data_dictionary(use_cache=True)
-    repeat_groups = [
-        get_abbreviated_xpath(e)
-        for e in data_dict.get_survey_elements_of_type('repeat')
-    ]
-    for id_, instance in instances.items():
-        parser = XFormInstanceParser(
-            instance.xml, data_dictionary=None, delay_parse=True
-        )
-        parser.parse(instance.xml, repeats=repeat_groups)
-        as_dict = parser.get_flat_dict_with_attributes()
-        try:
-            (pi, created) = ParsedInstance.objects.get_or_create(
-                instance=instance, defaults={'mongo_dict_override': as_dict}
-            )
-            if not created:
-                pi.mongo_dict_override = as_dict
-                save_success = pi.save(asynchronous=False)
-                if not save_success:
-                    print(
-                        '\033[91m[ERROR] - Instance #{}/uuid:{} - Could not save '
-                        'the parsed instance\033[0m'.format(id_, instance.uuid)
-                    )
-                else:
-                    done += 1
-            else:
-                done += 1
-        except InstanceEmptyError:
-            print(
-                '\033[91m[WARNING] - Skipping Instance #{}/uuid:{} because '
-                'it is empty\033[0m'.format(id_, instance.uuid)
-            )
+    if only_update_missing:
+        instances = Instance.objects.filter(pk__in=instance_ids)
+    else:
+        instances = Instance.objects.filter(xform=xform)
 
-        progress = '\r%.2f %% done...' % ((float(done) / float(total)) * 100)
-        sys.stdout.write(progress)
-        sys.stdout.flush()
+    ParsedInstance.bulk_update_mongo(instances, stdout=sys.stdout)
+    MongoHelper.invalidate_report_stats([userform_id])
 
     sys.stdout.write(
         '\nUpdated %s\n------------------------------------------\n' % xform.id_string
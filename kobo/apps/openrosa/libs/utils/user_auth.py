@@ -10,6 +10,9 @@ from rest_framework.request import Request as DRFRequest
 from kobo.apps.kobo_auth.shortcuts import User
 from kobo.apps.openrosa.apps.api.utils.rest_framework import openrosa_drf_settings
 from kobo.apps.openrosa.apps.logger.models import XForm
+from kobo.apps.openrosa.apps.logger.utils.counters import (
+    get_pending_num_of_submissions_by_user_id,
+)
 from kobo.apps.openrosa.apps.main.models import UserProfile
 from kobo.apps.openrosa.libs.utils.string import base64_encodestring
 from kpi.constants import PERM_CHANGE_ASSET, PERM_DELETE_SUBMISSIONS, PERM_VIEW_ASSET
@@ -48,7 +51,11 @@ def set_profile_data(data, content_user):
         location += profile.country
     forms = content_user.xforms.filter(shared__exact=1)
     num_forms = forms.count()
-    user_instances = profile.num_of_submissions
+    user_instances = profile.num_of_submissions + (
+        get_pending_num_of_submissions_by_user_id([content_user.pk]).get(
+            content_user.pk, 0
+        )
+    )
     home_page = profile.home_page
     if home_page and re.match('http', home_page) is None:
         home_page = 'http://%s' % home_page
@@ -11,6 +11,7 @@ from kobo.apps.kobo_auth.shortcuts import User
 from kobo.apps.organizations.models import Organization
 from kobo.apps.stripe.utils.billing_dates import get_current_billing_period_dates_by_org
 from kpi.models.object_permission import ObjectPermission
+from kpi.utils.user_assets_version import invalidate_user_assets_version
 
 
 def get_billing_dates(organization: Union['Organization', None]):
@@ -63,3 +64,6 @@ def revoke_org_asset_perms(organization: Organization, user_ids: list[int]):
     while perms_to_delete.exists():
         pks_to_delete = list(perms_to_delete.values_list('pk', flat=True)[:batch_size])
         ObjectPermission.objects.filter(pk__in=pks_to_delete).delete()
+
+    # Permissions are deleted without any signal
+    invalidate_user_assets_version(safe_user_ids)
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock, patch
 from constance.test import override_config
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
 from django.test import override_settings
 from rest_framework import status
 from rest_framework.reverse import reverse
@@ -585,6 +586,46 @@ class ProjectOwnershipTransferDataAPITestCase(BaseAssetTestCase):
             thumbnail = f'{filename}-{size}.jpg'
             self.assertFalse(default_storage.exists(thumbnail))
 
+    @override_config(PROJECT_OWNERSHIP_AUTO_ACCEPT_INVITES=True)
+    def test_transcoded_audio_is_moved_after_transfer(self):
+        """
+        Test that the transcoded audio files stored next to an audio attachment
+        follow it to the new owner's storage directory
+        """
+        self.client.login(username='someuser', password='someuser')
+
+        attachment = Attachment.objects.get(
+            user__username='someuser', mimetype='video/3gpp'
+        )
+        old_media_file_path = attachment.media_file.name
+        for audio_format in Attachment.AVAILABLE_OUTPUT_FORMATS:
+            default_storage.save(
+                f'{old_media_file_path}.{audio_format}', ContentFile(b'audio')
+            )
+
+        payload = {
+            'recipient': self.absolute_reverse(
+                self._get_endpoint('user-kpi-detail'),
+                args=[self.anotheruser.username]
+            ),
+            'assets': [self.asset.uid]
+        }
+
+        with immediate_on_commit():
+            response = self.client.post(
+                self.invite_url, data=payload, format='json'
+            )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        attachment.refresh_from_db()
+        new_media_file_path = attachment.media_file.name
+        assert new_media_file_path.startswith(f'{self.anotheruser.username}/')
+        for audio_format in Attachment.AVAILABLE_OUTPUT_FORMATS:
+            assert not default_storage.exists(
+                f'{old_media_file_path}.{audio_format}'
+            )
+            assert default_storage.exists(f'{new_media_file_path}.{audio_format}')
+
     @patch(
         'kobo.apps.project_ownership.tasks.move_attachments',
         MagicMock()
@@ -1,5 +1,6 @@
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Literal, Optional, Union
 
 from django.apps import apps
@@ -9,6 +10,7 @@ from django.utils import timezone
 
 from kobo.apps.openrosa.apps.logger.models.attachment import Attachment
 from kobo.apps.openrosa.apps.main.models import MetaData
+from kobo.apps.openrosa.libs.utils.image_tools import delete_thumbnails_record
 from kobo.apps.project_ownership.models import InviteStatusChoices
 from kpi.deployment_backends.kc_access.storage import default_kobocat_storage
 from kpi.exceptions import SourceFileMissingError
@@ -75,7 +77,6 @@ def get_target_folder(
 def move_attachments(transfer: 'project_ownership.Transfer'):
     TransferStatus = apps.get_model('project_ownership', 'TransferStatus')
 
-
     async_task_type = TransferStatusTypeChoices.ATTACHMENTS
     transfer_status = transfer.statuses.get(status_type=async_task_type)
 
@@ -90,52 +91,49 @@ def move_attachments(transfer: 'project_ownership.Transfer'):
             '`_userform_id` has not been updated successfully'
         )
 
-    submissions = transfer.asset.deployment.get_submissions(
-        transfer.asset.owner, fields=['_id']
-    )
-
-    submission_ids = [
-        s['_id']
-        for s in submissions
-    ]
-
-    if not submission_ids:
-        _mark_task_as_successful(transfer, async_task_type)
-        return
-
-    attachments = Attachment.all_objects.filter(instance_id__in=submission_ids).exclude(
-        media_file__startswith=f'{transfer.asset.owner.username}/'
+    attachments = (
+        Attachment.all_objects.filter(xform_id=transfer.asset.deployment.xform_id)
+        .exclude(media_file__startswith=f'{transfer.asset.owner.username}/')
+        .order_by('pk')
     )
+    batch_size = settings.PROJECT_OWNERSHIP_ATTACHMENTS_BATCH_SIZE
 
     heartbeat = int(time.time())
     # Moving files is pretty slow, thus it should run in a celery task.
+    # Files are moved by a pool of threads which only talk to the storage;
+    # the database is updated by this thread, once per batch.
     errors = False
-    for attachment in attachments.iterator():
-        try:
-            update_fields = ['user_id']
-            media_file_path = attachment.media_file.name
-            logging.info(f'Attempting to migrate {media_file_path}')
-            if (
-                target_folder := get_target_folder(
-                    transfer.invite.sender.username,
-                    transfer.invite.recipient.username,
-                    media_file_path,
-                )
-            ):
-                # There is no way to ensure atomicity when moving the file and
-                # saving the object to the database. Fingers crossed that the
-                # process doesn't get interrupted between these two operations.
-                try:
-                    moved = attachment.media_file.move(
-                        target_folder, reraise_errors=True
+    last_pk = 0
+    with ThreadPoolExecutor(
+        max_workers=settings.PROJECT_OWNERSHIP_ATTACHMENTS_MAX_WORKERS
+    ) as executor:
+        # Page by primary key: attachments which could not be moved still
+        # match the queryset and must not be fetched again.
+        while batch := list(attachments.filter(pk__gt=last_pk)[:batch_size]):
+            last_pk = batch[-1].pk
+            updated_attachments = []
+            futures = {}
+
+            for attachment in batch:
+                if (
+                    target_folder := get_target_folder(
+                        transfer.invite.sender.username,
+                        transfer.invite.recipient.username,
+                        attachment.media_file.name,
                     )
-                except SourceFileMissingError:
-                    # Either a previous run moved the file and died before
-                    # saving, or the file is gone. The target tells them apart.
-                    moved = _recover_moved_file(
-                        attachment.media_file, target_folder, media_file_path
+                ):
+                    future = executor.submit(
+                        _move_attachment_file, attachment, target_folder
                     )
-                    if not moved:
+                    futures[future] = attachment
+                else:
+                    attachment.user_id = transfer.invite.recipient.pk
+                    updated_attachments.append(attachment)
+
+            for future in as_completed(futures):
+                attachment = futures[future]
+                try:
+                    if not future.result():
                         # Already logged by `ExtendedFieldFile.move()`.
                         TransferStatus._add_error(
                             transfer_status,
@@ -144,34 +142,34 @@ def move_attachments(transfer: 'project_ownership.Transfer'):
                             f'(data already gone)',
                             level=TransferStatusErrorLevelChoices.WARNING,
                         )
-                if moved:
-                    update_fields.append('media_file')
-                    logging.info(
-                        f'Successfully migrated {media_file_path} to {target_folder}'
+                    attachment.user_id = transfer.invite.recipient.pk
+                    updated_attachments.append(attachment)
+                except Exception as e:
+                    # TODO: remove this general exception when we have a better
+                    # idea of the errors
+                    errors = True
+                    TransferStatus._add_error(
+                        transfer_status,
+                        f'Error moving {attachment.media_file_basename}: {e}',
+                    )
+                    # also log to console so we get the stack trace
+                    logging.error(
+                        f'Error moving {attachment.media_file_basename}',
+                        exc_info=True,
+                        stack_info=True,
+                    )
+                finally:
+                    heartbeat = _update_heartbeat(
+                        heartbeat, transfer, async_task_type
                     )
 
-                # Runs even when the file did not move: thumbnails of a gone
-                # source would be orphaned.
-                _delete_thumbnails(media_file_path)
-
-            attachment.user_id = transfer.invite.recipient.pk
-            attachment.save(update_fields=update_fields)
-
-        except Exception as e:
-            # TODO: remove this general exception when we have a better idea of
-            # the errors
-            errors = True
-            TransferStatus._add_error(
-                transfer_status, f'Error moving {attachment.media_file_basename}: {e}'
-            )
-            # also log to console so we get the stack trace
-            logging.error(
-                f'Error moving {attachment.media_file_basename}',
-                exc_info=True,
-                stack_info=True,
+            # There is no way to ensure atomicity when moving the files and
+            # saving the objects to the database. If the process gets
+            # interrupted in between, the next run completes the update with
+            # `_recover_moved_file()`.
+            Attachment.all_objects.bulk_update(
+                updated_attachments, ['user', 'media_file']
             )
-        finally:
-            heartbeat = _update_heartbeat(heartbeat, transfer, async_task_type)
 
     if errors:
         raise AsyncTaskException('Some attachments could not be moved')
@@ -375,6 +373,64 @@ def _delete_thumbnails(media_file_path: str):
             except Exception as e:
                 logging.warning(f'Could not delete thumbnail: {thumb_path} ({e})')
 
+    delete_thumbnails_record(media_file_path)
+
+
+def _move_attachment_file(attachment: Attachment, target_folder: str) -> bool:
+    """
+    Move the file of `attachment` to `target_folder` and delete its thumbnails.
+
+    Return `False` if the source file is gone. It runs in a worker thread,
+    thus it must only talk to the storage, not to the database.
+    """
+    media_file_path = attachment.media_file.name
+    logging.info(f'Attempting to migrate {media_file_path}')
+    try:
+        moved = attachment.media_file.move(target_folder, reraise_errors=True)
+    except SourceFileMissingError:
+        # Either a previous run moved the file and died before saving, or the
+        # file is gone. The target tells them apart.
+        moved = _recover_moved_file(
+            attachment.media_file, target_folder, media_file_path
+        )
+    if moved:
+        logging.info(f'Successfully migrated {media_file_path} to {target_folder}')
+
+    # Runs even when the file did not move: thumbnails of a gone source would
+    # be orphaned.
+    _delete_thumbnails(media_file_path)
+    if attachment.mimetype.startswith(Attachment.SUPPORTED_INPUT_MIMETYPE_PREFIXES):
+        _move_transcoded_audio(
+            media_file_path, attachment.media_file.name if moved else None
+        )
+    return moved
+
+
+def _move_transcoded_audio(
+    old_media_file_path: str, new_media_file_path: str | None
+):
+    """
+    Move the transcoded audio files stored next to an original attachment.
+
+    They are stored at `<media_file>.<format>` and looked up by that path (see
+    `AudioTranscodingMixin`), thus they must follow the original. They are
+    deleted when the original did not move (i.e. `new_media_file_path` is
+    `None`), since they would be orphaned otherwise.
+    """
+    for audio_format in Attachment.AVAILABLE_OUTPUT_FORMATS:
+        old_path = f'{old_media_file_path}.{audio_format}'
+        if not default_kobocat_storage.exists(old_path):
+            continue
+        try:
+            if new_media_file_path:
+                with default_kobocat_storage.open(old_path, 'rb') as f:
+                    default_kobocat_storage.save(
+                        f'{new_media_file_path}.{audio_format}', f
+                    )
+            default_kobocat_storage.delete(old_path)
+        except Exception as e:
+            logging.warning(f'Could not move transcoded audio: {old_path} ({e})')
+
 
 def _recover_moved_file(field_file, target_folder: str, old_path: str) -> bool:
     """
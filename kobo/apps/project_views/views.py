@@ -13,7 +13,10 @@ from kobo.apps.kobo_auth.shortcuts import User
 from kpi.constants import ASSET_TYPE_SURVEY
 from kpi.filters import AssetOrderingFilter, SearchFilter
 from kpi.mixins.asset import AssetViewSetListMixin
-from kpi.mixins.object_permission import ObjectPermissionViewSetMixin
+from kpi.mixins.object_permission import (
+    ObjectPermissionViewSetMixin,
+    PermissionMatrix,
+)
 from kpi.models import Asset, ProjectViewExportTask
 from kpi.paginators import FastPagination, NoCountPagination
 from kpi.permissions import IsAuthenticated
@@ -373,6 +376,10 @@ class ProjectViewViewSet(
         ],
     ):
         context_ = self.get_serializer_context(queryset)
+        if serializer_class is AssetMetadataListSerializer:
+            context_['permission_matrix'] = PermissionMatrix(
+                queryset, [self.request.user]
+            )
 
         return serializer_class(
             queryset,
@@ -11,3 +11,13 @@ DEFAULT_REPORTS_KEY = 'default'
 FUZZY_VERSION_ID_KEY = '_version_'
 FUZZY_VERSION_PATTERN = r'^__?version__?(\d{3})?$'
 INFERRED_VERSION_ID_KEY = '__inferred_version__'
+
+# Types of the fields whose stats are computed by MongoDB aggregation instead
+# of streaming all the submissions to formpack. See `report_stats`
+AGGREGATED_DATA_TYPES = [
+    'select_one',
+    'select_multiple',
+    'integer',
+    'decimal',
+]
+REPORT_STATS_CACHE_KEY = 'report_stats:{mongo_userform_id}'
@@ -1,68 +1,68 @@
 # coding: utf-8
+import pickle
 from collections import OrderedDict
 from copy import deepcopy
+from typing import NamedTuple
 
+from django.conf import settings
 from django.utils.translation import gettext as t
 from formpack import FormPack
 from rest_framework import serializers
 
+from kpi.constants import PERM_VIEW_SUBMISSIONS
 from kpi.utils.bugfix import repair_file_column_content_and_save
+from kpi.utils.cache import LocalLRUCache
 from kpi.utils.log import logging
+from . import report_stats
 from .constants import FUZZY_VERSION_ID_KEY, INFERRED_VERSION_ID_KEY
 
 
+class CompiledFormPack(NamedTuple):
+    # `None` if the pack cannot be pickled; it is not cached then
+    pickled_pack: bytes | None
+    version_ids_newest_first: list
+    reversion_ids: dict
+
+
+# Compiled `FormPack`s, pickled, by asset and set of versions
+_formpack_cache = LocalLRUCache(settings.FORMPACK_LOCAL_CACHE_SIZE)
+
+
 def build_formpack(asset, submission_stream=None, use_all_form_versions=True):
     """
     Return a tuple containing a `FormPack` instance and the iterable stream of
     submissions for the given `asset`. If `use_all_form_versions` is `False`,
     then only the newest version of the form is considered, and all submissions
     are assumed to have been collected with that version of the form.
-    """
 
-    # Cope with kobotoolbox/formpack#322, which wrote invalid content into the
-    # database
-    repair_file_column_content_and_save(asset)
+    The compiled `FormPack` is cached per process by asset, and by version uids
+    and content hashes: content repaired in place (see
+    `repair_file_column_content_and_save()`) gets a new hash. A new instance
+    is returned on each call because callers are free to alter it (e.g.
+    `extend_survey()`).
+    """
 
     if asset.has_deployment:
-        if use_all_form_versions:
-            _versions = asset.deployed_versions
-        else:
-            _versions = [asset.deployed_versions.first()]
+        versions = asset.deployed_versions
+        if not use_all_form_versions:
+            versions = versions[:1]
     else:
         # Use the newest version only if the asset was never deployed
-        _versions = [asset.asset_versions.first()]
+        versions = asset.asset_versions.all()[:1]
 
-    schemas = []
-    version_ids_newest_first = []
-    for v in _versions:
-        try:
-            fp_schema = v.to_formpack_schema()
-        # FIXME: should FormPack validation errors have their own
-        # exception class?
-        except TypeError as e:
-            # https://github.com/kobotoolbox/kpi/issues/1361
-            logging.error(
-                f'Failed to get formpack schema for version: {repr(e)}',
-                exc_info=True
-            )
-        else:
-            fp_schema['version_id_key'] = INFERRED_VERSION_ID_KEY
-            schemas.append(fp_schema)
-            version_ids_newest_first.append(v.uid)
-            if v.uid_aliases:
-                version_ids_newest_first.extend(v.uid_aliases)
-
-    if not schemas:
-        raise Exception('Cannot build formpack without any schemas')
-
-    # FormPack() expects the versions to be ordered from oldest to newest
-    pack = FormPack(versions=reversed(schemas), title=asset.name, id_string=asset.uid)
-
-    # Find the AssetVersion UID for each deprecated reversion ID
-    _reversion_ids = dict([
-        (str(v._reversion_version), v.uid)
-        for v in _versions if v._reversion_version
-    ])
+    cache_key = (
+        asset.uid,
+        asset.name,
+        tuple(versions.values_list('uid', '_content_hash')),
+    )
+    if (compiled_formpack := _formpack_cache.get(cache_key)) is None:
+        pack, compiled_formpack = _compile_formpack(asset, versions)
+        if compiled_formpack.pickled_pack is not None:
+            _formpack_cache.set(cache_key, compiled_formpack)
+    else:
+        pack = pickle.loads(compiled_formpack.pickled_pack)
+    version_ids_newest_first = compiled_formpack.version_ids_newest_first
+    _reversion_ids = compiled_formpack.reversion_ids
 
     # A submission often contains many version keys, e.g. `__version__`,
     # `_version_`, `_version__001`, `_version__002`, each with a different
@@ -97,7 +97,9 @@ def build_formpack(asset, submission_stream=None, use_all_form_versions=True):
         return submission
 
     if submission_stream is None:
-        submission_stream = asset.deployment.get_submissions(user=asset.owner)
+        submission_stream = asset.deployment.get_submissions(
+            user=asset.owner, skip_count=True
+        )
 
     submission_stream = (
         _infer_version_id(submission) for submission in submission_stream
@@ -106,6 +108,57 @@ def build_formpack(asset, submission_stream=None, use_all_form_versions=True):
     return pack, submission_stream
 
 
+def _compile_formpack(asset, versions) -> tuple[FormPack, CompiledFormPack]:
+
+    # Cope with kobotoolbox/formpack#322, which wrote invalid content into the
+    # database
+    repair_file_column_content_and_save(asset)
+
+    schemas = []
+    version_ids_newest_first = []
+    for v in versions:
+        try:
+            fp_schema = asset.get_version_formpack_schema(v)
+        # FIXME: should FormPack validation errors have their own
+        # exception class?
+        except TypeError as e:
+            # https://github.com/kobotoolbox/kpi/issues/1361
+            logging.error(
+                f'Failed to get formpack schema for version: {repr(e)}',
+                exc_info=True
+            )
+        else:
+            fp_schema['version_id_key'] = INFERRED_VERSION_ID_KEY
+            schemas.append(fp_schema)
+            version_ids_newest_first.append(v.uid)
+            if v.uid_aliases:
+                version_ids_newest_first.extend(v.uid_aliases)
+
+    if not schemas:
+        raise Exception('Cannot build formpack without any schemas')
+
+    # FormPack() expects the versions to be ordered from oldest to newest
+    pack = FormPack(versions=reversed(schemas), title=asset.name, id_string=asset.uid)
+
+    # Find the AssetVersion UID for each deprecated reversion ID
+    reversion_ids = dict([
+        (str(v._reversion_version), v.uid)
+        for v in versions if v._reversion_version
+    ])
+
+    try:
+        pickled_pack = pickle.dumps(pack, protocol=pickle.HIGHEST_PROTOCOL)
+    except (AttributeError, TypeError, pickle.PicklingError) as e:
+        logging.warning(f'Failed to pickle formpack: {e!r}')
+        pickled_pack = None
+
+    return pack, CompiledFormPack(
+        pickled_pack=pickled_pack,
+        version_ids_newest_first=version_ids_newest_first,
+        reversion_ids=reversion_ids,
+    )
+
+
 # TODO validate if this function is still in used.
 def _vnames(asset, cache=False):
     if not cache or not hasattr(asset, '_available_report_uids'):
@@ -119,7 +172,27 @@ def _vnames(asset, cache=False):
 
 def data_by_identifiers(asset, field_names=None, submission_stream=None,
                         report_styles=None, lang=None, fields=None,
-                        split_by=None):
+                        split_by=None, user=None):
+    """
+    Return the stats of the fields of `field_names` (all of them if `None`).
+
+    When `user` is provided instead of `submission_stream`, the stats of the
+    fields supported by `report_stats` are computed by MongoDB, and only the
+    other ones are computed by formpack from the submissions `user` can view.
+    """
+    # Only fetch the submissions if formpack needs them
+    use_aggregation = (
+        submission_stream is None
+        and user is not None
+        and not split_by
+        and asset.has_deployment
+        and asset.get_filters_for_partial_perm(
+            user.pk, perm=PERM_VIEW_SUBMISSIONS
+        ) is None
+    )
+    if submission_stream is None and user is not None:
+        submission_stream = _iter_submissions(asset, user)
+
     pack, submission_stream = build_formpack(asset, submission_stream)
     _all_versions = pack.versions.keys()
     report = pack.autoreport(versions=_all_versions)
@@ -128,7 +201,9 @@ def data_by_identifiers(asset, field_names=None, submission_stream=None,
                 pack.get_fields_for_versions(versions=_all_versions)
         ])
     if field_names is None:
-        field_names = fields_by_name.keys()
+        field_names = list(fields_by_name.keys())
+    else:
+        field_names = list(field_names)
     if split_by and (split_by not in fields_by_name):
         raise serializers.ValidationError(
             {'split_by': t('`{}` not found.').format(split_by)}
@@ -170,10 +245,45 @@ def data_by_identifiers(asset, field_names=None, submission_stream=None,
             'style': specified_styles.get(identifier, {}),
         }
 
+    if not use_aggregation:
+        return [
+            _package_stat(*stat_tup, split_by=split_by) for
+            stat_tup in report.get_stats(submission_stream,
+                                         fields=field_names,
+                                         lang=lang,
+                                         split_by=split_by)
+        ]
+
+    aggregated_stats = report_stats.get_aggregated_stats(
+        asset, fields_by_name.values(), field_names, lang=lang
+    )
+    # formpack without any submissions tells which fields are reported, and in
+    # which order
+    stat_tups = OrderedDict(
+        (stat_tup[0].name, stat_tup)
+        for stat_tup in report.get_stats([], fields=field_names, lang=lang)
+    )
+    streamed_field_names = [
+        name for name in stat_tups if name not in aggregated_stats
+    ]
+    if streamed_field_names:
+        for stat_tup in report.get_stats(
+            submission_stream, fields=streamed_field_names, lang=lang
+        ):
+            stat_tups[stat_tup[0].name] = stat_tup
+
     return [
-        _package_stat(*stat_tup, split_by=split_by) for
-        stat_tup in report.get_stats(submission_stream,
-                                     fields=field_names,
-                                     lang=lang,
-                                     split_by=split_by)
+        _package_stat(
+            field,
+            label,
+            aggregated_stats.get(field.name, stat),
+            split_by=split_by,
+        )
+        for field, label, stat in stat_tups.values()
     ]
+
+
+def _iter_submissions(asset, user):
+    # Deployment backends may fetch all submissions as soon as
+    # `get_submissions()` is called
+    yield from asset.deployment.get_submissions(user, skip_count=True)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from kpi.utils.mongo_helper import MongoHelper
+
+from .constants import AGGREGATED_DATA_TYPES, REPORT_STATS_CACHE_KEY
+
+
+def get_aggregated_stats(asset, fields, field_names, lang=None) -> dict:
+    """
+    Return the stats of the fields of `field_names` whose type is one of
+    `AGGREGATED_DATA_TYPES`, by field name.
+
+    The values of these fields are counted by MongoDB instead of streaming
+    all the submissions, then passed to formpack as the counters its
+    `AutoReport` would have built. Thus, the stats are the same as the ones
+    of `pack.autoreport().get_stats()`.
+
+    `fields` are all the formpack fields of the asset, the counters of all
+    aggregated ones are kept together in the cache.
+    """
+    aggregated_fields = [
+        field
+        for field in fields
+        if field.data_type in AGGREGATED_DATA_TYPES and field.has_stats
+    ]
+    if not aggregated_fields:
+        return {}
+
+    raw_counters = _get_raw_counters(
+        asset.deployment.mongo_userform_id,
+        sorted({field.path for field in aggregated_fields}),
+    )
+    stats = {}
+    for field in aggregated_fields:
+        if field.name not in field_names:
+            continue
+
+        metrics = Counter()
+        for raw_value, count in raw_counters[field.path].items():
+            if raw_value is None:
+                metrics[None] += count
+                continue
+            for value in field.parse_values(raw_value):
+                metrics[value] += count
+            metrics['__submissions__'] += count
+        stats[field.name] = field.get_stats(metrics, lang=lang)
+
+    return stats
+
+
+def _aggregate(query: dict, paths: list[str]) -> dict[str, Counter]:
+    """
+    Count the occurrences of each raw value of `paths` among the submissions
+    matching `query`, in a single pass over them.
+    """
+    pipeline = [
+        {'$match': query},
+        {
+            '$project': {
+                '_id': 0,
+                'values': [{'path': path, 'value': f'${path}'} for path in paths],
+            }
+        },
+        {'$unwind': '$values'},
+        {
+            '$group': {
+                '_id': {'path': '$values.path', 'value': '$values.value'},
+                'count': {'$sum': 1},
+            }
+        },
+    ]
+    counters = defaultdict(Counter)
+    for group in settings.MONGO_DB.instances.aggregate(
+        pipeline, allowDiskUse=True, maxTimeMS=MongoHelper.get_max_time_ms()
+    ):
+        # A missing value is not part of the group id
+        counters[group['_id']['path']][group['_id'].get('value')] += group['count']
+
+    return {path: counters[path] for path in paths}
+
+
+def _get_raw_counters(mongo_userform_id: str, paths: list[str]) -> dict[str, Counter]:
+    """
+    Return the counters of raw values of `paths`, from the cache if no
+    submissions have been added, edited or deleted since they were computed.
+
+    When submissions have only been added, the new ones are counted and added
+    to the cached counters. Edits and deletions invalidate the cache (see
+    `MongoHelper.invalidate_report_stats()`).
+    """
+    collection = settings.MONGO_DB.instances
+    cache_key = REPORT_STATS_CACHE_KEY.format(mongo_userform_id=mongo_userform_id)
+    query = {MongoHelper.USERFORM_ID: mongo_userform_id}
+
+    count = collection.count_documents(query)
+    last_submission = next(
+        collection.find(query, {'_id': 1}).sort('_id', -1).limit(1), None
+    )
+    max_id = last_submission['_id'] if last_submission else 0
+    # Submissions added while counting are left for the next time
+    query['_id'] = {'$lte': max_id}
+
+    cached = cache.get(cache_key)
+    if cached is None or cached['paths'] != paths:
+        counters = _aggregate(query, paths)
+    elif cached['max_id'] == max_id and cached['count'] == count:
+        return cached['counters']
+    else:
+        new_submissions_query = {
+            **query,
+            '_id': {'$gt': cached['max_id'], '$lte': max_id},
+        }
+        if cached['count'] + collection.count_documents(
+            new_submissions_query
+        ) == count:
+            counters = cached['counters']
+            for path, counter in _aggregate(new_submissions_query, paths).items():
+                counters[path].update(counter)
+        else:
+            # Some submissions have been deleted (or were saved late)
+            counters = _aggregate(query, paths)
+
+    cache.set(
+        cache_key,
+        {'paths': paths, 'count': count, 'max_id': max_id, 'counters': counters},
+        settings.REPORT_STATS_CACHE_TTL,
+    )
+    return counters
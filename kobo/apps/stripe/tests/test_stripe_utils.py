@@ -1,12 +1,13 @@
 from datetime import datetime, timedelta
 from math import inf
 from types import SimpleNamespace
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, PropertyMock, patch
 from zoneinfo import ZoneInfo
 
 from dateutil.relativedelta import relativedelta
 from ddt import data, ddt, unpack
 from django.conf import settings
+from django.core.cache import cache
 from django.test import override_settings
 from django.utils import timezone
 from djstripe.models import Customer, Price, Product
@@ -16,7 +17,7 @@ from model_bakery import baker
 
 from kobo.apps.kobo_auth.shortcuts import User
 from kobo.apps.organizations.constants import USAGE_TYPES_WITH_COUNTERS, UsageType
-from kobo.apps.organizations.models import Organization
+from kobo.apps.organizations.models import EmptyOrganization, Organization
 from kobo.apps.organizations.utils import get_billing_dates
 from kobo.apps.stripe.exceptions import (
     DefaultCommunityPlanNotFoundError,
@@ -37,6 +38,8 @@ from kobo.apps.stripe.utils.billing_dates import (
 )
 from kobo.apps.stripe.utils.limit_enforcement import (
     check_exceeded_limit,
+    consume_usage_tokens,
+    get_exceeded_usage_type,
     update_or_remove_limit_counter,
 )
 from kobo.apps.stripe.utils.manual_subscription import (
@@ -830,6 +833,81 @@ class ExceededLimitsTestCase(BaseServiceUsageTestCase):
                 check_exceeded_limit(self.someuser, UsageType.SUBMISSION)
                 patched.assert_called_once()
 
+    @override_settings(
+        CACHES={
+            'default': {
+                'BACKEND': 'django_redis.cache.RedisCache',
+                'LOCATION': 'redis://',
+                'OPTIONS': {
+                    'CONNECTION_POOL_KWARGS': {'connection_class': FakeConnection},
+                },
+            }
+        }
+    )
+    def test_usage_tokens(self):
+        cache.clear()
+        mock_balances = {
+            UsageType.STORAGE_BYTES: None,
+            UsageType.SUBMISSION: {'exceeded': False, 'balance_value': 1},
+        }
+        with patch(
+            'kpi.utils.usage_calculator.ServiceUsageCalculator.get_usage_balances',
+            return_value=mock_balances,
+        ) as patched:
+            assert get_exceeded_usage_type(self.someuser) is None
+            # Tokens are shared by all members of the organization
+            assert get_exceeded_usage_type(self.anotheruser) is None
+            assert consume_usage_tokens(
+                self.someuser, submissions=1, storage_bytes=1000
+            ) == []
+            assert consume_usage_tokens(self.anotheruser, submissions=1) == [
+                UsageType.SUBMISSION
+            ]
+            assert get_exceeded_usage_type(self.someuser) == UsageType.SUBMISSION
+            # Usage is only calculated when tokens are reconciled
+            patched.assert_called_once()
+
+        cache.clear()
+        # Limits must be checked the slow way when tokens have expired
+        assert consume_usage_tokens(
+            self.someuser, submissions=1, storage_bytes=1000
+        ) == [UsageType.STORAGE_BYTES, UsageType.SUBMISSION]
+
+    @override_settings(
+        CACHES={
+            'default': {
+                'BACKEND': 'django_redis.cache.RedisCache',
+                'LOCATION': 'redis://',
+                'OPTIONS': {
+                    'CONNECTION_POOL_KWARGS': {'connection_class': FakeConnection},
+                },
+            }
+        }
+    )
+    def test_usage_tokens_of_users_without_organization(self):
+        cache.clear()
+        mock_balances = {
+            UsageType.STORAGE_BYTES: None,
+            UsageType.SUBMISSION: {'exceeded': False, 'balance_value': 1},
+        }
+        with patch(
+            'kpi.utils.usage_calculator.ServiceUsageCalculator.get_usage_balances',
+            return_value=mock_balances,
+        ), patch.object(
+            User,
+            'organization',
+            new_callable=PropertyMock,
+            return_value=EmptyOrganization(),
+        ):
+            assert get_exceeded_usage_type(self.someuser) is None
+            assert get_exceeded_usage_type(self.anotheruser) is None
+            assert consume_usage_tokens(self.someuser, submissions=2) == [
+                UsageType.SUBMISSION
+            ]
+            assert get_exceeded_usage_type(self.someuser) == UsageType.SUBMISSION
+            # Tokens are not shared by users without organization
+            assert get_exceeded_usage_type(self.anotheruser) is None
+
     def test_update_or_remove_limit_counter(self):
         mock_balances = {
             UsageType.SUBMISSION: {'exceeded': True},
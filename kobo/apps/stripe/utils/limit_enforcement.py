@@ -9,6 +9,11 @@ from kobo.apps.organizations.constants import UsageType
 from kobo.apps.stripe.utils.import_management import requires_stripe
 from kpi.utils.usage_calculator import ServiceUsageCalculator
 
+# Usage types whose remaining quota is kept as tokens in the cache
+USAGE_TOKEN_TYPES = (UsageType.STORAGE_BYTES, UsageType.SUBMISSION)
+# Token value of usage types without any limit
+UNLIMITED_USAGE_TOKENS = 2**62
+
 
 @requires_stripe
 def check_exceeded_limit(user, usage_type: UsageType, **kwargs):
@@ -47,6 +52,66 @@ def check_exceeded_limit(user, usage_type: UsageType, **kwargs):
     return counter
 
 
+@requires_stripe
+def consume_usage_tokens(
+    user, submissions: int = 0, storage_bytes: int = 0, **kwargs
+) -> list[UsageType]:
+    """
+    Decrement atomically the remaining quota tokens of the organization of
+    `user` by the usage of a new submission.
+
+    Return the usage types whose limit must be checked with
+    `check_exceeded_limit()`, i.e. the ones whose tokens are exhausted, or all
+    of them if tokens are not in the cache.
+    """
+    usage_types_to_check = []
+    for usage_type, amount in (
+        (UsageType.STORAGE_BYTES, storage_bytes),
+        (UsageType.SUBMISSION, submissions),
+    ):
+        if not amount:
+            continue
+        try:
+            remaining = cache.decr(
+                _get_usage_token_key(user, usage_type), amount
+            )
+        except ValueError:
+            # Tokens have expired, `get_exceeded_usage_type()` reconciles them
+            # on the next submission
+            usage_types_to_check.append(usage_type)
+        else:
+            if remaining < 0:
+                usage_types_to_check.append(usage_type)
+
+    return usage_types_to_check
+
+
+@requires_stripe
+def get_exceeded_usage_type(user, **kwargs) -> UsageType | None:
+    """
+    Return the first usage type among `USAGE_TOKEN_TYPES` whose limit is
+    exceeded by the organization of `user`, or `None`.
+
+    It only reads the remaining quota tokens of the organization from the
+    cache. They are reconciled with the actual usage when they have expired,
+    i.e. every `USAGE_TOKENS_TTL` seconds, and decremented by
+    `consume_usage_tokens()` in the meantime.
+    """
+    keys = {
+        usage_type: _get_usage_token_key(user, usage_type)
+        for usage_type in USAGE_TOKEN_TYPES
+    }
+    tokens = cache.get_many(keys.values())
+    if len(tokens) < len(keys):
+        tokens = _reconcile_usage_tokens(user, keys)
+
+    for usage_type, key in keys.items():
+        if tokens[key] < 0:
+            return usage_type
+
+    return None
+
+
 @requires_stripe
 def update_or_remove_limit_counter(counter, **kwargs):
     calculator = ServiceUsageCalculator(counter.user)
@@ -77,3 +142,26 @@ def _get_usage_balances(user: 'kobo_auth.User') -> dict:
 
     calculator = ServiceUsageCalculator(user, disable_cache=True)
     return calculator.get_usage_balances()
+
+
+def _get_usage_token_key(user, usage_type: UsageType) -> str:
+    # `organization` is falsy when the user belongs to no organization; keying
+    # on its `id` would then be `None` for every such user, and they would all
+    # share the same tokens.
+    if not (organization := user.organization):
+        return f'usage_tokens:user-{user.id}:{usage_type}'
+    return f'usage_tokens:organization-{organization.id}:{usage_type}'
+
+
+def _reconcile_usage_tokens(user, keys: dict[UsageType, str]) -> dict[str, int]:
+    balances = _get_usage_balances(user)
+    tokens = {
+        key: (
+            balance['balance_value']
+            if (balance := balances[usage_type])
+            else UNLIMITED_USAGE_TOKENS
+        )
+        for usage_type, key in keys.items()
+    }
+    cache.set_many(tokens, timeout=settings.USAGE_TOKENS_TTL)
+    return tokens
@@ -177,6 +177,7 @@ class SubmissionSupplement(AbstractTimeStampedModel):
         submission_root_uuid: str | None = None,
         prefetched_supplement: dict | None = None,
         for_output: bool = False,
+        prefetched_actions: dict | None = None,
     ) -> dict | list[dict]:
         """
         `for_output = True` returns a flattened and simplified list of columns
@@ -184,6 +185,10 @@ class SubmissionSupplement(AbstractTimeStampedModel):
         exports and the like. Where multiple actions attempt to provide the
         same column, the most recently accepted action result is used as the
         value
+
+        `prefetched_actions` are the asset's actions grouped by question xpath
+        and action ID (see `get_actions_by_question()`). If provided, advanced
+        features are not queried again for each question.
         """
 
         from .utils.versioning import migrate_submission_supplementals
@@ -227,9 +232,12 @@ class SubmissionSupplement(AbstractTimeStampedModel):
             processed_data_for_this_question = retrieved_supplemental_data.setdefault(
                 question_xpath, {}
             )
-            advanced_features_for_this_question = asset.advanced_features_set.filter(
-                question_xpath=question_xpath
-            )
+            if prefetched_actions is None:
+                advanced_features_for_this_question = (
+                    asset.advanced_features_set.filter(question_xpath=question_xpath)
+                )
+            else:
+                actions_for_this_question = prefetched_actions.get(question_xpath, {})
             output_data_for_question = {}
             max_sort_by_date_by_key = {}
 
@@ -239,12 +247,19 @@ class SubmissionSupplement(AbstractTimeStampedModel):
                     # exists in the application code
                     # TODO: log an error
                     continue
-                try:
-                    feature = advanced_features_for_this_question.get(action=action_id)
-                except QuestionAdvancedFeature.DoesNotExist as e:
-                    raise InvalidAction from e
-
-                action = feature.to_action()
+                if prefetched_actions is None:
+                    try:
+                        feature = advanced_features_for_this_question.get(
+                            action=action_id
+                        )
+                    except QuestionAdvancedFeature.DoesNotExist as e:
+                        raise InvalidAction from e
+                    action = feature.to_action()
+                else:
+                    try:
+                        action = actions_for_this_question[action_id]
+                    except KeyError as e:
+                        raise InvalidAction from e
 
                 retrieved_data = action.retrieve_data(action_data)
                 processed_data_for_this_question[action_id] = retrieved_data
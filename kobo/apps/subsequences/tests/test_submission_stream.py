@@ -92,6 +92,39 @@ class TestSubmissionStream(TestCase):
             qual_data = supplemental_details.get('Tell_me_a_story').get('qual')
             self.assertEqual(qual_data, {})
 
+    def test_stream_with_supplements_retrieves_supplements_by_chunk(self):
+        submissions = self._create_submissions()
+        self.asset.advanced_features_set.all().delete()
+        QuestionAdvancedFeature.objects.create(
+            asset=self.asset,
+            question_xpath='Tell_me_a_story',
+            action=Action.MANUAL_QUAL,
+            params=[
+                {
+                    'labels': {'_default': 'What is the quality score?'},
+                    'type': 'qualText',
+                    'uuid': '4dcf9c9f-e503-4e5c-81f5-74250b295001',
+                }
+            ],
+        )
+
+        # 1 query for the advanced features and 1 query per chunk for the
+        # supplements, no matter how many questions or submissions there are
+        with self.assertNumQueries(3):
+            output = list(
+                stream_with_supplements(
+                    asset=self.asset,
+                    submission_stream=iter(submissions),
+                    chunk_size=1,
+                )
+            )
+
+        self.assertEqual(len(output), 2)
+        for submission in output:
+            self.assertIn(
+                Action.MANUAL_QUAL, submission[SUPPLEMENT_KEY]['Tell_me_a_story']
+            )
+
     def _create_asset(self):
         owner = get_user_model().objects.create(username='nlp_owner')
 
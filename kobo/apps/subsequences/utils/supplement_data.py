@@ -1,5 +1,8 @@
+from itertools import islice
 from typing import Generator
 
+from django.conf import settings
+
 from kobo.apps.openrosa.apps.logger.xform_instance_parser import remove_uuid_prefix
 from kobo.apps.subsequences.constants import (
     SUBMISSION_UUID_FIELD,
@@ -69,39 +72,71 @@ def get_analysis_form_json(asset: 'kpi.models.Asset') -> list[dict]:
     return additional_fields_sorted
 
 
+def get_actions_by_question(asset: 'kpi.models.Asset') -> dict[str, dict]:
+    """
+    Resolve all advanced features of `asset` to their action instances at once,
+    e.g.:
+        {
+            'group_name/question_name': {
+                'manual_transcription': <ManualTranscriptionAction>,
+            }
+        }
+
+    Meant to be passed to `SubmissionSupplement.retrieve_data()` to avoid
+    querying the advanced features for each question of each submission.
+    """
+    actions_by_question = {}
+    for advanced_feature in asset.advanced_features_set.all():
+        actions_by_question.setdefault(advanced_feature.question_xpath, {})[
+            advanced_feature.action
+        ] = advanced_feature.to_action()
+    return actions_by_question
+
+
 def stream_with_supplements(
-    asset: 'kpi.models.Asset', submission_stream: Generator, for_output: bool = False
+    asset: 'kpi.models.Asset',
+    submission_stream: Generator,
+    for_output: bool = False,
+    chunk_size: int | None = None,
 ) -> Generator:
-    if not asset.advanced_features_set.exists():
+    """
+    Inject supplemental data (see `SubmissionSupplement`) into each submission
+    of `submission_stream`.
+
+    The stream is consumed in chunks of `chunk_size` submissions (defaults to
+    `settings.DEFAULT_BATCH_SIZE`) and only the supplements of the submissions
+    of each chunk are retrieved, which keeps memory usage and query count
+    bounded regardless of the number of submissions of the asset.
+    """
+    chunk_size = chunk_size or settings.DEFAULT_BATCH_SIZE
+    actions_by_question = get_actions_by_question(asset)
+    if not actions_by_question:
         yield from submission_stream
         return
 
-    # FIXME: eww, this is bad, but maybe better than one query per submission?
-    # Probably need to go up a few generators and grab an entire page of
-    # submissions and supplements, then yield each of those, and grab again from
-    # the database only once the page is exhausted
-
-    # 2025-08-24: oleger's comment: we could narrow down this query to submissions
-    # only available in the page (`page` as in pagination). No need to retrieve data for
-    # all submissions if we are only injecting supplement data for a portion of
-    # them. Question? How we do that without consuming the mongo cursor twice?
-
-    # Old-format supplements (no '_version') are skipped by passing {} so that
-    # retrieve_data returns {} and the table view shows the row without NLP data
-    # rather than crashing. Exports block earlier with SupplementMigrationInProgress
-    # (see import_export_task.py).
-    extras = {
-        uuid: (content if content.get('_version') else {})
-        for uuid, content in SubmissionSupplement.objects.filter(
-            asset=asset
-        ).values_list('submission_uuid', 'content')
-    }
-
-    for submission in submission_stream:
-        submission_uuid = remove_uuid_prefix(submission[SUBMISSION_UUID_FIELD])
-        submission[SUPPLEMENT_KEY] = SubmissionSupplement.retrieve_data(
-            asset,
-            for_output=for_output,
-            prefetched_supplement=extras.get(submission_uuid, {}),
-        )
-        yield submission
+    submission_stream = iter(submission_stream)
+    while chunk := list(islice(submission_stream, chunk_size)):
+        submission_uuids = {
+            remove_uuid_prefix(submission[SUBMISSION_UUID_FIELD])
+            for submission in chunk
+        }
+        # Old-format supplements (no '_version') are skipped by passing {} so
+        # that retrieve_data returns {} and the table view shows the row without
+        # NLP data rather than crashing. Exports block earlier with
+        # SupplementMigrationInProgress (see import_export_task.py).
+        extras = {
+            uuid: (content if content.get('_version') else {})
+            for uuid, content in SubmissionSupplement.objects.filter(
+                asset=asset, submission_uuid__in=submission_uuids
+            ).values_list('submission_uuid', 'content')
+        }
+
+        for submission in chunk:
+            submission_uuid = remove_uuid_prefix(submission[SUBMISSION_UUID_FIELD])
+            submission[SUPPLEMENT_KEY] = SubmissionSupplement.retrieve_data(
+                asset,
+                for_output=for_output,
+                prefetched_supplement=extras.get(submission_uuid, {}),
+                prefetched_actions=actions_by_question,
+            )
+            yield submission
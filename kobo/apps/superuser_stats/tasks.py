@@ -2,16 +2,28 @@
 from __future__ import annotations
 
 import csv
-from collections import Counter
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
 from datetime import datetime
+from itertools import islice
 from typing import Union
 
 from celery import shared_task
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.core.files.storage import default_storage
-from django.db.models import CharField, Count, DateField, F, IntegerField, Sum, Value
-from django.db.models.functions import Cast, Concat
+from django.db.models import (
+    CharField,
+    Count,
+    DateField,
+    F,
+    IntegerField,
+    Q,
+    QuerySet,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Cast, Concat, StrIndex, Substr
 
 from hub.models import ExtraUserDetail
 from kobo.apps.kobo_auth.shortcuts import User
@@ -20,6 +32,9 @@ from kobo.apps.openrosa.apps.logger.models import (
     MonthlyXFormSubmissionCounter,
     XForm,
 )
+from kobo.apps.openrosa.apps.logger.utils.counters import (
+    get_pending_num_of_submissions_by_user_id,
+)
 from kobo.apps.openrosa.apps.main.models import UserProfile
 from kobo.apps.trackers.models import NLPUsageCounter
 from kobo.static_lists import COUNTRIES
@@ -29,31 +44,47 @@ from kpi.models.asset import Asset, AssetDeploymentStatus
 # Make sure this app is listed in `INSTALLED_APPS`; otherwise, Celery will
 # complain that the task is unregistered
 
+# Number of users whose related rows are fetched at once. Reports run a
+# constant number of queries per chunk, whatever the number of users.
+CHUNK_SIZE = 1000
+
 
 @shared_task
 def generate_country_report(output_filename: str, start_date: str, end_date: str):
 
-    def get_row_for_country(code_: str, label_: str):
-        row_ = []
-
-        xform_ids = Asset.objects.values_list(
-            '_deployment_data__backend_response__formid', flat=True
-        ).filter(
-            settings__country_codes__in_array=[code_],
+    xform_ids_by_country = defaultdict(list)
+    assets = (
+        Asset.objects.values_list(
+            '_deployment_data__backend_response__formid', 'settings__country_codes'
+        )
+        .filter(
             _deployment_status=AssetDeploymentStatus.DEPLOYED,
             asset_type=ASSET_TYPE_SURVEY,
         )
-        # Doing it this way because this report is focused on crises in
-        # very specific time frames
-        instances_count = Instance.objects.filter(
-            xform_id__in=list(xform_ids),
+        .exclude(settings__country_codes=[])
+    )
+    for xform_id, country_codes in assets.iterator(CHUNK_SIZE):
+        if xform_id is None:
+            continue
+        for code in country_codes or []:
+            xform_ids_by_country[code].append(xform_id)
+
+    # Doing it this way because this report is focused on crises in
+    # very specific time frames
+    instances_count_by_xform_id = dict(
+        Instance.objects.filter(
+            xform_id__in={
+                xform_id
+                for xform_ids in xform_ids_by_country.values()
+                for xform_id in xform_ids
+            },
             date_created__date__range=(start_date, end_date),
-        ).count()
-
-        row_.append(label_)
-        row_.append(instances_count)
-
-        return row_
+        )
+        .values('xform_id')
+        .annotate(count=Count('pk'))
+        .order_by()
+        .values_list('xform_id', 'count')
+    )
 
     columns = [
         'Country',
@@ -65,18 +96,15 @@ def generate_country_report(output_filename: str, start_date: str, end_date: str
         writer.writerow(columns)
 
         for code, label in COUNTRIES:
-
-            try:
-                row = get_row_for_country(code, label)
-            except Exception as e:
-                row = ['!FAILED!', 'Country: {}'.format(label), repr(e)]
-            writer.writerow(row)
+            instances_count = sum(
+                instances_count_by_xform_id.get(xform_id, 0)
+                for xform_id in xform_ids_by_country.get(code, [])
+            )
+            writer.writerow([label, instances_count])
 
 
 @shared_task
 def generate_continued_usage_report(output_filename: str, end_date: str):
-    data = []
-
     # We need to work with UTC timezone-aware datetime objects
     end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
 
@@ -84,65 +112,13 @@ def generate_continued_usage_report(output_filename: str, end_date: str):
     six_months_time = end_date_obj - relativedelta(months=6)
     three_months_time = end_date_obj - relativedelta(months=3)
 
-    users = User.objects.filter(
-        last_login__date__range=(twelve_months_time, end_date),
-    )
-
-    for user in users.iterator():
-        # twelve months
-        assets = user.assets.values('pk', 'date_created').filter(
-            date_created__date__range=(twelve_months_time, end_date),
-        )
-        submissions_count = MonthlyXFormSubmissionCounter.objects.annotate(
-            date=Cast(
-                Concat(
-                    Cast(F('year'), output_field=CharField()),
-                    Value('-'),
-                    Cast(F('month'), output_field=CharField()),
-                    Value('-'),
-                    Value('1'),
-                ),
-                DateField(),
-            )
-        ).filter(
-            user_id=user.id,
-            date__range=(twelve_months_time, end_date),
-        )
-        twelve_asset_count = assets.aggregate(asset_count=Count('pk'))
-        twelve_submission_count = submissions_count.aggregate(
-            submissions_count=Sum('counter'),
-        )
-
-        # six months
-        assets = assets.filter(date_created__gte=six_months_time)
-        submissions_count = submissions_count.filter(
-            date__gte=six_months_time,
-        )
-        six_asset_count = assets.aggregate(asset_count=Count('pk'))
-        six_submissions_count = submissions_count.aggregate(
-            submissions_count=Sum('counter'),
-        )
-
-        # three months
-        assets = assets.filter(date_created__gte=three_months_time)
-        submissions_count = submissions_count.filter(
-            date__gte=three_months_time,
-        )
-        three_asset_count = assets.aggregate(asset_count=Count('pk'))
-        three_submissions_count = submissions_count.aggregate(
-            submissions_count=Sum('counter'),
+    users = (
+        User.objects.filter(
+            last_login__date__range=(twelve_months_time, end_date),
         )
-        data.append([
-            user.username,
-            user.date_joined,
-            user.last_login,
-            three_asset_count['asset_count'] or 0,
-            six_asset_count['asset_count'] or 0,
-            twelve_asset_count['asset_count'] or 0,
-            three_submissions_count['submissions_count'] or 0,
-            six_submissions_count['submissions_count'] or 0,
-            twelve_submission_count['submissions_count'] or 0,
-        ])
+        .values('pk', 'username', 'date_joined', 'last_login')
+        .order_by('pk')
+    )
 
     headers = [
         'Username',
@@ -159,7 +135,52 @@ def generate_continued_usage_report(output_filename: str, end_date: str):
     with default_storage.open(output_filename, 'w') as output:
         writer = csv.writer(output)
         writer.writerow(headers)
-        writer.writerows(data)
+
+        for users_chunk in _iter_chunks(users.iterator(CHUNK_SIZE)):
+            user_ids = [user['pk'] for user in users_chunk]
+            asset_counts = {
+                record['owner_id']: record
+                for record in Asset.objects.filter(
+                    owner_id__in=user_ids,
+                    date_created__date__range=(twelve_months_time, end_date),
+                )
+                .values('owner_id')
+                .annotate(
+                    twelve=Count('pk'),
+                    six=Count('pk', filter=Q(date_created__gte=six_months_time)),
+                    three=Count('pk', filter=Q(date_created__gte=three_months_time)),
+                )
+                .order_by()
+            }
+            submission_counts = {
+                record['user_id']: record
+                for record in _get_monthly_counters()
+                .filter(
+                    user_id__in=user_ids,
+                    date__range=(twelve_months_time, end_date),
+                )
+                .values('user_id')
+                .annotate(
+                    twelve=Sum('counter'),
+                    six=Sum('counter', filter=Q(date__gte=six_months_time)),
+                    three=Sum('counter', filter=Q(date__gte=three_months_time)),
+                )
+                .order_by()
+            }
+            for user in users_chunk:
+                assets = asset_counts.get(user['pk'], {})
+                submissions = submission_counts.get(user['pk'], {})
+                writer.writerow([
+                    user['username'],
+                    user['date_joined'],
+                    user['last_login'],
+                    assets.get('three') or 0,
+                    assets.get('six') or 0,
+                    assets.get('twelve') or 0,
+                    submissions.get('three') or 0,
+                    submissions.get('six') or 0,
+                    submissions.get('twelve') or 0,
+                ])
 
 
 @shared_task
@@ -177,39 +198,31 @@ def generate_domain_report(output_filename: str, start_date: str, end_date: str)
     domain_users = Counter(domains)
 
     # get a count of the assets
-    domain_assets = {
-        domain: Asset.objects.filter(
-            owner__email__endswith='@' + domain,
+    domain_assets = dict(
+        Asset.objects.filter(
+            owner__email__contains='@',
             date_created__date__range=(start_date, end_date),
-        ).count()
-        for domain in domain_users.keys()
-    }
+        )
+        .annotate(domain=_get_email_domain('owner__email'))
+        .values('domain')
+        .annotate(count=Count('pk'))
+        .order_by()
+        .values_list('domain', 'count')
+    )
 
     # get a count of the submissions
-    domain_submissions = {
-        domain: (
-            MonthlyXFormSubmissionCounter.objects.annotate(
-                date=Cast(
-                    Concat(
-                        Cast(F('year'), output_field=CharField()),
-                        Value('-'),
-                        Cast(F('month'), output_field=CharField()),
-                        Value('-'),
-                        Value('1'),
-                    ),
-                    DateField(),
-                )
-            )
-            .filter(
-                user__email__endswith='@' + domain,
-                date__range=(start_date, end_date),
-            )
-            .aggregate(Sum('counter'))['counter__sum']
-            if domain_assets[domain]
-            else 0
+    domain_submissions = dict(
+        _get_monthly_counters()
+        .filter(
+            user__email__contains='@',
+            date__range=(start_date, end_date),
         )
-        for domain in domain_users.keys()
-    }
+        .annotate(domain=_get_email_domain('user__email'))
+        .values('domain')
+        .annotate(count=Sum('counter'))
+        .order_by()
+        .values_list('domain', 'count')
+    )
 
     # create the CSV file
     columns = ['Email Domain', 'Users', 'Projects', 'Submissions']
@@ -219,11 +232,12 @@ def generate_domain_report(output_filename: str, start_date: str, end_date: str)
         writer.writerow(columns)
 
         for domain, users in domain_users.most_common():
+            assets_count = domain_assets.get(domain, 0)
             row = [
                 domain,
                 users,
-                domain_assets[domain],
-                domain_submissions[domain]
+                assets_count,
+                domain_submissions.get(domain) if assets_count else 0,
             ]
             writer.writerow(row)
 
@@ -282,23 +296,19 @@ def generate_media_storage_report(output_filename: str):
         'attachment_storage_bytes',
     )
 
-    data = []
+    headers = ['Username', 'Storage Used (Bytes)']
 
-    for attachment_count in attachments.iterator():
-        data.append(
+    with default_storage.open(output_filename, 'w') as output:
+        writer = csv.writer(output)
+        writer.writerow(headers)
+        writer.writerows(
             [
                 attachment_count['user__username'],
                 attachment_count['attachment_storage_bytes'],
             ]
+            for attachment_count in attachments.iterator(CHUNK_SIZE)
         )
 
-    headers = ['Username', 'Storage Used (Bytes)']
-
-    with default_storage.open(output_filename, 'w') as output:
-        writer = csv.writer(output)
-        writer.writerow(headers)
-        writer.writerows(data)
-
 
 @shared_task
 def generate_user_report(output_filename: str):
@@ -308,26 +318,15 @@ def generate_user_report(output_filename: str):
         else:
             return d
 
-    def get_row_for_user(u: 'kobo_auth.User') -> list:
+    def get_row_for_user(u: dict, profile: dict, xform_count: int) -> list:
         row_ = []
+        extra_details = u['extra_details_data']
 
-        try:
-            profile = UserProfile.objects.get(user_id=u.pk)
-        except UserProfile.DoesNotExist:
-            profile = None
-
-        try:
-            extra_user_detail = ExtraUserDetail.objects.get(user_id=u.pk)
-        except ExtraUserDetail.DoesNotExist:
-            extra_details = None
-        else:
-            extra_details = extra_user_detail.data
-
-        row_.append(u.username)
-        row_.append(u.email)
-        row_.append(u.pk)
-        row_.append(u.first_name)
-        row_.append(u.last_name)
+        row_.append(u['username'])
+        row_.append(u['email'])
+        row_.append(u['pk'])
+        row_.append(u['first_name'])
+        row_.append(u['last_name'])
 
         if extra_details:
             name = extra_details.get('name', '')
@@ -336,7 +335,7 @@ def generate_user_report(output_filename: str):
         if name:
             row_.append(name)
         elif profile:
-            row_.append(profile.name)
+            row_.append(profile['name'])
         else:
             row_.append('')
 
@@ -347,23 +346,22 @@ def generate_user_report(output_filename: str):
         if organization:
             row_.append(organization)
         elif profile:
-            row_.append(profile.organization)
+            row_.append(profile['organization'])
         else:
             row_.append('')
 
-        row_.append(XForm.objects.filter(user=u).count())
+        row_.append(xform_count)
 
         if profile:
-            row_.append(profile.num_of_submissions)
+            row_.append(profile['num_of_submissions'])
         else:
             row_.append(0)
 
-        row_.append(format_date(u.date_joined))
-        row_.append(format_date(u.last_login))
+        row_.append(format_date(u['date_joined']))
+        row_.append(format_date(u['last_login']))
 
         return row_
 
-    CHUNK_SIZE = 1000
     columns = [
         'username',
         'email',
@@ -378,16 +376,57 @@ def generate_user_report(output_filename: str):
         'last_login',
     ]
 
+    users = (
+        User.objects.exclude(pk=settings.ANONYMOUS_USER_ID)
+        .annotate(extra_details_data=F('extra_details__data'))
+        .values(
+            'pk',
+            'username',
+            'email',
+            'first_name',
+            'last_name',
+            'date_joined',
+            'last_login',
+            'extra_details_data',
+        )
+        .order_by('pk')
+    )
+
     with default_storage.open(output_filename, 'w') as output_file:
         writer = csv.writer(output_file)
         writer.writerow(columns)
-        kc_users = User.objects.exclude(pk=settings.ANONYMOUS_USER_ID).order_by('pk')
-        for kc_user in kc_users.iterator(CHUNK_SIZE):
-            try:
-                row = get_row_for_user(kc_user)
-            except Exception as e:
-                row = ['!FAILED!', 'User PK: {}'.format(kc_user.pk), repr(e)]
-            writer.writerow(row)
+        for users_chunk in _iter_chunks(users.iterator(CHUNK_SIZE)):
+            # Profiles and forms live in the KoboCAT database, they cannot be
+            # joined to users. Fetch them for the whole chunk at once.
+            user_ids = [user['pk'] for user in users_chunk]
+            profiles = {
+                profile['user_id']: profile
+                for profile in UserProfile.objects.filter(
+                    user_id__in=user_ids
+                ).values('user_id', 'name', 'organization', 'num_of_submissions')
+            }
+            for user_id, count in get_pending_num_of_submissions_by_user_id(
+                user_ids
+            ).items():
+                if user_id in profiles:
+                    profiles[user_id]['num_of_submissions'] += count
+            xform_counts = dict(
+                XForm.objects.filter(user_id__in=user_ids)
+                .values('user_id')
+                .annotate(count=Count('pk'))
+                .order_by()
+                .values_list('user_id', 'count')
+            )
+            for user in users_chunk:
+                try:
+                    row = get_row_for_user(
+                        user,
+                        profiles.get(user['pk']),
+                        xform_counts.get(user['pk'], 0),
+                    )
+                except Exception as e:
+                    row = ['!FAILED!', 'User PK: {}'.format(user['pk']), repr(e)]
+                writer.writerow(row)
 
 
 @shared_task
@@ -419,18 +458,7 @@ def generate_user_statistics_report(
 
     # Get records from SubmissionCounter
     records = (
-        MonthlyXFormSubmissionCounter.objects.annotate(
-            date=Cast(
-                Concat(
-                    Cast(F('year'), output_field=CharField()),
-                    Value('-'),
-                    Cast(F('month'), output_field=CharField()),
-                    Value('-'),
-                    Value('1'),
-                ),
-                DateField(),
-            )
-        )
+        _get_monthly_counters()
         .filter(date__range=(start_date, end_date))
         .values(
             'user_id',
@@ -441,6 +469,8 @@ def generate_user_statistics_report(
     )
 
     # get NLP statistics
+    # Users will only have a counter if they have used NLP services in the
+    # specified period so a fallback is needed
     nlp_counters = (
         NLPUsageCounter.objects.filter(
             date__range=(start_date, end_date)
@@ -453,8 +483,11 @@ def generate_user_statistics_report(
             total_google_mt=Sum(
                 Cast(F('counters__google_mt_characters'), IntegerField()),
             ),
-        )
+        ).order_by()
     )
+    nlp_totals_by_user_id = {
+        record['user_id']: record for record in nlp_counters.iterator()
+    }
 
     def _get_country_value(value: Union[dict, list]) -> str:
         if isinstance(value, dict):
@@ -464,32 +497,33 @@ def generate_user_statistics_report(
 
         return value
 
-    for record in records.iterator():
-        user_id = record['user_id']
-        user_details, created = ExtraUserDetail.objects.get_or_create(
-            user_id=user_id
+    for records_chunk in _iter_chunks(records.iterator(CHUNK_SIZE)):
+        # Submission counters live in the KoboCAT database, fetch the details
+        # of the users of the whole chunk at once.
+        user_details_by_user_id = dict(
+            ExtraUserDetail.objects.filter(
+                user_id__in=[record['user_id'] for record in records_chunk]
+            ).values_list('user_id', 'data')
         )
-        # Users will only have a counter if they have used NLP services in the
-        # specified period so a fallback is needed
-        try:
-            nlp_totals = nlp_counters.get(user_id=user_id)
-        except NLPUsageCounter.DoesNotExist:
-            nlp_totals = {}
-        data.append([
-            record['user__username'],
-            user_details.data.get('name', ''),
-            record['user__date_joined'],
-            record['user__email'],
-            user_details.data.get('organization_type', ''),
-            user_details.data.get('organization', ''),
-            user_details.data.get('organization_website', ''),
-            _get_country_value(user_details.data.get('country', '')),
-            record['count_sum'],
-            forms_count.get(user_id, 0),
-            deployment_count.get(user_id, 0),
-            nlp_totals.get('total_google_asr', 0),
-            nlp_totals.get('total_google_mt', 0),
-        ])
+        for record in records_chunk:
+            user_id = record['user_id']
+            user_details = user_details_by_user_id.get(user_id) or {}
+            nlp_totals = nlp_totals_by_user_id.get(user_id, {})
+            data.append([
+                record['user__username'],
+                user_details.get('name', ''),
+                record['user__date_joined'],
+                record['user__email'],
+                user_details.get('organization_type', ''),
+                user_details.get('organization', ''),
+                user_details.get('organization_website', ''),
+                _get_country_value(user_details.get('country', '')),
+                record['count_sum'],
+                forms_count.get(user_id, 0),
+                deployment_count.get(user_id, 0),
+                nlp_totals.get('total_google_asr', 0),
+                nlp_totals.get('total_google_mt', 0),
+            ])
 
     columns = [
         'Username',
@@ -600,3 +634,35 @@ def generate_user_details_report(
             row.update(metadata)
             flat_row = [get_row_value(row, col) for col in columns]
             writer.writerow(flat_row)
+
+
+def _get_email_domain(field_name: str) -> Substr:
+    """
+    Return the part of the email address in `field_name` after the `@`
+    """
+    return Substr(field_name, StrIndex(field_name, Value('@')) + 1)
+
+
+def _get_monthly_counters() -> QuerySet:
+    """
+    Return monthly submission counters annotated with the first day of their
+    month as `date`
+    """
+    return MonthlyXFormSubmissionCounter.objects.annotate(
+        date=Cast(
+            Concat(
+                Cast(F('year'), output_field=CharField()),
+                Value('-'),
+                Cast(F('month'), output_field=CharField()),
+                Value('-'),
+                Value('1'),
+            ),
+            DateField(),
+        )
+    )
+
+
+def _iter_chunks(iterable: Iterable, size: int = CHUNK_SIZE) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
@@ -3,7 +3,9 @@ import io
 from datetime import date, datetime, timezone
 from unittest.mock import MagicMock, patch
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from model_bakery import baker
 
 from kobo.apps.kobo_auth.shortcuts import User
@@ -224,6 +226,59 @@ class GenerateReportsTestCase(TestCase):
         usernames = [r[0] for r in rows[1:]]
         assert 'diana' in usernames
 
+    def test_generate_user_report_uses_extra_details(self):
+        user = baker.make(User, username='eric', email='eric@test.com')
+        user.extra_details.data.update({'name': 'Eric', 'organization': 'Kobo'})
+        user.extra_details.save()
+
+        rows = self._run_task_and_get_rows(generate_user_report)
+
+        data_row = next(r for r in rows[1:] if r[0] == 'eric')
+        assert data_row[5:9] == ['Eric', 'Kobo', '0', '0']
+
+    def test_reports_query_count_does_not_depend_on_users(self):
+        reports = [
+            (generate_user_report,),
+            (generate_continued_usage_report, END_DATE),
+            (generate_domain_report, START_DATE, END_DATE),
+            (generate_user_statistics_report, START_DATE, END_DATE),
+        ]
+
+        def make_users(quantity):
+            for _ in range(quantity):
+                user = baker.make(
+                    User,
+                    date_joined=datetime(2025, 6, 1, tzinfo=timezone.utc),
+                    last_login=datetime(2025, 6, 1, tzinfo=timezone.utc),
+                )
+                baker.make(
+                    MonthlyXFormSubmissionCounter,
+                    year=2025,
+                    month=6,
+                    user=user,
+                    counter=1,
+                    xform=None,
+                )
+                baker.make(
+                    Asset,
+                    owner=user,
+                    asset_type=ASSET_TYPE_SURVEY,
+                    date_created=datetime(2025, 6, 1, tzinfo=timezone.utc),
+                )
+
+        def count_queries():
+            queries_count = []
+            for task_func, *args in reports:
+                with CaptureQueriesContext(connection) as context:
+                    self._run_task_and_get_rows(task_func, *args)
+                queries_count.append(len(context.captured_queries))
+            return queries_count
+
+        make_users(2)
+        expected_queries_count = count_queries()
+        make_users(10)
+        assert count_queries() == expected_queries_count
+
     def _run_task_and_get_rows(self, task_func, *args):
         buffers = []
 
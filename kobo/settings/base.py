@@ -16,6 +16,7 @@ from django.utils.translation import gettext_lazy as t
 from pymongo import MongoClient
 
 from kpi.constants import PERM_DELETE_ASSET, PERM_MANAGE_ASSET
+from kpi.utils.request_metrics import MongoCommandMetricsListener
 from ..static_lists import EXTRA_LANG_INFO, SECTOR_CHOICE_DEFAULTS
 from .utils import constance_env, dj_stripe_request_callback_method
 
@@ -977,6 +978,11 @@ MAXIMUM_EXPORTS_PER_USER_PER_FORM = 10
 
 MAX_RETRIES_FOR_IMPORT_EXPORT_TASK = 10
 
+# Size (in bytes) of the chunks written to storage when saving XLSX exports.
+# With S3, it should not be lower than 5 MB, the minimum size of a multipart
+# upload part.
+EXPORT_UPLOAD_CHUNK_SIZE = env.int('EXPORT_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024)
+
 # Private media file configuration
 PRIVATE_STORAGE_ROOT = os.path.join(BASE_DIR, 'media')
 PRIVATE_STORAGE_AUTH_FUNCTION = \
@@ -1552,6 +1558,12 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': crontab(hour=0, minute=0),
         'options': {'queue': 'kobocat_queue'},
     },
+    # Schedule every minute
+    'flush-submission-counter-deltas': {
+        'task': 'kobo.apps.openrosa.apps.logger.tasks.flush_submission_counter_deltas',  # noqa
+        'schedule': crontab(minute='*'),
+        'options': {'queue': 'kobocat_queue'},
+    },
     'delete-expired-instance-history-records': {
         'task': 'kobo.apps.openrosa.apps.logger.tasks.delete_expired_instance_history_records',  # noqa
         'schedule': crontab(hour=1, minute=0),
@@ -1946,6 +1958,8 @@ if default_file_storage:
             AZURE_URL_EXPIRATION_SECS = env.int(
                 'AZURE_URL_EXPIRATION_SECS', None
             )
+            # Number of blocks uploaded in parallel when saving large files
+            AZURE_UPLOAD_MAX_CONN = env.int('AZURE_UPLOAD_MAX_CONN', 2)
 
     aws_storage_bucket_name = env.str(
         'AWS_STORAGE_BUCKET_NAME', env.str('KPI_AWS_STORAGE_BUCKET_NAME', None)
@@ -2056,6 +2070,24 @@ if start_port := env.int('METRICS_START_PORT', None):
         start_port, env.int('METRICS_END_PORT', start_port + 10)
     )
 
+# Collect the time spent by each request and Celery task in databases, MongoDB
+# and the cache. It is logged, and exported to Prometheus if `ENABLE_METRICS`
+# is `True`.
+ENABLE_REQUEST_METRICS = env.bool('ENABLE_REQUEST_METRICS', True)
+# Report the metrics of requests in the `Server-Timing` header of all
+# responses. Otherwise, only superusers get it.
+REQUEST_METRICS_SERVER_TIMING = env.bool('REQUEST_METRICS_SERVER_TIMING', False)
+# Log the metrics of requests and tasks lasting longer than this number of
+# milliseconds. Set to 0 to log all of them
+REQUEST_METRICS_LOG_THRESHOLD = env.int('REQUEST_METRICS_LOG_THRESHOLD', 1000)
+if ENABLE_REQUEST_METRICS:
+    # Right after `HealthCheckMiddleware`, to cover all other middlewares
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('kobo.apps.service_health.middleware.HealthCheckMiddleware')
+        + 1,
+        'hub.middleware.RequestMetricsMiddleware',
+    )
+
 
 """ Try to identify the running codebase for informational purposes """
 # Based upon https://github.com/tblobaum/git-rev/blob/master/index.js
@@ -2132,7 +2164,13 @@ else:
         mongo_db_name = env.str('MONGO_DB_NAME', 'formhub')
 
 mongo_client = MongoClient(
-    MONGO_DB_URL, connect=False, journal=True, tz_aware=True
+    MONGO_DB_URL,
+    connect=False,
+    journal=True,
+    tz_aware=True,
+    event_listeners=(
+        [MongoCommandMetricsListener()] if ENABLE_REQUEST_METRICS else None
+    ),
 )
 MONGO_DB = mongo_client[mongo_db_name]
 
@@ -2174,9 +2212,20 @@ CACHES = {
         'KEY_PREFIX': 'constance_4x',
     },
 }
+if (
+    ENABLE_REQUEST_METRICS
+    and CACHES['default']['BACKEND'] == 'django_redis.cache.RedisCache'
+):
+    # Count the hits and misses of the cache in request metrics
+    CACHES['default'].setdefault('OPTIONS', {})[
+        'CLIENT_CLASS'
+    ] = 'kpi.utils.cache.MetricsRedisClient'
 
 # How long to retain cached responses for kpi endpoints
 ENDPOINT_CACHE_DURATION = env.int('ENDPOINT_CACHE_DURATION', 60 * 15)  # 15 minutes
+# Lifetime of the remaining quota tokens used to enforce usage limits on
+# submissions. They are reconciled with the actual usage when they expire.
+USAGE_TOKENS_TTL = env.int('USAGE_TOKENS_TTL', 60 * 5)  # 5 minutes
 
 ENV = None
 
@@ -2196,6 +2245,9 @@ PAIRED_DATA_EXPIRATION = 300  # seconds
 # Lock TTL for the async regeneration task; covers the worst-case generation
 # time and ensures the lock expires even if a K8s pod is killed mid-task.
 PAIRED_DATA_REGEN_LOCK_TIMEOUT = 600  # seconds
+# Number of source submissions read or written at once when paired data xml
+# file is (incrementally) rebuilt
+PAIRED_DATA_CHUNK_SIZE = 1000
 
 CALCULATED_HASH_CACHE_EXPIRATION = 300  # seconds
 
@@ -2301,6 +2353,14 @@ REVERSION_MIDDLEWARE_SKIPPED_URL_PATTERNS = {
     r'/api/v1/users/(.*)': ['DELETE']
 }
 DAILY_COUNTERS_MAX_DAYS = env.int('DAILY_COUNTERS_MAX_DAYS', 366)
+# Record the counter increments of each submission in a journal, folded into
+# the XForm, UserProfile, daily and monthly counters every minute, instead of
+# updating them within the submission transaction. Avoids queuing concurrent
+# submissions to the same account on the lock of its UserProfile row.
+SUBMISSION_COUNTERS_WRITE_BEHIND = env.bool('SUBMISSION_COUNTERS_WRITE_BEHIND', False)
+SUBMISSION_COUNTERS_FLUSH_BATCH_SIZE = env.int(
+    'SUBMISSION_COUNTERS_FLUSH_BATCH_SIZE', 1000
+)
 
 USE_POSTGRESQL = True
 
@@ -2310,6 +2370,10 @@ SUPPORT_BRIEFCASE_SUBMISSION_DATE = (
     os.environ.get('SUPPORT_BRIEFCASE_SUBMISSION_DATE') != 'True'
 )
 
+# Engine used to parse incoming submissions, either `iterparse` (lxml, single
+# pass) or `minidom` (legacy). See `XFormInstanceParser`
+XFORM_INSTANCE_PARSER_ENGINE = env.str('XFORM_INSTANCE_PARSER_ENGINE', 'iterparse')
+
 DEFAULT_VALIDATION_STATUSES = {
     'validation_status_not_approved': 'Not Approved',
     'validation_status_approved': 'Approved',
@@ -2321,6 +2385,17 @@ THUMB_CONF = {
     'medium': 640,
     'small': 240,
 }
+# Generate the thumbnails of image attachments in a Celery task as soon as
+# they are saved, instead of when one of them is requested for the first time
+GENERATE_THUMBNAILS_ON_SAVE = env.bool('GENERATE_THUMBNAILS_ON_SAVE', True)
+# Cache time-to-live (in seconds) for the record of the images whose thumbnails
+# have been generated. Without a record, the storage is probed once.
+THUMBNAILS_CACHE_TTL = env.int('THUMBNAILS_CACHE_TTL', 30 * 24 * 60 * 60)
+# Cache time-to-live (in seconds) for the record of the attachments whose audio
+# has been transcoded (e.g. to MP3) and stored next to the original
+TRANSCODED_AUDIO_CACHE_TTL = env.int(
+    'TRANSCODED_AUDIO_CACHE_TTL', 30 * 24 * 60 * 60
+)
 
 SUPPORTED_MEDIA_UPLOAD_TYPES = [
     'image/jpeg',
@@ -2399,14 +2474,68 @@ TRASH_BIN_DELETION_LOCK_TTL = CELERY_LONG_RUNNING_TASK_TIME_LIMIT + 60 * 5
 
 # Number of transfer log records rendered inline on a transfer admin page
 PROJECT_OWNERSHIP_MAX_DISPLAYED_LOGS = 100
+# Number of attachments fetched (and saved) at once during a transfer
+PROJECT_OWNERSHIP_ATTACHMENTS_BATCH_SIZE = env.int(
+    'PROJECT_OWNERSHIP_ATTACHMENTS_BATCH_SIZE', 500
+)
+# Number of threads moving attachment files on storage simultaneously
+PROJECT_OWNERSHIP_ATTACHMENTS_MAX_WORKERS = env.int(
+    'PROJECT_OWNERSHIP_ATTACHMENTS_MAX_WORKERS', 8
+)
 
 # Maximum timeout (in minutes) for hook processing
 HOOK_STALLED_PENDING_TIMEOUT = 120
 HOOK_STALLED_RETRY_TIMEOUT = 1440
 
+# Maximum number of tasks (and pooled connections per worker) delivering
+# submissions to the same external host simultaneously
+HOOK_MAX_CONCURRENT_DELIVERIES_PER_HOST = env.int(
+    'HOOK_MAX_CONCURRENT_DELIVERIES_PER_HOST', 4
+)
+# Number of pending submissions claimed at once by a hook delivery task
+HOOK_DELIVERY_BATCH_SIZE = env.int('HOOK_DELIVERY_BATCH_SIZE', 100)
+# Expiration (in seconds) of a delivery slot, renewed after each batch
+HOOK_DELIVERY_SLOT_TIMEOUT = 600
+# Delay (in seconds) before a hook delivery task retries to get a slot when
+# all the slots of the host are taken
+HOOK_DELIVERY_REQUEUE_COUNTDOWN = env.int('HOOK_DELIVERY_REQUEUE_COUNTDOWN', 10)
+
 # Cache time-to-live (in seconds) for attachment XPaths
 ATTACHMENT_XPATHS_CACHE_TTL = 86400
 
+# Cache time-to-live (in seconds) for the formpack schemas of asset versions
+VERSION_SCHEMA_CACHE_TTL = env.int('VERSION_SCHEMA_CACHE_TTL', 86400)
+# Maximum number of formpack schemas kept in memory by each worker process
+VERSION_SCHEMA_LOCAL_CACHE_SIZE = env.int('VERSION_SCHEMA_LOCAL_CACHE_SIZE', 128)
+# Maximum number of compiled formpacks (one per asset and set of deployed
+# versions) kept in memory by each worker process
+FORMPACK_LOCAL_CACHE_SIZE = env.int('FORMPACK_LOCAL_CACHE_SIZE', 16)
+
+# Strategy used to count submissions listed by the data API, one of `exact`,
+# `counter`, `capped` or `cached`. See `kpi.utils.mongo_helper.MongoHelper`
+SUBMISSION_LIST_COUNT_STRATEGY = env.str('SUBMISSION_LIST_COUNT_STRATEGY', 'exact')
+# Maximum number of submissions counted with the `capped` strategy
+SUBMISSION_COUNT_CAP = env.int('SUBMISSION_COUNT_CAP', 10000)
+# Cache time-to-live (in seconds) for counts with the `cached` strategy
+SUBMISSION_COUNT_CACHE_TTL = env.int('SUBMISSION_COUNT_CACHE_TTL', 60)
+# Share of the queries to the MongoDB `instances` collection whose shape is
+# recorded for the `mongo_index_advisor` management command
+MONGO_QUERY_SHAPES_SAMPLE_RATE = env.float('MONGO_QUERY_SHAPES_SAMPLE_RATE', 0.01)
+# Number of most recent query shapes kept
+MONGO_QUERY_SHAPES_MAX_SAMPLES = env.int('MONGO_QUERY_SHAPES_MAX_SAMPLES', 1000)
+# Cache time-to-live (in seconds) for the data derived from the assets each user
+# can see, i.e. the metadata and the hash of the asset list. They are
+# invalidated when an asset or its permissions change.
+USER_ASSETS_CACHE_TTL = env.int('USER_ASSETS_CACHE_TTL', 3600)
+# Cache time-to-live (in seconds) for the counters of the values of the fields
+# aggregated by MongoDB for reports. They are updated when submissions are
+# added, and invalidated when submissions are edited or deleted.
+REPORT_STATS_CACHE_TTL = env.int('REPORT_STATS_CACHE_TTL', 86400)
+# Stream JSON and XML pages of submissions listed by the data API, instead of
+# rendering the whole page in memory. The response cannot be altered by
+# middlewares once streaming has started.
+SUBMISSION_LIST_STREAMING = env.bool('SUBMISSION_LIST_STREAMING', False)
+
 # Configure the Referrer-Policy response header so OpenStreetMap tile servers
 # receive an acceptable referrer. See:
 # https://wiki.openstreetmap.org/wiki/Blocked_tiles#Referer_is_required
@@ -2,6 +2,23 @@
 SUBMISSION_FORMAT_TYPE_XML = 'xml'
 SUBMISSION_FORMAT_TYPE_JSON = 'json'
 
+# Strategies used to count submissions. See `MongoHelper.get_instances()`
+SUBMISSION_COUNT_STRATEGY_EXACT = 'exact'
+SUBMISSION_COUNT_STRATEGY_COUNTER = 'counter'
+SUBMISSION_COUNT_STRATEGY_CAPPED = 'capped'
+SUBMISSION_COUNT_STRATEGY_CACHED = 'cached'
+SUBMISSION_COUNT_STRATEGIES = (
+    SUBMISSION_COUNT_STRATEGY_EXACT,
+    SUBMISSION_COUNT_STRATEGY_COUNTER,
+    SUBMISSION_COUNT_STRATEGY_CAPPED,
+    SUBMISSION_COUNT_STRATEGY_CACHED,
+)
+
+# Export setting to only append submissions received since a previous export.
+# See `SubmissionExportTaskBase._get_incremental_base_export()`
+EXPORT_SETTING_INCREMENTAL = 'incremental'
+EXPORT_INCREMENTAL_TYPES = ('csv',)
+
 GEO_QUESTION_TYPES = ('geopoint', 'geotrace', 'geoshape')
 ATTACHMENT_QUESTION_TYPES = (
     'audit',
@@ -32,6 +32,8 @@ from kpi.constants import (
     PERM_CHANGE_SUBMISSIONS,
     PERM_PARTIAL_SUBMISSIONS,
     PERM_VIEW_SUBMISSIONS,
+    SUBMISSION_COUNT_STRATEGIES,
+    SUBMISSION_COUNT_STRATEGY_EXACT,
     SUBMISSION_FORMAT_TYPE_JSON,
     SUBMISSION_FORMAT_TYPE_XML,
 )
@@ -69,8 +71,9 @@ class BaseDeploymentBackend(abc.ABC):
 
     def __init__(self, asset):
         self.asset = asset
-        # Python-only attribute used by `kpi.views.v2.data.DataViewSet.list()`
+        # Python-only attributes used by `kpi.views.v2.data.DataViewSet.list()`
         self.current_submission_count = 0
+        self.current_submission_count_is_capped = False
         self.__stored_data_key = None
 
     @property
@@ -596,8 +599,10 @@ class BaseDeploymentBackend(abc.ABC):
             - fields
             - query
             - submission_ids
-        If `validate_count` is True,`start`, `limit`, `fields` and `sort` are
-        ignored.
+            - after
+            - count_strategy
+        If `validate_count` is True,`start`, `limit`, `fields`, `sort` and
+        `after` are ignored.
         If `user` has partial permissions, conditions are
         applied to the query to narrow down results to what they are allowed
         to see. Partial permissions are validated with 'view_submissions' by
@@ -635,6 +640,10 @@ class BaseDeploymentBackend(abc.ABC):
         query = mongo_query_params.get('query', {})
         submission_ids = mongo_query_params.get('submission_ids', [])
         skip_count = mongo_query_params.get('skip_count', False)
+        after = mongo_query_params.get('after')
+        count_strategy = mongo_query_params.get(
+            'count_strategy', SUBMISSION_COUNT_STRATEGY_EXACT
+        )
 
         # I've copied these `ValidationError` messages verbatim from DRF where
         # possible.TODO: Should this validation be in (or called directly by)
@@ -662,11 +671,21 @@ class BaseDeploymentBackend(abc.ABC):
         except ValueError:
             raise ValueError('Invalid `user_id` param')
 
+        if count_strategy not in SUBMISSION_COUNT_STRATEGIES:
+            raise serializers.ValidationError(
+                {
+                    'count_strategy': t('Value must be one of: ##strategies##').replace(
+                        '##strategies##', ', '.join(SUBMISSION_COUNT_STRATEGIES)
+                    )
+                }
+            )
+
         if validate_count:
             return {
                 'query': query,
                 'submission_ids': submission_ids,
-                'permission_filters': permission_filters
+                'permission_filters': permission_filters,
+                'count_strategy': count_strategy,
             }
 
         if isinstance(sort, str):
@@ -707,11 +726,15 @@ class BaseDeploymentBackend(abc.ABC):
             'submission_ids': submission_ids,
             'permission_filters': permission_filters,
             'skip_count': skip_count,
+            'count_strategy': count_strategy,
         }
 
         if limit:
             params['limit'] = limit
 
+        if after:
+            params['after'] = after
+
         return params
 
     def validate_access_with_partial_perms(
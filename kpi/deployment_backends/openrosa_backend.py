@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from collections import defaultdict
+from collections import Counter, defaultdict
 from contextlib import contextmanager
 from datetime import date, datetime, timedelta
 from typing import Generator, Literal, Optional, Union
@@ -36,6 +36,10 @@ from kobo.apps.openrosa.apps.logger.models import (
     XForm,
 )
 from kobo.apps.openrosa.apps.logger.models.instance import InstanceHistory
+from kobo.apps.openrosa.apps.logger.utils.counters import (
+    get_pending_daily_counts,
+    get_pending_num_of_submissions,
+)
 from kobo.apps.openrosa.apps.logger.utils.instance import (
     add_validation_status_to_instance,
     delete_instances,
@@ -59,6 +63,9 @@ from kpi.constants import (
     PERM_PARTIAL_SUBMISSIONS,
     PERM_VALIDATE_SUBMISSIONS,
     PERM_VIEW_SUBMISSIONS,
+    SUBMISSION_COUNT_STRATEGY_CAPPED,
+    SUBMISSION_COUNT_STRATEGY_COUNTER,
+    SUBMISSION_COUNT_STRATEGY_EXACT,
     SUBMISSION_FORMAT_TYPE_JSON,
     SUBMISSION_FORMAT_TYPE_XML,
 )
@@ -668,7 +675,14 @@ class OpenRosaDeploymentBackend(BaseDeploymentBackend):
             xform_id=self.xform_id,
             date__range=timeframe,
         )
-        return {str(count['date']): count['counter'] for count in daily_counts}
+        counts = Counter(
+            {str(count['date']): count['counter'] for count in daily_counts}
+        )
+        for date_, count in get_pending_daily_counts(
+            self.xform_id, timeframe
+        ).items():
+            counts[str(date_)] += count
+        return dict(counts)
 
     def get_data_download_links(self):
         exports_base_url = '/'.join(
@@ -830,6 +844,35 @@ class OpenRosaDeploymentBackend(BaseDeploymentBackend):
             )
         return submissions
 
+    def get_submission_ids(self) -> set[int]:
+        """
+        Return the ids of all submissions, straight from PostgreSQL.
+        Permissions are not checked.
+        """
+        return set(
+            Instance.objects.filter(xform_id=self.xform_id).values_list(
+                'pk', flat=True
+            )
+        )
+
+    def get_submissions_xml_modified_since(
+        self, date_modified: Optional[datetime] = None
+    ) -> Generator[tuple[int, str], None, None]:
+        """
+        Retrieve the ids and the XML of submissions modified since
+        `date_modified` (all of them if it is `None`), straight from PostgreSQL.
+        Permissions are not checked.
+        """
+        queryset = Instance.objects.filter(xform_id=self.xform_id)
+        if date_modified is not None:
+            queryset = queryset.filter(date_modified__gte=date_modified)
+
+        return (
+            queryset.order_by('pk')
+            .values_list('pk', 'xml')
+            .iterator(chunk_size=settings.PAIRED_DATA_CHUNK_SIZE)
+        )
+
     def get_validation_status(
         self, submission_id: int, user: settings.AUTH_USER_MODEL
     ) -> dict:
@@ -1230,7 +1273,9 @@ class OpenRosaDeploymentBackend(BaseDeploymentBackend):
     @property
     def submission_count(self):
         try:
-            return self.xform.num_of_submissions
+            return self.xform.num_of_submissions + get_pending_num_of_submissions(
+                self.xform_id
+            )
         except (InvalidXFormException, MissingXFormException):
             return 0
 
@@ -1258,7 +1303,10 @@ class OpenRosaDeploymentBackend(BaseDeploymentBackend):
         except DailyXFormSubmissionCounter.DoesNotExist:
             return 0
         else:
-            return total_submissions['count_sum']
+            pending_counts = get_pending_daily_counts(
+                xform_id, filter_args.get('date__range')
+            )
+            return total_submissions['count_sum'] + sum(pending_counts.values())
 
     @property
     def submission_model(self):
@@ -1517,6 +1565,26 @@ class OpenRosaDeploymentBackend(BaseDeploymentBackend):
         file_.synced_with_backend = True
         file_.save(update_fields=['synced_with_backend'])
 
+    def __get_count_from_counters(self, params: dict) -> Optional[int]:
+        """
+        Return the number of submissions stored on the XForm counters if
+        `params` requests the `counter` strategy and nothing narrows down
+        the results. In that case, the count is skipped in Mongo.
+
+        Otherwise, `counter` falls back on `exact` and `None` is returned.
+        """
+        if params.get('count_strategy') != SUBMISSION_COUNT_STRATEGY_COUNTER:
+            return None
+
+        params['count_strategy'] = SUBMISSION_COUNT_STRATEGY_EXACT
+        if params.get('skip_count') or any(
+            params.get(key) for key in ['query', 'submission_ids', 'permission_filters']
+        ):
+            return None
+
+        params['skip_count'] = True
+        return self.submission_count
+
     def __get_submissions_in_json(
         self, fetch_one: bool = False, **params
     ) -> Generator[dict, None, None]:
@@ -1528,11 +1596,22 @@ class OpenRosaDeploymentBackend(BaseDeploymentBackend):
         if not params.get('sort'):
             params['sort'] = {'_id': 1}
         for_output = params.pop('for_output', False)
+        counter_total_count = self.__get_count_from_counters(params)
         mongo_cursor, total_count = MongoHelper.get_instances(
             self.mongo_userform_id, **params
         )
-
-        # Python-only attribute used by `kpi.views.v2.data.DataViewSet.list()`
+        if counter_total_count is not None:
+            total_count = counter_total_count
+
+        # Python-only attributes used by `kpi.views.v2.data.DataViewSet.list()`.
+        # A capped count is not clamped to the cap: it goes one past the
+        # current page when there are more submissions, for the paginator to
+        # link to the next page.
+        self.current_submission_count_is_capped = (
+            params.get('count_strategy') == SUBMISSION_COUNT_STRATEGY_CAPPED
+            and total_count is not None
+            and total_count > settings.SUBMISSION_COUNT_CAP
+        )
         self.current_submission_count = total_count
 
         if fetch_one:
@@ -1560,9 +1639,9 @@ class OpenRosaDeploymentBackend(BaseDeploymentBackend):
                 # Retrieve the deployed version corresponding to the submission.
                 submission_version = None
                 if '__version__' in submission:
-                    submission_version = self.asset.asset_versions.filter(
-                        uid=submission['__version__'], deployed=True
-                    ).first()
+                    submission_version = self.asset.get_deployed_version(
+                        submission['__version__']
+                    )
 
                 # Compute attachment xpaths from that specific form version.
                 attachment_xpaths = self.asset.get_attachment_xpaths_from_version(
@@ -1592,6 +1671,7 @@ class OpenRosaDeploymentBackend(BaseDeploymentBackend):
         Submissions can be filtered with `params`.
         """
         params.pop('for_output', False)
+        params.pop('count_strategy', None)
         mongo_filters = ['query', 'permission_filters']
         use_mongo = any(
             mongo_filter in mongo_filters
@@ -1,7 +1,7 @@
 import os
-import posixpath
 
 from azure.core.exceptions import ResourceNotFoundError
+from django.core.files.utils import validate_file_name
 from django.db.models import FileField
 from django.db.models.fields.files import FieldFile
 from storages.backends.s3 import ClientError
@@ -48,14 +48,20 @@ class ExtendedFieldFile(FieldFile):
             self.name = new_path
             return True
 
-        upload_to = self.field.upload_to
-        # Temporary change `upload_to` - which is called internally by
-        # `self.save()` below - to new target folder
-        self.field.upload_to = lambda i, fn: posixpath.join(target_folder, fn)
+        # Do not go through `self.save()`, which builds the path with
+        # `upload_to`: the field is shared by all instances, and files may be
+        # moved by several threads at once (see `move_attachments()`).
+        new_path = self.storage.generate_filename(
+            validate_file_name(new_path, allow_relative_path=True)
+        )
         success = False
         try:
             with self.storage.open(old_path, 'rb') as f:
-                self.save(filename, f, save=False)
+                self.name = self.storage.save(
+                    new_path, f, max_length=self.field.max_length
+                )
+            setattr(self.instance, self.field.attname, self.name)
+            self._committed = True
             self.storage.delete(old_path)
             success = True
         # Azure raises `ResourceNotFoundError`, not `FileNotFoundError`.
@@ -63,9 +69,6 @@ class ExtendedFieldFile(FieldFile):
             logging.warning(f'Source file {old_path} no longer exists: {fe}')
             if reraise_errors:
                 raise SourceFileMissingError(old_path) from fe
-        finally:
-            # Restore `upload_to`
-            self.field.upload_to = upload_to
 
         return success
 
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from kpi.utils.mongo_index_advisor import (
+    get_sampled_query_shapes,
+    is_shape_indexed,
+    sync_managed_indexes,
+)
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Report the shapes of the queries sent to the MongoDB `instances` '
+        'collection (sampled by `MongoHelper`) which no index can serve, and '
+        'create or drop the indexes managed by KPI.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            default=False,
+            help=(
+                'Run `explain` on the last sample of each shape. Values of '
+                'samples are redacted, only the plan is relevant'
+            ),
+        )
+        parser.add_argument(
+            '--slow-ms',
+            type=int,
+            default=100,
+            help=(
+                'With `--explain`, report shapes whose sample runs longer than '
+                'this number of milliseconds. Default is 100'
+            ),
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Number of shapes to report, the most frequent first',
+        )
+        parser.add_argument(
+            '--create',
+            action='store_true',
+            default=False,
+            help='Create the managed indexes which do not exist yet',
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            default=False,
+            help='Drop the managed indexes which are not listed anymore',
+        )
+
+    def handle(self, *args, **options):
+        if options['create'] or options['drop']:
+            # `--drop` alone still creates missing indexes: the managed set is
+            # kept as a whole
+            created, dropped = sync_managed_indexes(drop=options['drop'])
+            for name in created:
+                self.stdout.write(f'Created index `{name}`')
+            for name in dropped:
+                self.stdout.write(f'Dropped index `{name}`')
+
+        # Text, geospatial and hashed indexes cannot serve these queries
+        indexes = {
+            name: info['key']
+            for name, info in settings.MONGO_DB.instances.index_information().items()
+            if all(
+                isinstance(direction, (int, float))
+                for _, direction in info['key']
+            )
+        }
+        shapes = get_sampled_query_shapes()
+        if not shapes:
+            self.stdout.write('No query shapes sampled yet')
+            return
+
+        for count, sample in shapes[: options['limit']]:
+            shape = sample['shape']
+            indexed = any(is_shape_indexed(shape, keys) for keys in indexes.values())
+            stats = None
+            if options['explain']:
+                stats = self._explain(sample)
+                slow = stats['execution_time_ms'] >= options['slow_ms']
+            else:
+                slow = False
+
+            if indexed and not slow:
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'✓ {count} × {json.dumps(shape)}')
+                continue
+
+            reasons = []
+            if not indexed:
+                reasons.append('unindexed')
+            if slow:
+                reasons.append('slow')
+            self.stdout.write(f'⚠ {count} × {json.dumps(shape)} ({", ".join(reasons)})')
+            if stats:
+                self.stdout.write(f'    {json.dumps(stats)}')
+
+    def _explain(self, sample: dict) -> dict:
+        cursor = settings.MONGO_DB.instances.find(sample['query'], {'_id': 1})
+        if sample['sort']:
+            cursor.sort([(key, int(value)) for key, value in sample['sort'].items()])
+        explanation = cursor.limit(settings.DEFAULT_API_PAGE_SIZE).explain()
+        execution_stats = explanation.get('executionStats', {})
+        return {
+            'stages': self._get_stages(
+                explanation.get('queryPlanner', {}).get('winningPlan', {})
+            ),
+            'execution_time_ms': execution_stats.get('executionTimeMillis', 0),
+            'docs_examined': execution_stats.get('totalDocsExamined'),
+            'returned': execution_stats.get('nReturned'),
+        }
+
+    def _get_stages(self, plan: dict) -> list[str]:
+        stages = [plan['stage']] if 'stage' in plan else []
+        if 'inputStage' in plan:
+            stages.extend(self._get_stages(plan['inputStage']))
+        for input_stage in plan.get('inputStages', []):
+            stages.extend(self._get_stages(input_stage))
+        return stages
@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kpi', '0074_drop_reversion_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PairedDataFragment',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('submission_id', models.IntegerField()),
+                ('xml', models.TextField()),
+                (
+                    'asset_file',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='paired_data_fragments',
+                        to='kpi.assetfile',
+                    ),
+                ),
+            ],
+            options={
+                'unique_together': {('asset_file', 'submission_id')},
+            },
+        ),
+    ]
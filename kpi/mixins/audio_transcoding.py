@@ -1,11 +1,18 @@
 # coding: utf-8
 import subprocess
-from datetime import datetime, timedelta
-from typing import Tuple, Union
+from datetime import timedelta
+from tempfile import NamedTemporaryFile
+from typing import IO, Tuple, Union
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import File
 
 from kpi.exceptions import FFMpegException, NotSupportedFormatException
 from kpi.utils.log import logging
 
+TRANSCODED_AUDIO_CACHE_KEY = 'transcoded_audio:{uid}:{audio_format}'
+
 
 class AudioTranscodingMixin:
 
@@ -18,13 +25,50 @@ class AudioTranscodingMixin:
         include_duration=False
     ) -> Union[bytes, Tuple[bytes, timedelta]]:
         """
-        Use ffmpeg to remove video (if any) and return transcoded audio from
-        the file located at `self.absolute_path`
+        Return the audio of the file located at `self.absolute_path`,
+        transcoded to `audio_format`, and its duration if `include_duration`
+        is `True`.
+
+        See `get_transcoded_audio_storage_path()`
+        """
+        with self.open_transcoded_audio(audio_format) as transcoded_audio:
+            content = transcoded_audio.read()
+
+        if include_duration:
+            return content, self.get_transcoded_audio_duration()
+
+        return content
+
+    def get_transcoded_audio_duration(self) -> timedelta:
+        """
+        Return the duration of the audio, as probed by ffprobe and stored in
+        `self.audio_length`
+        """
+        # Avoid circular imports, `kpi.utils.audio_duration` imports the
+        # `Attachment` model
+        from kpi.utils.audio_duration import get_audio_duration
+
+        if (duration := get_audio_duration(self)) is None:
+            raise FFMpegException
+
+        return timedelta(seconds=duration)
+
+    def get_transcoded_audio_storage_path(self, audio_format: str) -> str:
         """
+        Return the storage path of the audio of the file located at
+        `self.absolute_path`, transcoded to `audio_format`.
 
-        if not hasattr(self, 'mimetype') or not hasattr(self, 'absolute_path'):
+        The file is transcoded once and the result is stored next to the
+        original. The cache keeps track of stored files to avoid probing the
+        storage on each call.
+        """
+        if not all(
+            hasattr(self, attr)
+            for attr in ('mimetype', 'absolute_path', 'media_file', 'uid')
+        ):
             raise NotImplementedError(
-                'Parent class does not implement `mimetype` or `absolute_path'
+                'Parent class does not implement `mimetype`, `absolute_path`, '
+                '`media_file` or `uid`'
             )
 
         if not self.mimetype.startswith(self.SUPPORTED_INPUT_MIMETYPE_PREFIXES):
@@ -34,32 +78,59 @@ class AudioTranscodingMixin:
         if audio_format not in self.AVAILABLE_OUTPUT_FORMATS:
             raise NotSupportedFormatException
 
-        ffmpeg_command = [
-            '/usr/bin/ffmpeg',
-            '-i',
-            self.absolute_path,
-            '-ac',
-            '1',
-            '-vn',
-            '-f',
-            audio_format,
-            'pipe:1',
-        ]
-
-        pipe = subprocess.run(
-            ffmpeg_command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+        storage = self.media_file.storage
+        storage_path = f'{self.media_file.name}.{audio_format}'
+        cache_key = TRANSCODED_AUDIO_CACHE_KEY.format(
+            uid=self.uid, audio_format=audio_format
         )
+        # The cached path differs if the original has been moved since
+        if cache.get(cache_key) == storage_path:
+            return storage_path
 
-        if pipe.returncode:
-            logging.error(f'ffmpeg error: {pipe.stderr}')
-            raise FFMpegException
+        if not storage.exists(storage_path):
+            self._transcode_audio(audio_format, storage_path)
 
-        if include_duration:
-            duration = str(pipe.stderr).split('Duration: ')[-1].split('.')[0]
-            t = datetime.strptime(duration,'%H:%M:%S')
-            delta = timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
-            return (pipe.stdout, delta)
+        cache.set(cache_key, storage_path, settings.TRANSCODED_AUDIO_CACHE_TTL)
+        return storage_path
+
+    def open_transcoded_audio(self, audio_format: str) -> IO:
+        """
+        Return the stored transcoded audio as a file opened in binary mode
+        """
+        return self.media_file.storage.open(
+            self.get_transcoded_audio_storage_path(audio_format), 'rb'
+        )
+
+    def _transcode_audio(self, audio_format: str, storage_path: str):
+        """
+        Use ffmpeg to remove video (if any) and transcode the audio of the file
+        located at `self.absolute_path` to `audio_format`.
+
+        ffmpeg writes to a temporary file, which is uploaded to the storage
+        in chunks. The transcoded audio never needs to fit in memory.
+        """
+        with NamedTemporaryFile(suffix=f'.{audio_format}') as transcoded_audio:
+            ffmpeg_command = [
+                '/usr/bin/ffmpeg',
+                '-y',
+                '-i',
+                self.absolute_path,
+                '-ac',
+                '1',
+                '-vn',
+                '-f',
+                audio_format,
+                transcoded_audio.name,
+            ]
+
+            pipe = subprocess.run(
+                ffmpeg_command,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+
+            if pipe.returncode:
+                logging.error(f'ffmpeg error: {pipe.stderr}')
+                raise FFMpegException
 
-        return pipe.stdout
+            self.media_file.storage.save(storage_path, File(transcoded_audio))
@@ -2,13 +2,15 @@ from __future__ import annotations
 
 import copy
 from collections import defaultdict
+from collections.abc import Iterable
 from typing import Optional
 
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser, Permission
 from django.contrib.contenttypes.models import ContentType
 from django.db import models, transaction
-from django.db.models import Q
+from django.db.models import F, Q
 from django_request_cache import cache_for_request
 from rest_framework import serializers
 
@@ -27,6 +29,7 @@ from kpi.deployment_backends.kc_access.utils import (
 )
 from kpi.models.object_permission import ObjectPermission
 from kpi.utils.object_permission import (
+    get_cached_code_names,
     get_database_user,
     perm_parse,
     post_assign_perm,
@@ -37,6 +40,10 @@ from kpi.utils.project_views import (
     get_project_view_user_permissions_for_asset,
     user_has_project_view_asset_perm,
 )
+from kpi.utils.user_assets_version import (
+    get_asset_user_ids,
+    invalidate_user_assets_version,
+)
 
 
 class ObjectPermissionMixin:
@@ -129,6 +136,9 @@ class ObjectPermissionMixin:
 
     @transaction.atomic
     def save(self, *args, **kwargs):
+        # Users who lose access (e.g. when the object is moved out of a shared
+        # collection) must get a new version of their assets too
+        user_ids = set(get_asset_user_ids(self)) if self.pk else set()
         # Make sure we exist in the database before proceeding
         super().save(*args, **kwargs)
         # Recalculate self and all descendants
@@ -136,6 +146,9 @@ class ObjectPermissionMixin:
         # collection was renamed
         self._recalculate_inherited_perms()
         self.recalculate_descendants_perms()
+        # Inherited permissions are created without any signal
+        user_ids.update(get_asset_user_ids(self))
+        invalidate_user_assets_version(list(user_ids))
 
     def _filter_anonymous_perms(self, unfiltered_set):
         """
@@ -1002,6 +1015,176 @@ class ObjectPermissionMixin:
         return permissions
 
 
+class PermissionMatrix:
+    """
+    Effective permissions of several users on several objects, resolved with
+    a number of queries which does not depend on the number of objects.
+
+    It mirrors `ObjectPermissionMixin.has_perm()` and `get_perms()` (explicit
+    assignments, permissions calculated for the owner, organization admins,
+    project views and anonymous access) but answers from memory once built.
+    Useful in list contexts where the same checks would otherwise be run
+    asset by asset.
+    """
+
+    def __init__(self, objects: Iterable, users: Iterable):
+        self._objects = {obj.pk: obj for obj in objects}
+        self._users = {}
+        for user in users:
+            user = get_database_user(user)
+            self._users[user.pk] = user
+
+        user_ids = set(self._users) | {settings.ANONYMOUS_USER_ID}
+
+        # Grant permissions minus deny permissions, per (object id, user id)
+        self._assigned_perms = defaultdict(set)
+        denied_perms = defaultdict(set)
+        for object_id, user_id, codename, deny in ObjectPermission.objects.filter(
+            asset_id__in=self._objects, user_id__in=user_ids
+        ).values_list('asset_id', 'user_id', 'permission__codename', 'deny'):
+            perms = denied_perms if deny else self._assigned_perms
+            perms[(object_id, user_id)].add(codename)
+
+        for key, codenames in denied_perms.items():
+            self._assigned_perms[key] -= codenames
+
+        self._delete_perms = {
+            codename
+            for codename in get_cached_code_names()
+            if codename.startswith('delete_')
+        }
+        self._owner_organization_ids = self._get_owner_organization_ids()
+        self._project_views_per_user = self._get_project_views_per_user()
+        self._admin_organization_ids = {
+            user_id: user.organization.id
+            for user_id, user in self._users.items()
+            if not is_user_anonymous(user)
+            and user.organization
+            and user.organization.is_admin_only(user)
+        }
+
+    def get_perms(self, user_obj: User, obj: ObjectPermissionMixin) -> list[str]:
+        """
+        Return a list of codenames of all effective grant permissions that
+        `user_obj` has on `obj`.
+        """
+        user = get_database_user(user_obj)
+        perms = self._get_assigned_perms(user.pk, obj)
+        perms.update(self._get_project_view_perms(user, obj))
+        if self._is_org_admin_only(user, obj):
+            perms.update(obj.get_org_admin_inherited_perms(obj))
+        return list(perms)
+
+    def has_perm(
+        self, user_obj: User, obj: ObjectPermissionMixin, perm: str
+    ) -> bool:
+        """
+        Does `user_obj` have `perm` on `obj`? (True/False)
+        """
+        app_label, codename = perm_parse(perm, obj)
+        if is_user_anonymous(user_obj):
+            return self._anonymous_has_perm(obj, app_label, codename)
+
+        # Treat superusers the way django.contrib.auth does
+        if user_obj.is_active and user_obj.is_superuser:
+            return True
+
+        if codename in self._get_assigned_perms(user_obj.pk, obj):
+            return True
+
+        if self._is_org_admin_only(
+            user_obj, obj
+        ) and codename in obj.get_org_admin_inherited_perms():
+            return True
+
+        if perm in ProjectView.ALLOWED_PERMISSIONS and perm in (
+            self._get_project_view_perms(user_obj, obj)
+        ):
+            return True
+
+        # The user-specific test failed, but does the public have access?
+        return self._anonymous_has_perm(obj, app_label, codename)
+
+    def _anonymous_has_perm(
+        self, obj: ObjectPermissionMixin, app_label: str, codename: str
+    ) -> bool:
+        return (
+            codename in self._assigned_perms[(obj.pk, settings.ANONYMOUS_USER_ID)]
+            and f'{app_label}.{codename}' in settings.ALLOWED_ANONYMOUS_PERMISSIONS
+        )
+
+    def _get_assigned_perms(self, user_id: int, obj: ObjectPermissionMixin) -> set:
+        perms = set(self._assigned_perms[(obj.pk, settings.ANONYMOUS_USER_ID)])
+        if user_id == settings.ANONYMOUS_USER_ID:
+            return perms
+
+        perms.update(self._assigned_perms[(obj.pk, user_id)])
+        if user_id == obj.owner_id:
+            delete_perms = self._delete_perms
+            # FIXME: `Asset`-specific logic does not belong in this generic
+            # class
+            if obj.asset_type != ASSET_TYPE_SURVEY:
+                delete_perms = {
+                    codename
+                    for codename in delete_perms
+                    if not codename.endswith('_submissions')
+                }
+            perms.update(delete_perms)
+        return perms
+
+    def _get_owner_organization_ids(self) -> dict:
+        """
+        Return the organization id of each owner, as `User.organization` would
+        """
+        owner_ids = {obj.owner_id for obj in self._objects.values()}
+        OrganizationUser = apps.get_model('organizations', 'OrganizationUser')
+        owner_organization_ids = {}
+        for user_id, organization_id in (
+            OrganizationUser.objects.filter(user_id__in=owner_ids)
+            .order_by('user_id', '-created')
+            .values_list('user_id', 'organization_id')
+        ):
+            owner_organization_ids.setdefault(user_id, organization_id)
+        return owner_organization_ids
+
+    def _get_project_view_perms(self, user: User, obj: ObjectPermissionMixin) -> set:
+        """
+        Mirror `get_project_view_user_permissions_for_asset()`
+        """
+        asset_org = self._owner_organization_ids.get(obj.owner_id)
+        asset_countries = obj.settings.get('country_codes', [])
+
+        perms = set()
+        for project_view in self._project_views_per_user.get(user.pk, []):
+            region = project_view.get_countries()
+            if '*' not in region and not any(c in region for c in asset_countries):
+                continue
+
+            organization_ids = [org.id for org in project_view.organizations.all()]
+            if organization_ids and asset_org not in organization_ids:
+                continue
+
+            perms.update(project_view.permissions)
+        return perms
+
+    def _get_project_views_per_user(self) -> dict:
+        project_views_per_user = defaultdict(list)
+        for project_view in (
+            ProjectView.objects.filter(users__in=self._users)
+            .annotate(user_id=F('users'))
+            .prefetch_related('organizations')
+        ):
+            project_views_per_user[project_view.user_id].append(project_view)
+        return project_views_per_user
+
+    def _is_org_admin_only(self, user: User, obj: ObjectPermissionMixin) -> bool:
+        organization_id = self._admin_organization_ids.get(user.pk)
+        return (
+            organization_id is not None
+            and self._owner_organization_ids.get(obj.owner_id) == organization_id
+        )
+
+
 class ObjectPermissionViewSetMixin:
 
     def cache_all_assets_perms(
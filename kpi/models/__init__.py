@@ -16,4 +16,4 @@ from .import_export_task import (  # noqa F401
 )
 from .tag_uid import TagUid
 from .authorized_application import AuthorizedApplication
-from .paired_data import PairedData
+from .paired_data import PairedData, PairedDataFragment
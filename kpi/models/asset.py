@@ -66,6 +66,7 @@ from kpi.models.asset_user_partial_permission import AssetUserPartialPermission
 from kpi.models.asset_version import AssetVersion
 from kpi.utils.asset_content_analyzer import AssetContentAnalyzer
 from kpi.utils.autoname import HandleDuplicatesOptions
+from kpi.utils.cache import LocalLRUCache
 from kpi.utils.hash import calculate_content_hash
 from kpi.utils.object_permission import (
     get_cached_code_names,
@@ -83,6 +84,10 @@ SEARCH_FIELD_SCHEMA = {
     'required': ['owner_username', 'organization_name'],
 }
 
+# In-process tier in front of Redis for formpack schemas of asset versions.
+# See `Asset.get_version_formpack_schema()`
+_version_schema_cache = LocalLRUCache(settings.VERSION_SCHEMA_LOCAL_CACHE_SIZE)
+
 
 class AssetDeploymentStatus(models.TextChoices):
 
@@ -629,10 +634,8 @@ class Asset(
         """
 
         if version:
-            content = version.to_formpack_schema()['content']
             cache_key = f'attachment_xpaths:{self.uid}:{version.uid}'
         else:
-            content = self.content
             cache_key = f'attachment_xpaths:{self.uid}:no-version'
 
         cached_xpaths = cache.get(cache_key)
@@ -640,6 +643,11 @@ class Asset(
         if cached_xpaths is not None:
             return cached_xpaths
 
+        if version:
+            content = self.get_version_formpack_schema(version)['content']
+        else:
+            content = self.content
+
         survey = content['survey']
 
         def _get_xpaths(survey_: dict) -> Optional[list]:
@@ -673,6 +681,28 @@ class Asset(
 
         return xpaths_list
 
+    def get_deployed_version(self, version_uid: str) -> AssetVersion | None:
+        """
+        Return the deployed version matching `version_uid`, or `None` if it
+        does not exist.
+
+        Found versions are kept on the Asset instance to avoid querying the DB
+        again for every submission collected with the same version.
+        """
+        if not hasattr(self, '_deployed_versions_by_uid'):
+            self._deployed_versions_by_uid = {}
+
+        try:
+            return self._deployed_versions_by_uid[version_uid]
+        except KeyError:
+            pass
+
+        version = self.asset_versions.filter(uid=version_uid, deployed=True).first()
+        # Do not memoize misses, the version could be deployed later on
+        if version:
+            self._deployed_versions_by_uid[version_uid] = version
+        return version
+
     def get_filters_for_partial_perm(
         self, user_id: int, perm: str = PERM_VIEW_SUBMISSIONS
     ) -> Union[list, None]:
@@ -802,6 +832,30 @@ class Asset(
 
         return None
 
+    def get_version_formpack_schema(self, version: AssetVersion) -> dict:
+        """
+        Return `version.to_formpack_schema()`, cached by version content hash.
+
+        The expanded schema is first looked up in a per-process LRU cache, then
+        in Redis, and only built from the DB content on a miss of both. Content
+        repaired in place (see `repair_file_column_content_and_save()`) gets a
+        new hash, thus a new cache key.
+        A copy is returned because callers are free to alter it.
+        """
+        cache_key = (
+            f'version_schema:{self.uid}:{version.uid}:{version.content_hash}'
+        )
+
+        if (schema := _version_schema_cache.get(cache_key)) is None:
+            if (schema := cache.get(cache_key)) is None:
+                schema = version.to_formpack_schema()
+                cache.set(
+                    cache_key, schema, timeout=settings.VERSION_SCHEMA_CACHE_TTL
+                )
+            _version_schema_cache.set(cache_key, schema)
+
+        return copy.deepcopy(schema)
+
     @property
     def has_advanced_features(self):
         if self.advanced_features is None:
@@ -928,6 +982,7 @@ class Asset(
         # reset caching fields
         self._qpaths_xpaths_mapping = {}
         self._all_attachment_xpaths = None
+        self._deployed_versions_by_uid = {}
 
     def rename_translation(self, _from, _to):
         if not self._has_translations(self.content, 2):
@@ -1,8 +1,10 @@
 import base64
+import csv
 import datetime
 import os
 import posixpath
 import re
+import shutil
 import tempfile
 from collections import defaultdict
 from io import BytesIO
@@ -51,6 +53,8 @@ from kpi.constants import (
     ASSET_TYPE_EMPTY,
     ASSET_TYPE_SURVEY,
     ASSET_TYPE_TEMPLATE,
+    EXPORT_INCREMENTAL_TYPES,
+    EXPORT_SETTING_INCREMENTAL,
     GEO_QUESTION_TYPES,
     PERM_CHANGE_ASSET,
     PERM_MANAGE_ASSET,
@@ -829,6 +833,21 @@ class SubmissionExportTaskBase(ImportExportTask):
     }
 
     TIMESTAMP_KEY = '_submission_time'
+    # Key of `data` where the position of the last exported submission is
+    # stored, for subsequent incremental exports to resume from it
+    INCREMENTAL_WATERMARK_KEY = 'incremental_watermark'
+    # Greatest `_id` among exported submissions, see `_record_last_submission_time()`
+    _last_submission_id = None
+    # Separator and quote character of the lines written by formpack CSV exports
+    CSV_SEPARATOR = ';'
+    CSV_QUOTE = '"'
+    # Keys of `data` which do not alter the content of the export
+    INCREMENTAL_IGNORED_SETTINGS = (
+        EXPORT_SETTING_INCREMENTAL,
+        INCREMENTAL_WATERMARK_KEY,
+        'name',
+        'processing_time_seconds',
+    )
     # Above 244 seems to cause 'Download error' in Chrome 64/Linux and above
     # 207 causes a 'Filename too long' error in Excel
     MAXIMUM_FILENAME_LENGTH = 207
@@ -940,6 +959,13 @@ class SubmissionExportTaskBase(ImportExportTask):
             return fields_from_versions.lower() == 'true'
         return fields_from_versions
 
+    @staticmethod
+    def _get_csv_header(export: formpack.reporting.Export) -> list[str]:
+        """
+        Return the header lines (labels and, if any, tags) of a CSV export
+        """
+        return list(export.to_csv([]))
+
     @staticmethod
     def _get_fields_and_groups(fields: List[str]) -> List[str]:
         """
@@ -1008,6 +1034,47 @@ class SubmissionExportTaskBase(ImportExportTask):
 
         return geo_fields
 
+    def _get_incremental_base_export(
+        self, export_type: str
+    ) -> Optional['SubmissionExportTaskBase']:
+        """
+        Return the most recent complete export of the same user, with the same
+        source and settings, that an incremental export can be appended to.
+        """
+        if not self._incremental or export_type not in EXPORT_INCREMENTAL_TYPES:
+            return None
+
+        export_settings = self._get_incremental_settings(self.data)
+        previous_exports = (
+            self._meta.model.objects.filter(
+                user=self.user,
+                data__source=self.data['source'],
+                data__has_key=self.INCREMENTAL_WATERMARK_KEY,
+                status=ImportExportStatusChoices.COMPLETE,
+            )
+            .exclude(pk=self.pk)
+            .order_by('-date_created')
+        )
+        for previous_export in previous_exports[
+            :settings.MAXIMUM_EXPORTS_PER_USER_PER_FORM
+        ]:
+            if (
+                previous_export.result
+                and self._get_incremental_settings(previous_export.data)
+                == export_settings
+            ):
+                return previous_export
+
+        return None
+
+    @classmethod
+    def _get_incremental_settings(cls, data: dict) -> dict:
+        return {
+            key: value
+            for key, value in data.items()
+            if key not in cls.INCREMENTAL_IGNORED_SETTINGS
+        }
+
     def _get_submission_fields(self, source: Asset, fields: List[str]) -> List[str]:
         fields = self._get_fields_and_groups(fields)
 
@@ -1032,6 +1099,26 @@ class SubmissionExportTaskBase(ImportExportTask):
 
         return ordered_fields
 
+    def _has_deleted_submissions(
+        self, base_export: 'SubmissionExportTaskBase'
+    ) -> bool:
+        """
+        Return whether some of the submissions exported in `base_export` have
+        been deleted since, i.e. fewer submissions than its rows remain up to
+        its watermark
+        """
+        watermark = base_export.data[self.INCREMENTAL_WATERMARK_KEY]
+        query = {'_id': {'$lte': watermark['submission_id']}}
+        if export_query := self.data.get('query'):
+            query = {'$and': [export_query, query]}
+
+        submission_count = self.asset.deployment.calculated_submission_count(
+            user=self.user,
+            query=query,
+            submission_ids=self.data.get('submission_ids', []),
+        )
+        return submission_count < watermark['row_count']
+
     @property
     def _hierarchy_in_labels(self) -> bool:
         hierarchy_in_labels = self.data.get('hierarchy_in_labels', False)
@@ -1040,14 +1127,44 @@ class SubmissionExportTaskBase(ImportExportTask):
             return hierarchy_in_labels.lower() == 'true'
         return hierarchy_in_labels
 
+    @property
+    def _incremental(self) -> bool:
+        incremental = self.data.get(EXPORT_SETTING_INCREMENTAL, False)
+        # v1 exports expects a string
+        if isinstance(incremental, str):
+            return incremental.lower() == 'true'
+        return incremental
+
+    @staticmethod
+    def _read_csv_header(
+        export: 'SubmissionExportTaskBase', line_count: int
+    ) -> list[str]:
+        """
+        Return the first `line_count` lines of the CSV file of `export`
+        """
+        header = []
+        with export.result.open('rb') as csv_file:
+            for line in csv_file:
+                if len(header) == line_count:
+                    break
+                header.append(line.decode('utf-8').removesuffix('\r\n'))
+        return header
+
     def _record_last_submission_time(self, submission_stream):
         """
         Internal generator that yields each submission in the given
         `submission_stream` while recording the most recent submission
-        timestamp in `self.last_submission_time`
+        timestamp in `self.last_submission_time` and the greatest submission
+        id in `self._last_submission_id`
         """
         # FIXME: Mongo has only per-second resolution. Brutal.
         for submission in submission_stream:
+            submission_id = submission.get('_id')
+            if submission_id is not None and (
+                self._last_submission_id is None
+                or submission_id > self._last_submission_id
+            ):
+                self._last_submission_id = submission_id
             try:
                 timestamp = submission[self.TIMESTAMP_KEY]
             except KeyError:
@@ -1082,14 +1199,35 @@ class SubmissionExportTaskBase(ImportExportTask):
                 'are valid export types'
             )
 
-        export, submission_stream = self.get_export_object()
+        self._last_submission_id = None
+        base_export = self._get_incremental_base_export(export_type)
+        if base_export:
+            watermark = base_export.data[self.INCREMENTAL_WATERMARK_KEY]
+            export, submission_stream = self.get_export_object(
+                after_submission_id=watermark['submission_id']
+            )
+            header = self._get_csv_header(export)
+            if (
+                header == self._read_csv_header(base_export, len(header))
+                and not self._has_deleted_submissions(base_export)
+            ):
+                self.last_submission_time = base_export.last_submission_time
+                self._last_submission_id = watermark['submission_id']
+            else:
+                # Columns have changed since the previous export (e.g. a new
+                # version of the form has been deployed), or some of its
+                # submissions have been deleted, export everything
+                base_export = None
+
+        if not base_export:
+            export, submission_stream = self.get_export_object()
+
         filename = self._build_export_filename(export, export_type)
         absolute_filepath = self.get_absolute_filepath(filename)
 
         with self.result.storage.open(absolute_filepath, 'wb') as output_file:
             if export_type == 'csv':
-                for line in export.to_csv(submission_stream):
-                    output_file.write((line + '\r\n').encode('utf-8'))
+                self._write_csv(export, submission_stream, output_file, base_export)
             elif export_type == 'geojson':
                 for line in export.to_geojson(submission_stream, flatten=flatten):
                     output_file.write(line.encode('utf-8'))
@@ -1106,20 +1244,15 @@ class SubmissionExportTaskBase(ImportExportTask):
                     prefix='export_xlsx', mode='rb'
                 ) as xlsx_output_file:
                     export.to_xlsx(xlsx_output_file.name, submission_stream)
-                    # TODO: chunk again once
-                    # https://github.com/jschneier/django-storages/issues/449
-                    # is fixed
-                    # TODO: Check if monkey-patch (line 57) can restore writing
-                    # by chunk
-                    """
-                    while True:
-                        chunk = xlsx_output_file.read(5 * 1024 * 1024)
-                        if chunk:
-                            output_file.write(chunk)
-                        else:
-                            break
-                    """
-                    output_file.write(xlsx_output_file.read())
+                    # Copy the workbook by chunks to keep memory usage constant,
+                    # whatever the size of the export. With S3, each chunk is
+                    # sent as a part of a multipart upload
+                    # (see `kobo.apps.storage_backends.s3boto3.S3File`).
+                    shutil.copyfileobj(
+                        xlsx_output_file,
+                        output_file,
+                        settings.EXPORT_UPLOAD_CHUNK_SIZE,
+                    )
             elif export_type == 'spss_labels':
                 export.to_spss_labels(output_file)
 
@@ -1132,6 +1265,83 @@ class SubmissionExportTaskBase(ImportExportTask):
         else:
             self.save(update_fields=['result', 'last_submission_time'])
 
+    @classmethod
+    def _shift_csv_index(cls, line: str, position_from_end: int, offset: int) -> str:
+        """
+        Add `offset` to the `_index` column of a CSV row, `position_from_end`
+        columns before the last one.
+
+        Only this value is rewritten, the rest of the line is kept as written by
+        formpack. Columns are counted from the end since `_index` is among the
+        last ones, thus separators within the values of preceding columns do not
+        matter.
+        """
+        quote = cls.CSV_QUOTE
+        delimiter = quote + cls.CSV_SEPARATOR + quote
+        values = line[len(quote):-len(quote)].rsplit(delimiter, position_from_end + 1)
+        position = len(values) - position_from_end - 1
+        if position < 0:
+            return line
+        try:
+            values[position] = str(int(values[position]) + offset)
+        except ValueError:
+            return line
+        return quote + delimiter.join(values) + quote
+
+    def _write_csv(
+        self,
+        export: formpack.reporting.Export,
+        submission_stream: Generator,
+        output_file,
+        base_export: Optional['SubmissionExportTaskBase'] = None,
+    ):
+        """
+        Write the CSV export to `output_file`.
+
+        If `base_export` is provided, its file is copied first, then only the
+        rows of the submissions in `submission_stream` are appended, with
+        their `_index` following the ones of the previous export.
+        """
+        header = self._get_csv_header(export)
+        row_count = 0
+        index_position_from_end = None
+        if base_export:
+            watermark = base_export.data[self.INCREMENTAL_WATERMARK_KEY]
+            row_count = watermark['row_count']
+            with base_export.result.open('rb') as base_file:
+                shutil.copyfileobj(
+                    base_file, output_file, settings.EXPORT_UPLOAD_CHUNK_SIZE
+                )
+            labels = next(
+                csv.reader(
+                    [header[0]],
+                    delimiter=self.CSV_SEPARATOR,
+                    quotechar=self.CSV_QUOTE,
+                )
+            )
+            if '_index' in labels:
+                index_position_from_end = len(labels) - labels.index('_index') - 1
+
+        index_offset = row_count
+        for line_number, line in enumerate(export.to_csv(submission_stream)):
+            if line_number < len(header):
+                if base_export:
+                    # Already copied from the previous export
+                    continue
+            else:
+                row_count += 1
+                if index_position_from_end is not None:
+                    line = self._shift_csv_index(
+                        line, index_position_from_end, index_offset
+                    )
+            output_file.write((line + '\r\n').encode('utf-8'))
+
+        if self._last_submission_id is not None:
+            self.data[self.INCREMENTAL_WATERMARK_KEY] = {
+                'submission_id': self._last_submission_id,
+                'row_count': row_count,
+            }
+
     @property
     def asset(self):
         source_url = self.data.get('source', False)
@@ -1148,10 +1358,15 @@ class SubmissionExportTaskBase(ImportExportTask):
         super().delete(*args, **kwargs)
 
     def get_export_object(
-        self, source: Optional[Asset] = None
+        self,
+        source: Optional[Asset] = None,
+        after_submission_id: Optional[int] = None,
     ) -> Tuple[formpack.reporting.Export, Generator]:
         """
         Get the formpack Export object and submission stream for processing.
+
+        If `after_submission_id` is provided, only submissions with a greater
+        id are streamed.
         """
 
         fields = self.data.get('fields', [])
@@ -1189,12 +1404,22 @@ class SubmissionExportTaskBase(ImportExportTask):
                     'Supplement data migration in progress, please retry later.'
                 )
 
+        submission_params = {}
+        if after_submission_id is not None:
+            submission_params = {
+                'sort': {'_id': 1},
+                'after': {'_id': after_submission_id},
+            }
+
         submission_stream = source.deployment.get_submissions(
             user=self.user,
             fields=fields,
             submission_ids=submission_ids,
             query=query,
             for_output=True,
+            # The total number of submissions is not needed to export them
+            skip_count=True,
+            **submission_params,
         )
         pack, submission_stream = build_formpack(
             source, submission_stream, self._fields_from_all_versions
@@ -3,6 +3,7 @@ import time
 from typing import Union
 
 from django.conf import settings
+from django.db import models
 from rest_framework.reverse import reverse
 
 from kpi.constants import (
@@ -300,3 +301,22 @@ class PairedData(OpenRosaManifestInterface,
             setattr(self, key, value)
 
         self.void_external_xml_cache()
+
+
+class PairedDataFragment(models.Model):
+    """
+    Stripped XML of one source submission, as it appears in the `xml-external`
+    file of a paired data link. Keeping it lets the file be rebuilt from the
+    source submissions which changed since the last build only.
+    """
+
+    class Meta:
+        unique_together = [['asset_file', 'submission_id']]
+
+    asset_file = models.ForeignKey(
+        AssetFile,
+        related_name='paired_data_fragments',
+        on_delete=models.CASCADE,
+    )
+    submission_id = models.IntegerField()  # `logger.Instance.id`
+    xml = models.TextField()
@@ -1,10 +1,16 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
 from collections import OrderedDict
-from typing import Union
+from typing import Iterable, Optional, Union
 
+from bson import json_util
 from constance import config
 from django.conf import settings
 from django.db.models.query import QuerySet
+from django.utils.translation import gettext as t
 from django_request_cache import cache_for_request
+from rest_framework import serializers
 from rest_framework.pagination import LimitOffsetPagination, _positive_int
 from rest_framework.response import Response
 from rest_framework.reverse import reverse_lazy
@@ -295,6 +301,164 @@ class NoCountPagination(DefaultPagination):
         return replace_query_param(url, self.offset_query_param, offset)
 
 
+class SubmissionCursorPagination(NoCountPagination):
+    """
+    Keyset (a.k.a. cursor) pagination for submissions stored in MongoDB.
+
+    Instead of skipping `start` documents, each page resumes right after the
+    last submission of the previous page with a range query on the sort key,
+    which lets MongoDB walk the index. Deep pages cost the same as the first
+    one and no count is run.
+
+    The `cursor` is an opaque token built from the sort key values of the last
+    submission of the page. An empty `cursor` requests the first page.
+    Only forward navigation is supported and sorting is restricted to
+    `SORTABLE_FIELDS`. `_id` is always used as a tie-breaker.
+    """
+
+    cursor_query_param = 'cursor'
+
+    SORTABLE_FIELDS = ('_id', '_submission_time')
+    TIE_BREAKER_FIELD = '_id'
+
+    @classmethod
+    def is_requested(cls, request) -> bool:
+        return cls.cursor_query_param in request.query_params
+
+    def decode_cursor(self, request) -> Optional[dict]:
+        encoded_cursor = request.query_params.get(self.cursor_query_param)
+        if not encoded_cursor:
+            return None
+
+        try:
+            last_values = json_util.loads(
+                urlsafe_b64decode(encoded_cursor.encode()).decode()
+            )
+        except (BinasciiError, UnicodeDecodeError, ValueError):
+            raise serializers.ValidationError(
+                {self.cursor_query_param: t('Invalid cursor')}
+            )
+
+        if not isinstance(last_values, dict) or set(last_values) != set(
+            self.sort
+        ):
+            raise serializers.ValidationError(
+                {self.cursor_query_param: t('Invalid cursor')}
+            )
+
+        return last_values
+
+    def encode_cursor(self, submission: dict) -> str:
+        last_values = {field: submission.get(field) for field in self.sort}
+        return urlsafe_b64encode(json_util.dumps(last_values).encode()).decode()
+
+    def get_mongo_params(self, request, filters: dict) -> dict:
+        """
+        Adapt the filters passed to the deployment back end: validate `sort`,
+        translate the `cursor` into the last values of the sort key and fetch
+        one extra submission to detect whether a next page exists.
+        """
+        self.request = request
+        self.limit = filters['limit']
+        self.sort = self._get_sort(filters.get('sort'))
+        self.next_cursor = None
+
+        filters.pop('start', None)
+        filters.pop(self.cursor_query_param, None)
+        filters['sort'] = self.sort
+        filters['limit'] = self.limit + 1
+        filters['skip_count'] = True
+
+        if last_values := self.decode_cursor(request):
+            filters['after'] = last_values
+
+        # The sort key must be part of the results to build the next cursor
+        if fields := filters.get('fields'):
+            if isinstance(fields, str):
+                try:
+                    fields = json.loads(fields)
+                except ValueError:
+                    # Let the back end raise the validation error
+                    return filters
+            if isinstance(fields, list):
+                filters['fields'] = fields + [
+                    field for field in self.sort if field not in fields
+                ]
+
+        return filters
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        return None
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Opaque cursor returned in `next`. Pass an empty value to get the first page.',  # noqa E501
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.limit_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+    def paginate_submissions(self, submissions: Iterable[dict]) -> list[dict]:
+        # `submissions` contains at most `self.limit + 1` items.
+        # See `get_mongo_params()`
+        items = list(submissions)
+        page = items[:self.limit]
+        if len(items) > self.limit:
+            self.next_cursor = self.encode_cursor(page[-1])
+        return page
+
+    def _get_sort(self, sort: Optional[Union[str, dict]]) -> dict:
+        if not sort:
+            return {self.TIE_BREAKER_FIELD: 1}
+
+        if isinstance(sort, str):
+            try:
+                sort = json.loads(sort)
+            except ValueError:
+                raise serializers.ValidationError(
+                    {'sort': t('Value must be valid JSON.')}
+                )
+
+        if (
+            not isinstance(sort, dict)
+            or len(sort) != 1
+            or not set(sort).issubset(self.SORTABLE_FIELDS)
+            or next(iter(sort.values())) not in (1, -1)
+        ):
+            raise serializers.ValidationError(
+                {
+                    'sort': t(
+                        'Only one of these fields can be used to sort with '
+                        'a cursor: ##fields##. Direction must be 1 or -1.'
+                    ).replace('##fields##', ', '.join(self.SORTABLE_FIELDS))
+                }
+            )
+
+        field, direction = next(iter(sort.items()))
+        if field != self.TIE_BREAKER_FIELD:
+            sort[self.TIE_BREAKER_FIELD] = direction
+
+        return sort
+
+
 def custom_max_limit(cls, max_limit):
     class NewMaxLimit(cls):
         pass
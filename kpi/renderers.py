@@ -141,6 +141,36 @@ class MP3ConversionRenderer(MediaFileRenderer):
     format = 'mp3'
 
 
+class SubmissionJSONRenderer(renderers.JSONRenderer):
+
+    def render_stream(
+        self,
+        data: dict,
+        accepted_media_type: str | None = None,
+        renderer_context: dict | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Render a paginated response chunk by chunk: the envelope first, then
+        each submission of `data['results']` as soon as it is consumed.
+        The output is the same as `render()`.
+        """
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            # Not worth streaming indented output, which is meant for humans
+            yield self.render(data, accepted_media_type, renderer_context)
+            return
+
+        data = dict(data)
+        results = data.pop('results')
+        envelope = self.render(data, renderer_context=renderer_context)
+        # Remove the closing brace of the envelope to append `results` to it
+        yield envelope[:-1] + (b',' if data else b'') + b'"results":['
+        for index, submission in enumerate(results):
+            if index:
+                yield b','
+            yield self.render(submission, renderer_context=renderer_context)
+        yield b']}'
+
+
 class SanitizedJSONRenderer(renderers.JSONRenderer):
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
@@ -312,6 +342,31 @@ class SubmissionXMLRenderer(DRFXMLRenderer):
 
         return add_xml_declaration(data)
 
+    def render_stream(
+        self,
+        data: dict,
+        accepted_media_type: str | None = None,
+        renderer_context: dict | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Render a paginated response chunk by chunk: the envelope first, then
+        each submission of `data['results']` as soon as it is consumed.
+        The output is the same as `render()`.
+        """
+        data = dict(data)
+        results = data.pop('results')
+        xml_ = dict2xml(data, wrap=self.root_tag_name, newlines=False)
+        opening_xml = xml_.replace(f'</{self.root_tag_name}>', '')
+        yield add_xml_declaration(
+            f'{opening_xml}{self._node_generator("results")}'
+        ).encode(self.charset)
+        for submission in results:
+            yield self.__cleanup_submission(submission).encode(self.charset)
+        yield (
+            f'{self._node_generator("results", closing=True)}'
+            f'{self._node_generator(self.root_tag_name, closing=True)}'
+        ).encode(self.charset)
+
     @classmethod
     def _get_xml(cls, data):
 
@@ -799,12 +799,7 @@ class AssetSerializer(serializers.HyperlinkedModelSerializer):
         if obj.owner_id == user.id:
             return obj.deployment.submission_count
 
-        # `has_perm` benefits from internal calls which use
-        # `django_cache_request`. It won't hit DB multiple times
-
-        self._set_asset_ids_cache(obj)
-
-        if obj.has_perm(user, PERM_VIEW_SUBMISSIONS):
+        if self._has_perm(obj, PERM_VIEW_SUBMISSIONS):
             return obj.deployment.submission_count
 
         return None
@@ -889,7 +884,7 @@ class AssetSerializer(serializers.HyperlinkedModelSerializer):
         # Org admins are handled by `has_perm()` which checks `is_admin_only()`.
         if user_has_project_view_asset_perm(
             asset, request.user, PERM_VIEW_ASSET
-        ) or asset.has_perm(request.user, PERM_MANAGE_ASSET):
+        ) or self._has_perm(asset, PERM_MANAGE_ASSET):
             filtered = all_permissions
         else:
             filtered = get_user_permission_assignments(
@@ -1191,6 +1186,21 @@ class AssetSerializer(serializers.HyperlinkedModelSerializer):
 
         return ASSET_STATUS_SHARED
 
+    def _has_perm(self, asset: Asset, perm: str) -> bool:
+        """
+        Check `perm` for the requesting user against the permission matrix of
+        the list context if it is present, instead of asset by asset.
+        """
+        user = self.context['request'].user
+        permission_matrix = self.context.get('permission_matrix')
+        if permission_matrix is not None:
+            return permission_matrix.has_perm(user, asset, perm)
+
+        # `has_perm` benefits from internal calls which use
+        # `django_cache_request`. It won't hit DB multiple times
+        self._set_asset_ids_cache(asset)
+        return asset.has_perm(user, perm)
+
     def _set_asset_ids_cache(self, asset):
         """
         Set an attribute on the `asset` object for performance purposes
@@ -29,6 +29,7 @@ from rest_framework import serializers
 from rest_framework.request import Request
 from rest_framework.reverse import reverse
 
+from kpi.constants import EXPORT_INCREMENTAL_TYPES, EXPORT_SETTING_INCREMENTAL
 from kpi.fields import ReadOnlyJSONField
 from kpi.models import Asset, SubmissionExportTask
 from kpi.tasks import export_in_background
@@ -126,10 +127,16 @@ class ExportTaskSerializer(serializers.ModelSerializer):
                 EXPORT_SETTING_INCLUDE_MEDIA_URL
             ]
 
+        if EXPORT_SETTING_INCREMENTAL in data_:
+            attrs[EXPORT_SETTING_INCREMENTAL] = self.validate_incremental(data_)
+
         return attrs
 
     def validate_data(self, data: dict) -> dict:
-        valid_export_settings = VALID_EXPORT_SETTINGS + [EXPORT_SETTING_SOURCE]
+        valid_export_settings = VALID_EXPORT_SETTINGS + [
+            EXPORT_SETTING_SOURCE,
+            EXPORT_SETTING_INCREMENTAL,
+        ]
 
         for required in REQUIRED_EXPORT_SETTINGS:
             if required not in data:
@@ -186,6 +193,23 @@ class ExportTaskSerializer(serializers.ModelSerializer):
             )
         return group_sep
 
+    def validate_incremental(self, data: dict) -> bool:
+        incremental = data[EXPORT_SETTING_INCREMENTAL]
+        if not isinstance(incremental, bool):
+            raise serializers.ValidationError(
+                {EXPORT_SETTING_INCREMENTAL: t('Must be a boolean')}
+            )
+
+        if incremental and data[EXPORT_SETTING_TYPE] not in EXPORT_INCREMENTAL_TYPES:
+            raise serializers.ValidationError(
+                {
+                    EXPORT_SETTING_INCREMENTAL: t(
+                        'Only supported for the following export types: {}'
+                    ).format(', '.join(EXPORT_INCREMENTAL_TYPES))
+                }
+            )
+        return incremental
+
     def validate_lang(self, data: dict) -> str:
         asset_languages = self._get_asset.summary.get('languages', [])
         all_valid_languages = [*asset_languages, *VALID_DEFAULT_LANGUAGES]
@@ -1,17 +1,28 @@
+from contextlib import ExitStack
 from typing import Union
 
+from celery.signals import task_postrun, task_prerun
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from taggit.models import Tag
 
 from kobo.apps.data_collectors.models import DataCollectorGroup
 from kpi.constants import PERM_ADD_SUBMISSIONS
 from kpi.exceptions import DeploymentNotFound
-from kpi.models import Asset, TagUid
+from kpi.models import Asset, AssetVersion, TagUid, UserAssetSubscription
 from kpi.utils.object_permission import post_assign_perm, post_remove_perm
 from kpi.utils.permissions import is_user_anonymous
+from kpi.utils.request_metrics import collect_metrics
+from kpi.utils.user_assets_version import (
+    ALL_USERS,
+    get_asset_user_ids,
+    invalidate_user_assets_version,
+)
+
+# Metrics of the Celery tasks running in this process, by task id
+_task_metrics = {}
 
 
 @receiver(post_save, sender=Tag)
@@ -76,6 +87,48 @@ def post_remove_asset_perm(
         return
 
 
+@receiver(post_save, sender=AssetVersion)
+def update_asset_version_users_assets_version(sender, instance, **kwargs):
+    """
+    Change the version of the assets again once the asset version exists.
+
+    `Asset.save()` creates its new version after the asset itself is saved.
+    The hash of the assets cached in the meantime would be the old one.
+    """
+    if kwargs.get('raw'):
+        return
+
+    invalidate_user_assets_version(get_asset_user_ids(instance.asset))
+
+
+@receiver(pre_delete, sender=Asset)
+def pre_delete_asset_users_assets_version(sender, instance, **kwargs):
+    # Permissions are deleted with the asset, retrieve their users beforehand
+    instance._assets_version_user_ids = get_asset_user_ids(instance)
+
+
+@receiver(post_delete, sender=Asset)
+def post_delete_asset_users_assets_version(sender, instance, **kwargs):
+    invalidate_user_assets_version(
+        getattr(instance, '_assets_version_user_ids', [instance.owner_id])
+    )
+
+
+@receiver([post_assign_perm, post_remove_perm], sender=Asset)
+def update_user_assets_version(
+    sender,
+    instance,
+    user: Union[settings.AUTH_USER_MODEL, 'AnonymousUser'],
+    **kwargs
+):
+    invalidate_user_assets_version([ALL_USERS if is_user_anonymous(user) else user.pk])
+
+
+@receiver([post_save, post_delete], sender=UserAssetSubscription)
+def update_subscriber_assets_version(sender, instance, **kwargs):
+    invalidate_user_assets_version([instance.user_id])
+
+
 @receiver(post_save, sender=Asset)
 def update_data_collector_group(
     sender,
@@ -97,3 +150,20 @@ def update_data_collector_group(
             instance.deployment.create_enketo_survey_links_for_data_collectors()
     # keep track of the most recent data collector group used to create links
     instance._initial_data_collector_group_id = instance.data_collector_group_id
+
+
+@task_prerun.connect
+def start_task_metrics(task_id, task, **kwargs):
+    if not settings.ENABLE_REQUEST_METRICS:
+        return
+
+    stack = ExitStack()
+    stack.enter_context(collect_metrics(task.name, kind='task'))
+    _task_metrics[task_id] = stack
+
+
+@task_postrun.connect
+def stop_task_metrics(task_id, **kwargs):
+    if stack := _task_metrics.pop(task_id, None):
+        stack.close()
+
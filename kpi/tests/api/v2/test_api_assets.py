@@ -2,6 +2,7 @@ import copy
 import json
 import os
 from datetime import datetime
+from unittest.mock import patch
 
 import dateutil.parser
 from ddt import data, ddt, unpack
@@ -233,6 +234,103 @@ class AssetListApiTests(PermissionsTestMixin, BaseAssetTestCase):
         hash_response = self.client.get(hash_url)
         self.assertEqual(hash_response.data.get('hash'), expected_hash)
 
+        # The hash is cached until one of the assets changes
+        with patch(
+            'kpi.views.v2.asset.get_objects_for_user'
+        ) as patched_get_objects_for_user:
+            hash_response = self.client.get(hash_url)
+        patched_get_objects_for_user.assert_not_called()
+        self.assertEqual(hash_response.data.get('hash'), expected_hash)
+
+        # Poll while the asset is saved but its new version is not created yet
+        create_version = Asset.create_version
+
+        def create_version_after_poll(asset):
+            self.client.get(hash_url)
+            return create_version(asset)
+
+        user_asset.name = 'Renamed asset'
+        with patch.object(Asset, 'create_version', create_version_after_poll):
+            user_asset.save()
+        versions_ids = [
+            user_asset.version_id,
+            another_user_asset.version_id
+        ]
+        versions_ids.sort()
+        hash_response = self.client.get(hash_url)
+        self.assertEqual(
+            hash_response.data.get('hash'), calculate_hash(''.join(versions_ids))
+        )
+
+    def test_assets_hash_after_moving_asset_into_shared_collection(self):
+        someuser = User.objects.get(username='someuser')
+        anotheruser = User.objects.get(username='anotheruser')
+        collection = Asset.objects.create(
+            owner=someuser,
+            name='Shared collection',
+            asset_type=ASSET_TYPE_COLLECTION,
+        )
+        collection.assign_perm(anotheruser, PERM_VIEW_ASSET)
+        survey = Asset.objects.create(
+            owner=someuser,
+            asset_type=ASSET_TYPE_SURVEY,
+            content={'survey': [{'type': 'text', 'label': 'q1', 'name': 'q1'}]},
+        )
+
+        self.client.force_login(anotheruser)
+        hash_url = reverse(self._get_endpoint('asset-hash'))
+        hash_before_move = self.client.get(hash_url).data.get('hash')
+
+        # Moving the survey creates no new version, but gives access to it
+        version_count = survey.asset_versions.count()
+        survey.parent = collection
+        survey.save()
+        assert survey.asset_versions.count() == version_count
+        assert survey.has_perm(anotheruser, PERM_VIEW_ASSET)
+
+        assert self.client.get(hash_url).data.get('hash') != hash_before_move
+
+    def test_assets_metadata(self):
+        anotheruser = User.objects.get(username='anotheruser')
+        asset = Asset.objects.create(
+            owner=self.asset.owner,
+            name='Asset with metadata',
+            asset_type=ASSET_TYPE_SURVEY,
+            settings={
+                'country': [{'value': 'CAN', 'label': 'Canada'}],
+                'sector': {'value': 'Health', 'label': 'Health'},
+                'organization': 'Kobo',
+            },
+        )
+        Asset.objects.filter(pk=asset.pk).update(
+            summary={'languages': ['English (en)', '', None]}
+        )
+        metadata_url = reverse(self._get_endpoint('asset-metadata'))
+
+        metadata = self.client.get(metadata_url).json()
+        assert 'English (en)' in metadata['languages']
+        assert '' not in metadata['languages']
+        assert None not in metadata['languages']
+        assert ['CAN', 'Canada'] in metadata['countries']
+        assert ['Health', 'Health'] in metadata['sectors']
+        assert 'Kobo' in metadata['organizations']
+
+        self.client.force_login(anotheruser)
+        metadata = self.client.get(metadata_url).json()
+        assert 'Kobo' not in metadata['organizations']
+
+        # Sharing the asset invalidates the cached metadata
+        asset.assign_perm(anotheruser, PERM_VIEW_ASSET)
+        metadata = self.client.get(metadata_url).json()
+        assert 'Kobo' in metadata['organizations']
+
+        # So does saving it
+        asset.settings['organization'] = 'KoboToolbox'
+        asset.save()
+        metadata = self.client.get(metadata_url).json()
+        assert 'Kobo' not in metadata['organizations']
+        assert 'KoboToolbox' in metadata['organizations']
+
     def test_assets_search_query(self):
         someuser = User.objects.get(username='someuser')
         question = Asset.objects.create(
@@ -1,3 +1,4 @@
+import subprocess
 import uuid
 from unittest.mock import patch
 
@@ -127,6 +128,24 @@ class AttachmentApiTests(BaseAssetTestCase):
         assert response.status_code == status.HTTP_200_OK
         assert response['Content-Type'] == 'audio/mpeg'
 
+    def test_convert_mp4_to_mp3_only_once(self):
+        url = reverse(
+            self._get_endpoint('attachment-list'),
+            kwargs={
+                'uid_asset': self.asset.uid,
+                'uid_data': self.submission_id,
+            },
+        )
+        with patch(
+            'kpi.mixins.audio_transcoding.subprocess.run',
+            wraps=subprocess.run,
+        ) as patched_run:
+            for _ in range(2):
+                response = self.client.get(url, {'xpath': 'q1', 'format': 'mp3'})
+                assert response.status_code == status.HTTP_200_OK
+
+        patched_run.assert_called_once()
+
     def test_reject_image_with_conversion(self):
         query_dict = QueryDict('', mutable=True)
         query_dict.update(
@@ -10,6 +10,7 @@ from rest_framework import status
 from rest_framework.exceptions import ErrorDetail
 
 from kobo.apps.kobo_auth.shortcuts import User
+from kobo.apps.openrosa.apps.logger.models import Instance
 from kpi.constants import (
     PERM_ADD_SUBMISSIONS,
     PERM_CHANGE_ASSET,
@@ -18,8 +19,10 @@ from kpi.constants import (
     PERM_VIEW_SUBMISSIONS,
 )
 from kpi.models import Asset, AssetFile
+from kpi.tasks import regenerate_paired_data
 from kpi.tests.base_test_case import BaseAssetTestCase
 from kpi.urls.router_api_v2 import URL_NAMESPACE as ROUTER_URL_NAMESPACE
+from kpi.utils.xml import strip_nodes
 
 
 class BasePairedDataTestCase(BaseAssetTestCase):
@@ -628,6 +631,68 @@ class PairedDataAsyncRegenTests(BasePairedDataTestCase):
         assert '>\n<' not in content
         assert '> <' not in content
 
+    def test_rebuild_only_parses_modified_submissions(self):
+        """
+        Once the XML has been built, the next builds only parse the source
+        submissions modified since then, but still reflect added, edited and
+        deleted submissions.
+        """
+        self.source_asset.deployment.mock_submissions(
+            [
+                {
+                    'group_restaurant/favourite_restaurant': 'Le Chantecler',
+                    'city_name': 'Nice',
+                }
+            ]
+        )
+        self.client.get(self.external_xml_url)
+        asset_file = self.destination_asset.asset_files.get(
+            file_type=AssetFile.PAIRED_DATA
+        )
+        assert asset_file.paired_data_fragments.count() == 2
+
+        # Move the previous build and the existing submissions back in time
+        one_hour_ago = timezone.now() - timedelta(hours=1)
+        instances = Instance.objects.filter(
+            xform_id=self.source_asset.deployment.xform_id
+        )
+        instances.update(date_modified=one_hour_ago)
+        asset_file.metadata['paired_data_watermark'] = one_hour_ago.isoformat()
+        asset_file.save(update_fields=['metadata'])
+        first_instance = instances.get(xml__contains='Paris')
+
+        submission = {
+            'group_restaurant/favourite_restaurant': 'Les Halles',
+            'city_name': 'Lyon',
+        }
+        self.source_asset.deployment.mock_submissions([submission])
+        Instance.objects.filter(pk=first_instance.pk).update(
+            xml=first_instance.xml.replace('Paris', 'Marseille'),
+            date_modified=timezone.now(),
+        )
+
+        with patch(
+            'kpi.utils.paired_data.strip_nodes', wraps=strip_nodes
+        ) as mock_strip_nodes:
+            regenerate_paired_data(self.destination_asset.uid, asset_file.uid)
+        assert mock_strip_nodes.call_count == 2
+
+        asset_file.refresh_from_db()
+        content = asset_file.content.read().decode()
+        assert 'Marseille' in content
+        assert 'Lyon' in content
+        assert 'Nice' in content
+        assert 'Paris' not in content
+
+        Instance.objects.filter(pk=submission['_id']).delete()
+        regenerate_paired_data(self.destination_asset.uid, asset_file.uid)
+        asset_file.refresh_from_db()
+        content = asset_file.content.read().decode()
+        assert 'Lyon' not in content
+        assert 'Marseille' in content
+        assert 'Nice' in content
+        assert asset_file.paired_data_fragments.count() == 2
+
     def _warm_up_asset_file(self):
         """
         Make the first `external.xml` call frozen in the past so that a
@@ -16,6 +16,7 @@ from ddt import data, ddt, unpack
 from django.conf import settings
 from django.core.files.base import ContentFile
 from django.db import connection
+from django.test import override_settings
 from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django_digest.test import Client as DigestClient
@@ -47,6 +48,8 @@ from kpi.constants import (
     PERM_VALIDATE_SUBMISSIONS,
     PERM_VIEW_ASSET,
     PERM_VIEW_SUBMISSIONS,
+    SUBMISSION_COUNT_STRATEGY_CAPPED,
+    SUBMISSION_COUNT_STRATEGY_COUNTER,
     SUBMISSION_FORMAT_TYPE_JSON,
     SUBMISSION_FORMAT_TYPE_XML,
 )
@@ -485,6 +488,7 @@ class BulkDeleteSubmissionsApiTests(
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 
+@ddt
 class SubmissionApiTests(SubmissionDeleteTestCaseMixin, BaseSubmissionTestCase):
 
     def setUp(self):
@@ -570,6 +574,29 @@ class SubmissionApiTests(SubmissionDeleteTestCaseMixin, BaseSubmissionTestCase):
         submissions_ids = [s['_id'] for s in self.submissions]
         self.assertEqual(sorted(response_ids), sorted(submissions_ids))
 
+    @data('json', 'xml')
+    def test_list_submissions_streaming(self, format_):
+        params = {'format': format_, 'limit': 5}
+        response = self.client.get(self.submission_list_url, params)
+        assert response.status_code == status.HTTP_200_OK
+
+        with override_settings(SUBMISSION_LIST_STREAMING=True):
+            streaming_response = self.client.get(self.submission_list_url, params)
+        assert streaming_response.status_code == status.HTTP_200_OK
+        assert streaming_response.streaming
+        assert streaming_response['Content-Type'] == response['Content-Type']
+        # Streaming must not change the output
+        assert b''.join(streaming_response.streaming_content) == response.content
+
+    @override_settings(SUBMISSION_LIST_STREAMING=True)
+    def test_list_submissions_with_cursor_not_streamed(self):
+        response = self.client.get(
+            self.submission_list_url, {'format': 'json', 'limit': 5, 'cursor': ''}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert not response.streaming
+        assert len(response.data['results']) == 5
+
     def test_list_submissions_as_owner_with_params(self):
         """
         someuser is the owner of the project.
@@ -636,6 +663,110 @@ class SubmissionApiTests(SubmissionDeleteTestCaseMixin, BaseSubmissionTestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), limit)
 
+    def test_list_submissions_with_cursor(self):
+        """
+        someuser is the owner of the project.
+        They can walk through their data with keyset pagination
+        """
+        submissions_ids = sorted(s['_id'] for s in self.submissions)
+        response = self.client.get(
+            self.submission_list_url, {'format': 'json', 'cursor': '', 'limit': 4}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        assert 'count' not in response.data
+        response_ids = [r['_id'] for r in response.data['results']]
+        assert response_ids == submissions_ids[:4]
+        assert 'cursor=' in response.data['next']
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response_ids = [r['_id'] for r in response.data['results']]
+        assert response_ids == submissions_ids[4:]
+        assert response.data['next'] is None
+
+    def test_list_submissions_with_cursor_sorted_desc(self):
+        submissions_ids = sorted(
+            (s['_id'] for s in self.submissions), reverse=True
+        )
+        response = self.client.get(
+            self.submission_list_url,
+            {
+                'format': 'json',
+                'cursor': '',
+                'limit': 5,
+                'sort': '{"_submission_time": -1}',
+                'fields': '["q1"]',
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response_ids = [r['_id'] for r in response.data['results']]
+        assert response_ids == submissions_ids[:5]
+
+        response = self.client.get(response.data['next'])
+        response_ids = [r['_id'] for r in response.data['results']]
+        assert response_ids == submissions_ids[5:]
+
+    @override_settings(
+        SUBMISSION_LIST_COUNT_STRATEGY=SUBMISSION_COUNT_STRATEGY_CAPPED,
+        SUBMISSION_COUNT_CAP=4,
+    )
+    def test_list_submissions_with_capped_count(self):
+        response = self.client.get(self.submission_list_url, {'format': 'json'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        assert response.data['count'] == '4+'
+        assert len(response.data['results']) == len(self.submissions)
+
+    @override_settings(
+        SUBMISSION_LIST_COUNT_STRATEGY=SUBMISSION_COUNT_STRATEGY_CAPPED,
+        SUBMISSION_COUNT_CAP=4,
+    )
+    def test_list_submissions_with_capped_count_pages_past_the_cap(self):
+        submission_ids = []
+        response = self.client.get(
+            self.submission_list_url, {'format': 'json', 'limit': 3}
+        )
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            assert response.data['count'] == '4+'
+            submission_ids.extend(r['_id'] for r in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        assert sorted(submission_ids) == sorted(
+            s['_id'] for s in self.submissions
+        )
+
+    @override_settings(
+        SUBMISSION_LIST_COUNT_STRATEGY=SUBMISSION_COUNT_STRATEGY_COUNTER
+    )
+    def test_list_submissions_with_counter_count(self):
+        xform = self.asset.deployment.xform
+        xform.refresh_from_db()
+        response = self.client.get(self.submission_list_url, {'format': 'json'})
+        assert response.data['count'] == xform.num_of_submissions
+
+        # Counters cannot be used with a query
+        response = self.client.get(
+            self.submission_list_url,
+            {'format': 'json', 'query': '{"_submitted_by": "someuser"}'},
+        )
+        assert response.data['count'] == len(
+            self.submissions_submitted_by_someuser
+        )
+
+    def test_list_submissions_with_invalid_cursor(self):
+        response = self.client.get(
+            self.submission_list_url, {'format': 'json', 'cursor': 'foo'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(
+            self.submission_list_url,
+            {'format': 'json', 'cursor': '', 'sort': '{"q1": 1}'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_list_submissions_not_shared_as_anotheruser(self):
         """
         someuser is the owner of the project.
@@ -11,7 +11,7 @@ from django.test import TestCase
 from model_bakery import baker
 
 from kpi.constants import ATTACHMENT_QUESTION_TYPES
-from kpi.models import Asset
+from kpi.models import Asset, AssetVersion
 from kpi.utils.sluggify import sluggify_label
 
 
@@ -961,3 +961,52 @@ class TestAssetContent(TestCase):
 
         # Confirm it was called twice, once for each version
         self.assertEqual(mock_get_xpaths_from_version.call_count, 2)
+
+    def test_version_formpack_schema_is_cached(self):
+        """
+        Test `get_version_formpack_schema()` builds the schema of a version only
+        once and returns copies that can be altered safely
+        """
+        version = self.asset.latest_deployed_version
+        with patch(
+            'kpi.models.asset.AssetVersion.to_formpack_schema',
+            autospec=True,
+            side_effect=AssetVersion.to_formpack_schema,
+        ) as mock_to_formpack_schema:
+            schema = self.asset.get_version_formpack_schema(version)
+            schema['content']['survey'] = []
+            cached_schema = self.asset.get_version_formpack_schema(version)
+
+        mock_to_formpack_schema.assert_called_once()
+        assert cached_schema == version.to_formpack_schema()
+        assert cached_schema['content']['survey'] != []
+
+    def test_version_formpack_schema_cache_follows_content_hash(self):
+        """
+        Test the cached schema of a version is not used anymore once its
+        content has been repaired in place
+        """
+        version = self.asset.latest_deployed_version
+        with patch(
+            'kpi.models.asset.AssetVersion.to_formpack_schema',
+            autospec=True,
+            side_effect=AssetVersion.to_formpack_schema,
+        ) as mock_to_formpack_schema:
+            self.asset.get_version_formpack_schema(version)
+            AssetVersion.objects.filter(pk=version.pk).update(
+                _content_hash='repaired'
+            )
+            version.refresh_from_db()
+            self.asset.get_version_formpack_schema(version)
+
+        assert mock_to_formpack_schema.call_count == 2
+
+    def test_get_deployed_version_is_memoized(self):
+        version_uid = self.asset.latest_deployed_version_uid
+        version = self.asset.get_deployed_version(version_uid)
+        assert version.uid == version_uid
+
+        with self.assertNumQueries(0):
+            assert self.asset.get_deployed_version(version_uid) is version
+
+        assert self.asset.get_deployed_version('vDoesNotExist') is None
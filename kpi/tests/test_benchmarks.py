@@ -0,0 +1,160 @@
+"""
+Benchmarks of the submission pipeline, from the submission itself to its
+exports and paired data, on synthetic forms and submissions of several sizes.
+
+Not executed by default, run them with:
+
+    pytest -m performance kpi/tests/test_benchmarks.py
+
+Each benchmark is compared with its query and MongoDB operation counts stored
+in `kpi/tests/benchmark_baseline.json`, and fails if they are missing. Set
+`UPDATE_BENCHMARK_BASELINE=1` to record the results of the run as the new
+baseline instead.
+"""
+from collections import defaultdict
+
+import pytest
+from ddt import data, ddt, unpack
+from django.conf import settings
+from django.urls import reverse
+from rest_framework import status
+
+from kobo.apps.kobo_auth.shortcuts import User
+from kpi.constants import PERM_VIEW_SUBMISSIONS
+from kpi.models import Asset, AssetFile, SubmissionExportTask
+from kpi.models.paired_data import PairedData
+from kpi.tests.base_test_case import BaseTestCase
+from kpi.tests.utils.benchmark import (
+    assert_within_baseline,
+    get_synthetic_form,
+    get_synthetic_submissions,
+    measure,
+)
+from kpi.utils.mongo_helper import drop_mock_only
+from kpi.utils.paired_data import build_and_save_paired_data_xml
+
+# (number of submissions, number of questions)
+SCALES = [
+    (10, 10),
+    (100, 50),
+    (500, 100),
+]
+
+
+@ddt
+@pytest.mark.performance
+class SubmissionPipelineBenchmarkTestCase(BaseTestCase):
+
+    fixtures = ['test_data']
+
+    @drop_mock_only
+    def setUp(self):
+        settings.MONGO_DB.instances.drop()
+        self.someuser = User.objects.get(username='someuser')
+        self.anotheruser = User.objects.get(username='anotheruser')
+
+    @data(*SCALES)
+    @unpack
+    def test_create_instance(self, submission_count, question_count):
+        asset = self._create_deployed_asset(question_count)
+        submissions = get_synthetic_submissions(question_count, submission_count)
+
+        with measure(
+            self._get_name('create_instance', submission_count, question_count)
+        ) as result:
+            asset.deployment.mock_submissions(submissions)
+
+        assert asset.deployment.submission_count == submission_count
+        assert_within_baseline(result)
+
+    @data(*SCALES)
+    @unpack
+    def test_list_submissions(self, submission_count, question_count):
+        asset = self._create_deployed_asset(question_count, submission_count)
+        url = reverse(
+            self._get_endpoint('submission-list'),
+            kwargs={'uid_asset': asset.uid, 'format': 'json'},
+        )
+        self.client.force_login(self.someuser)
+
+        with measure(
+            self._get_name('list_submissions', submission_count, question_count)
+        ) as result:
+            response = self.client.get(url, {'limit': settings.MAX_API_PAGE_SIZE})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == submission_count
+        assert_within_baseline(result)
+
+    @data(*SCALES)
+    @unpack
+    def test_export(self, submission_count, question_count):
+        asset = self._create_deployed_asset(question_count, submission_count)
+        export_task = SubmissionExportTask()
+        export_task.user = self.someuser
+        export_task.data = {
+            'source': reverse('api_v2:asset-detail', args=[asset.uid]),
+            'type': 'csv',
+        }
+        messages = defaultdict(list)
+
+        with measure(
+            self._get_name('export', submission_count, question_count)
+        ) as result:
+            export_task._run_task(messages)
+
+        assert not messages
+        assert_within_baseline(result)
+
+    @data(*SCALES)
+    @unpack
+    def test_paired_data(self, submission_count, question_count):
+        source_asset = self._create_deployed_asset(question_count, submission_count)
+        source_asset.data_sharing = {'enabled': True, 'fields': []}
+        source_asset.save()
+        source_asset.assign_perm(self.anotheruser, PERM_VIEW_SUBMISSIONS)
+        destination_asset = Asset.objects.create(
+            owner=self.anotheruser,
+            asset_type='survey',
+            content=get_synthetic_form(1),
+        )
+        destination_asset.deploy(backend='mock', active=True)
+        paired_data = PairedData(
+            source_asset, 'paired_data.xml', [], destination_asset
+        )
+        paired_data.save()
+        asset_file = AssetFile(
+            uid=paired_data.paired_data_uid,
+            asset=destination_asset,
+            file_type=AssetFile.PAIRED_DATA,
+            user=self.anotheruser,
+        )
+
+        with measure(
+            self._get_name('paired_data', submission_count, question_count)
+        ) as result:
+            build_and_save_paired_data_xml(
+                destination_asset, asset_file, paired_data, source_asset
+            )
+
+        assert asset_file.paired_data_fragments.count() == submission_count
+        assert_within_baseline(result)
+
+    def _create_deployed_asset(
+        self, question_count: int, submission_count: int = 0
+    ) -> Asset:
+        asset = Asset.objects.create(
+            owner=self.someuser,
+            asset_type='survey',
+            content=get_synthetic_form(question_count),
+        )
+        asset.deploy(backend='mock', active=True)
+        if submission_count:
+            asset.deployment.mock_submissions(
+                get_synthetic_submissions(question_count, submission_count)
+            )
+        return asset
+
+    @staticmethod
+    def _get_name(stage: str, submission_count: int, question_count: int) -> str:
+        return f'{stage}[{submission_count}x{question_count}]'
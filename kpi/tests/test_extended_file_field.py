@@ -122,3 +122,38 @@ class ExtendedFileFieldTestCase(TestCase):
             path = f'someuser/asset_files/{asset.uid}/form_media/foo.txt'
             if default_storage.exists(path):
                 default_storage.delete(path)
+
+    def test_move_files_concurrently(self):
+        # `upload_to` is shared by all files of the field; moving them from
+        # several threads must not mix up their target folders.
+        from concurrent.futures import ThreadPoolExecutor
+
+        asset = Asset.objects.get(pk=1)
+        asset_files = []
+        for index in range(8):
+            asset_file = AssetFile(
+                asset=asset, user=asset.owner, file_type=AssetFile.FORM_MEDIA
+            )
+            asset_file.content = ContentFile(b'foo', name=f'foo{index}.txt')
+            asset_file.save()
+            asset_files.append(asset_file)
+
+        try:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                moved = list(
+                    executor.map(
+                        lambda item: item[1].content.move(
+                            f'__pytest_moved/{item[0]}'
+                        ),
+                        enumerate(asset_files),
+                    )
+                )
+            assert all(moved)
+            for index, asset_file in enumerate(asset_files):
+                new_path = f'__pytest_moved/{index}/foo{index}.txt'
+                assert asset_file.content.name == new_path
+                assert default_storage.exists(new_path)
+        finally:
+            for asset_file in asset_files:
+                if default_storage.exists(asset_file.content.name):
+                    default_storage.delete(asset_file.content.name)
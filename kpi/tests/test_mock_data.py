@@ -2,12 +2,17 @@ from collections import OrderedDict
 from copy import deepcopy
 from unittest.mock import patch
 
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from formpack import FormPack
 
 from kobo.apps.kobo_auth.shortcuts import User
-from kobo.apps.reports import report_data
+from kobo.apps.openrosa.apps.logger.models import Instance
+from kobo.apps.openrosa.apps.viewer.models.parsed_instance import ParsedInstance
+from kobo.apps.reports import report_data, report_stats
+from kobo.apps.reports.constants import REPORT_STATS_CACHE_KEY
 from kpi.models import Asset
+from kpi.utils.mongo_helper import MongoHelper
 
 F1 = {
     'survey': [
@@ -459,6 +464,80 @@ class MockDataReports(BaseSubmissionTestCase):
             },
         )
 
+    def test_kobo_apps_reports_report_data_aggregated(self):
+        field_names = ['Select_one', 'Select_Many', 'Text', 'Number', 'Decimal']
+        expected = report_data.data_by_identifiers(
+            self.asset, field_names=field_names, submission_stream=self.submissions
+        )
+        with patch(
+            'kobo.apps.reports.report_stats._aggregate',
+            wraps=report_stats._aggregate,
+        ) as patched_aggregate:
+            values = report_data.data_by_identifiers(
+                self.asset, field_names=field_names, user=self.user
+            )
+        assert values == expected
+        patched_aggregate.assert_called_once()
+
+    def test_kobo_apps_reports_report_data_aggregated_incrementally(self):
+        field_names = ['Select_one', 'Number']
+        report_data.data_by_identifiers(
+            self.asset, field_names=field_names, user=self.user
+        )
+        submission = {
+            key: SUBMISSION_DATA[key][0] for key in SUBMISSION_DATA
+        }
+        submission['__version__'] = self.asset.latest_deployed_version.uid
+        self.asset.deployment.mock_submissions([submission])
+
+        with patch(
+            'kobo.apps.reports.report_stats._aggregate',
+            wraps=report_stats._aggregate,
+        ) as patched_aggregate:
+            values = report_data.data_by_identifiers(
+                self.asset, field_names=field_names, user=self.user
+            )
+        # Only the new submission is counted
+        query = patched_aggregate.call_args.args[0]
+        assert query['_id']['$gt'] == max(s['_id'] for s in self.submissions)
+
+        expected = report_data.data_by_identifiers(
+            self.asset,
+            field_names=field_names,
+            submission_stream=self.asset.deployment.get_submissions(self.user),
+        )
+        assert values == expected
+        assert values[0]['data']['frequencies'] == (4, 1)
+
+    def test_kobo_apps_reports_report_stats_cache_is_invalidated(self):
+        field_names = ['Select_one', 'Number']
+        cache_key = REPORT_STATS_CACHE_KEY.format(
+            mongo_userform_id=self.asset.deployment.mongo_userform_id
+        )
+        report_data.data_by_identifiers(
+            self.asset, field_names=field_names, user=self.user
+        )
+        assert cache.get(cache_key) is not None
+
+        # Rebuilding the MongoDB documents may change them
+        ParsedInstance.bulk_update_mongo(
+            Instance.objects.filter(xform_id=self.asset.deployment.xform_id)
+        )
+        assert cache.get(cache_key) is None
+
+        report_data.data_by_identifiers(
+            self.asset, field_names=field_names, user=self.user
+        )
+        assert cache.get(cache_key) is not None
+
+        MongoHelper.delete_many(
+            {
+                MongoHelper.USERFORM_ID: self.asset.deployment.mongo_userform_id,
+                '_id': self.submissions[0]['_id'],
+            }
+        )
+        assert cache.get(cache_key) is None
+
     def test_has_report_styles(self):
         self.assertTrue(self.asset.report_styles is not None)
 
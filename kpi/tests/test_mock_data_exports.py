@@ -1,14 +1,16 @@
 # flake8: noqa: F401
 import datetime
 import os
+import shutil
 import zipfile
 from collections import defaultdict
+from copy import deepcopy
 from unittest import mock
 from zoneinfo import ZoneInfo
 
 import openpyxl
 from django.conf import settings
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from kobo.apps.kobo_auth.shortcuts import User
@@ -473,6 +475,33 @@ class MockDataExports(MockDataExportsBase):
                 ]
                 assert result_row == expected_row
 
+    def test_build_formpack_uses_compiled_formpack_cache(self):
+        with mock.patch.object(
+            Asset, 'get_version_formpack_schema'
+        ) as patched_get_schema:
+            pack, _ = report_data.build_formpack(self.asset)
+        # Already compiled in `setUp()`
+        patched_get_schema.assert_not_called()
+        # Callers are free to alter the pack they receive
+        assert pack is not self.formpack
+        assert list(pack.versions.keys()) == list(self.formpack.versions.keys())
+
+        # The title of the pack is the name of the asset
+        self.asset.name = 'Renamed'
+        pack, _ = report_data.build_formpack(self.asset)
+        assert pack.title == 'Renamed'
+
+        # Versions repaired in place are compiled again
+        self.asset.deployed_versions.update(_content_hash='repaired')
+        with mock.patch.object(
+            Asset,
+            'get_version_formpack_schema',
+            autospec=True,
+            side_effect=Asset.get_version_formpack_schema,
+        ) as patched_get_schema:
+            report_data.build_formpack(self.asset)
+        patched_get_schema.assert_called()
+
     def test_csv_export_default_options(self):
         submissions = self.forms[self.form_names[0]]['submissions']
         version_uid = self.asset.latest_deployed_version.uid
@@ -587,6 +616,130 @@ class MockDataExports(MockDataExportsBase):
         ]
         self.run_csv_export_test(expected_lines, export_options)
 
+    def test_csv_export_incremental(self):
+        export_data = {
+            'source': reverse('api_v2:asset-detail', args=[self.asset.uid]),
+            'type': 'csv',
+            'fields': ['start', 'end', '_index'],
+        }
+        base_export = SubmissionExportTask(
+            user=self.user, data={**export_data, 'incremental': True}
+        )
+        base_export._run_task(defaultdict(list))
+        base_export.status = ImportExportStatusChoices.COMPLETE
+        base_export.save()
+        base_lines = list(base_export.result)
+        assert len(base_lines) == 4
+
+        new_uuid = '7de5ae82-07dc-4d46-a2b1-4c8d4c0e4e8f'
+        new_submission = deepcopy(self.forms[self.form_names[0]]['submissions'][0])
+        del new_submission['_id']
+        new_submission.update(
+            {
+                '_uuid': new_uuid,
+                'meta/instanceID': f'uuid:{new_uuid}',
+                'meta/rootUuid': f'uuid:{new_uuid}',
+                'start': '2017-10-24T05:40:39.000-04:00',
+            }
+        )
+        self.asset.deployment.mock_submissions([new_submission])
+
+        export_task = SubmissionExportTask(
+            user=self.user, data={**export_data, 'incremental': True}
+        )
+        with mock.patch.object(
+            export_task,
+            'get_export_object',
+            wraps=export_task.get_export_object,
+        ) as mock_get_export_object:
+            export_task._run_task(defaultdict(list))
+
+        # Only submissions received since the previous export are retrieved
+        mock_get_export_object.assert_called_once_with(
+            after_submission_id=base_export.data['incremental_watermark'][
+                'submission_id'
+            ]
+        )
+        assert list(export_task.result) == base_lines + [
+            (
+                '"2017-10-24T05:40:39.000-04:00";"2017-10-23T05:41:13.000-04:00";'
+                f'"{new_uuid}";"uuid:{new_uuid}";"4"\r\n'
+            ).encode()
+        ]
+        assert export_task.data['incremental_watermark'] == {
+            'submission_id': new_submission['_id'],
+            'row_count': 4,
+        }
+
+    def test_csv_export_incremental_after_deletion(self):
+        export_data = {
+            'source': reverse('api_v2:asset-detail', args=[self.asset.uid]),
+            'type': 'csv',
+            'fields': ['start', 'end', '_index'],
+        }
+        base_export = SubmissionExportTask(
+            user=self.user, data={**export_data, 'incremental': True}
+        )
+        base_export._run_task(defaultdict(list))
+        base_export.status = ImportExportStatusChoices.COMPLETE
+        base_export.save()
+        base_lines = list(base_export.result)
+
+        submission_id = self.forms[self.form_names[0]]['submissions'][0]['_id']
+        self.asset.deployment.delete_submission(submission_id, self.asset.owner)
+
+        # A submission of the previous export is gone, all remaining
+        # submissions must be exported again
+        export_task = SubmissionExportTask(
+            user=self.user, data={**export_data, 'incremental': True}
+        )
+        with mock.patch.object(
+            export_task,
+            'get_export_object',
+            wraps=export_task.get_export_object,
+        ) as mock_get_export_object:
+            export_task._run_task(defaultdict(list))
+
+        assert mock_get_export_object.call_args_list[-1] == mock.call()
+        lines = list(export_task.result)
+        assert lines[0] == base_lines[0]
+        assert len(lines) == len(base_lines) - 1
+        assert lines[-1].endswith(f'"{len(lines) - 1}"\r\n'.encode())
+
+    def test_shift_csv_index_keeps_formpack_line(self):
+        line = '"a;b";"say ""hi""";"3";"x"'
+        assert (
+            SubmissionExportTask._shift_csv_index(line, 1, 10)
+            == '"a;b";"say ""hi""";"13";"x"'
+        )
+        assert SubmissionExportTask._shift_csv_index('"1"', 0, 2) == '"3"'
+
+    def test_csv_export_incremental_without_matching_export(self):
+        export_data = {
+            'source': reverse('api_v2:asset-detail', args=[self.asset.uid]),
+            'type': 'csv',
+        }
+        base_export = SubmissionExportTask(
+            user=self.user, data={**export_data, 'lang': '_xml'}
+        )
+        base_export._run_task(defaultdict(list))
+        base_export.status = ImportExportStatusChoices.COMPLETE
+        base_export.save()
+
+        # Settings differ, all submissions must be exported again
+        export_task = SubmissionExportTask(
+            user=self.user, data={**export_data, 'incremental': True}
+        )
+        with mock.patch.object(
+            export_task,
+            'get_export_object',
+            wraps=export_task.get_export_object,
+        ) as mock_get_export_object:
+            export_task._run_task(defaultdict(list))
+
+        mock_get_export_object.assert_called_once_with()
+        assert len(list(export_task.result)) == 5
+
     def test_xls_export_english_labels(self):
         submissions = self.forms[self.form_names[0]]['submissions']
         version_uid = self.asset.latest_deployed_version_uid
@@ -1401,6 +1554,31 @@ class MockDataExports(MockDataExportsBase):
         }
         self.run_xls_export_test(expected_data, asset=asset, repeat_group=True)
 
+    def test_xls_export_is_written_by_chunks(self):
+        export_task = SubmissionExportTask()
+        export_task.user = self.user
+        export_task.data = {
+            'source': reverse('api_v2:asset-detail', args=[self.asset.uid]),
+            'type': 'xls',
+        }
+        messages = defaultdict(list)
+        with (
+            override_settings(EXPORT_UPLOAD_CHUNK_SIZE=1024),
+            mock.patch(
+                'kpi.models.import_export_task.shutil.copyfileobj',
+                wraps=shutil.copyfileobj,
+            ) as mock_copyfileobj,
+        ):
+            export_task._run_task(messages)
+
+        assert not messages
+        mock_copyfileobj.assert_called_once()
+        assert mock_copyfileobj.call_args.args[2] == 1024
+        # The workbook spans several chunks and must still be readable
+        assert export_task.result.size > 1024
+        book = openpyxl.load_workbook(export_task.result)
+        assert len(book.sheetnames) == 1
+
     def test_export_spss_labels(self):
         export_task = SubmissionExportTask()
         export_task.user = self.user
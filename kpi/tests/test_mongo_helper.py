@@ -3,9 +3,14 @@ from __future__ import annotations
 import copy
 
 from django.conf import settings
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from model_bakery import baker
 
+from kpi.constants import (
+    SUBMISSION_COUNT_STRATEGY_CACHED,
+    SUBMISSION_COUNT_STRATEGY_CAPPED,
+)
 from kpi.tests.utils import baker_generators  # noqa
 from kpi.utils.mongo_helper import MongoHelper
 
@@ -150,3 +155,72 @@ class MongoHelperTestCase(TestCase):
             ),
             1,
         )
+
+    @override_settings(SUBMISSION_COUNT_CAP=2)
+    def test_get_instances_with_capped_count(self):
+        asset = baker.make('kpi.Asset', owner=baker.make(settings.AUTH_USER_MODEL))
+        asset.deploy(backend='mock', active=True)
+        userform_id = asset.deployment.mongo_userform_id
+        self.add_submissions(asset, [{'q1': 'a1'}, {'q1': 'a2'}])
+
+        self.assert_instances_count(
+            MongoHelper.get_instances(
+                userform_id, count_strategy=SUBMISSION_COUNT_STRATEGY_CAPPED
+            ),
+            2,
+        )
+
+        self.add_submissions(asset, [{'q1': 'a3'}, {'q1': 'a4'}])
+        # Count stops right after the cap
+        self.assert_instances_count(
+            MongoHelper.get_instances(
+                userform_id, count_strategy=SUBMISSION_COUNT_STRATEGY_CAPPED
+            ),
+            3,
+        )
+
+    def test_get_instances_with_cached_count(self):
+        asset = baker.make('kpi.Asset', owner=baker.make(settings.AUTH_USER_MODEL))
+        asset.deploy(backend='mock', active=True)
+        userform_id = asset.deployment.mongo_userform_id
+        self.add_submissions(asset, [{'q1': 'a1'}])
+        cache.clear()
+
+        self.assert_instances_count(
+            MongoHelper.get_instances(
+                userform_id, count_strategy=SUBMISSION_COUNT_STRATEGY_CACHED
+            ),
+            1,
+        )
+        self.add_submissions(asset, [{'q1': 'a2'}])
+        # Count comes from the cache...
+        self.assert_instances_count(
+            MongoHelper.get_instances(
+                userform_id, count_strategy=SUBMISSION_COUNT_STRATEGY_CACHED
+            ),
+            1,
+        )
+        # ...unless the query is different
+        self.assert_instances_count(
+            MongoHelper.get_instances(
+                userform_id,
+                query={'q1': 'a2'},
+                count_strategy=SUBMISSION_COUNT_STRATEGY_CACHED,
+            ),
+            1,
+        )
+        self.assert_instances_count(MongoHelper.get_instances(userform_id), 2)
+
+    def test_get_keyset_query(self):
+        assert MongoHelper.get_keyset_query({'_id': 1}, {'_id': 10}) == {
+            '_id': {'$gt': 10}
+        }
+        assert MongoHelper.get_keyset_query(
+            {'_submission_time': -1, '_id': -1},
+            {'_submission_time': '2025-01-01T00:00:00', '_id': 10},
+        ) == {
+            '$or': [
+                {'_submission_time': {'$lt': '2025-01-01T00:00:00'}},
+                {'_submission_time': '2025-01-01T00:00:00', '_id': {'$lt': 10}},
+            ]
+        }
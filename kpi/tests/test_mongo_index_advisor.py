@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django_redis import get_redis_connection
+
+from kpi.utils.mongo_helper import MongoHelper
+from kpi.utils.mongo_index_advisor import (
+    MANAGED_INDEXES,
+    QUERY_SHAPES_KEY,
+    get_query_shape,
+    get_sampled_query_shapes,
+    is_shape_indexed,
+    sample_query_shape,
+    sync_managed_indexes,
+)
+
+
+class MongoIndexAdvisorTestCase(TestCase):
+
+    def setUp(self):
+        settings.MONGO_DB.instances.drop()
+        get_redis_connection('default').delete(QUERY_SHAPES_KEY)
+
+    def test_get_query_shape(self):
+        shape = get_query_shape(
+            {
+                '_userform_id': 'someuser_abc',
+                '_submission_time': {'$gte': '2025-01-01'},
+                '_validation_status.uid': {'$in': ['validation_status_approved']},
+                'q1': {'$regex': 'foo'},
+                '$or': [{'_submitted_by': 'someuser'}, {'_submitted_by': None}],
+            },
+            {'_submission_time': -1},
+        )
+        assert shape == {
+            'equality': ['_userform_id', '_validation_status.uid'],
+            'range': ['_submission_time'],
+            'other': ['_submitted_by', 'q1'],
+            'sort': [['_submission_time', -1]],
+        }
+
+    def test_is_shape_indexed(self):
+        index_keys = MANAGED_INDEXES['kpi_userform_id_submission_time']
+        query = {'_userform_id': 'someuser_abc'}
+
+        # The index can be walked backwards
+        for direction in (1, -1):
+            shape = get_query_shape(query, {'_submission_time': direction})
+            assert is_shape_indexed(shape, index_keys)
+
+        shape = get_query_shape(query, {'_submitted_by': 1})
+        assert not is_shape_indexed(shape, index_keys)
+
+        # `_userform_id` must come first
+        shape = get_query_shape({'_submission_time': {'$gte': '2025-01-01'}})
+        assert not is_shape_indexed(shape, index_keys)
+
+    @override_settings(
+        MONGO_QUERY_SHAPES_SAMPLE_RATE=1, MONGO_QUERY_SHAPES_MAX_SAMPLES=3
+    )
+    def test_query_shapes_are_sampled(self):
+        for _ in range(2):
+            MongoHelper.get_instances('someuser_abc', sort={'_id': 1}, skip_count=True)
+        MongoHelper.get_instances(
+            'someuser_abc', query={'q1': 'a1'}, skip_count=True
+        )
+        MongoHelper.get_instances(
+            'someuser_abc', query={'q1': 'a2'}, skip_count=True
+        )
+
+        # Only the 3 most recent samples are kept
+        shapes = get_sampled_query_shapes()
+        assert [count for count, _ in shapes] == [2, 1]
+        _, sample = shapes[0]
+        assert sample['shape']['equality'] == ['_userform_id', 'q1']
+        # Values are redacted, except the form id
+        assert sample['query'] == {'q1': '', '_userform_id': 'someuser_abc'}
+
+    @override_settings(MONGO_QUERY_SHAPES_SAMPLE_RATE=1)
+    def test_malformed_queries_are_not_sampled(self):
+        sample_query_shape({'$or': {'q1': 'a1'}})
+        sample_query_shape({'q1': 'a1'}, {'_submission_time': 'asc'})
+        assert get_sampled_query_shapes() == []
+
+    def test_sync_managed_indexes(self):
+        settings.MONGO_DB.instances.create_index(
+            [('_userform_id', 1), ('q1', 1)], name='kpi_obsolete'
+        )
+        created, dropped = sync_managed_indexes(drop=True)
+        assert sorted(created) == sorted(MANAGED_INDEXES)
+        assert dropped == ['kpi_obsolete']
+
+        created, dropped = sync_managed_indexes(drop=True)
+        assert created == dropped == []
@@ -19,6 +19,7 @@ from kpi.constants import (
     PERM_VIEW_SUBMISSIONS,
 )
 from kpi.exceptions import BadPermissionsException
+from kpi.mixins.object_permission import PermissionMatrix
 from kpi.permissions import AssetSnapshotPermission
 from kpi.utils.object_permission import get_all_objects_for_user
 
@@ -491,6 +492,39 @@ class PermissionsTestCase(BasePermissionsTestCase):
         self.assertListEqual(
             sorted(asset.get_perms(grantee)), submission_editor_permissions)
 
+    def test_permission_matrix(self):
+        """
+        `PermissionMatrix` must agree with `has_perm()` and `get_perms()`
+        without hitting the database once built
+        """
+        someuser_asset = Asset.objects.create(
+            owner=self.someuser, asset_type=ASSET_TYPE_SURVEY
+        )
+        self.admin_collection.children.add(self.admin_asset)
+        self.admin_collection.assign_perm(self.someuser, PERM_CHANGE_ASSET)
+        # Denies all child permissions to `someuser`
+        self.admin_asset.remove_perm(self.someuser, PERM_VIEW_ASSET)
+        self.admin_asset.assign_perm(self.anotheruser, PERM_VIEW_SUBMISSIONS)
+        someuser_asset.assign_perm(AnonymousUser(), PERM_VIEW_ASSET)
+
+        assets = [self.admin_asset, self.admin_collection, someuser_asset]
+        users = [self.admin, self.someuser, self.anotheruser]
+        perms = self.asset_owner_permissions + [PERM_DISCOVER_ASSET]
+        matrix = PermissionMatrix(assets, users)
+
+        for asset in assets:
+            for user in users:
+                self.assertListEqual(
+                    sorted(matrix.get_perms(user, asset)),
+                    sorted(asset.get_perms(user)),
+                )
+            for user in users + [AnonymousUser()]:
+                for perm in perms:
+                    expected = asset.has_perm(user, perm)
+                    with self.assertNumQueries(0):
+                        result = matrix.has_perm(user, asset, perm)
+                    self.assertEqual(result, expected, msg=(asset, user, perm))
+
     def test_get_objects_for_user(self):
         admin_assets = get_all_objects_for_user(self.admin, Asset)
         admin_collections = get_all_objects_for_user(
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from kobo.apps.kobo_auth.shortcuts import User
+from kpi.utils.request_metrics import (
+    MongoCommandMetricsListener,
+    collect_metrics,
+    get_current_metrics,
+)
+
+
+class RequestMetricsTestCase(TestCase):
+
+    fixtures = ['test_data']
+
+    def test_collect_metrics_counts_queries(self):
+        with collect_metrics('test') as metrics:
+            list(User.objects.all())
+            User.objects.filter(username='someuser').exists()
+
+        assert metrics.db_queries['default'] == 2
+        assert metrics.db_duration['default'] > 0
+        assert get_current_metrics() is None
+
+    def test_collect_metrics_does_not_nest(self):
+        with (
+            collect_metrics('outer') as outer_metrics,
+            collect_metrics('inner', kind='task') as inner_metrics,
+        ):
+            list(User.objects.all())
+
+        assert inner_metrics is outer_metrics
+        assert outer_metrics.db_queries['default'] == 1
+
+    def test_mongo_listener_records_commands(self):
+        listener = MongoCommandMetricsListener()
+        with collect_metrics('test') as metrics:
+            listener.succeeded(SimpleNamespace(duration_micros=1500))
+            listener.failed(SimpleNamespace(duration_micros=500))
+
+        # Commands outside of a request or a task are ignored
+        listener.succeeded(SimpleNamespace(duration_micros=1500))
+
+        assert metrics.mongo_commands == 2
+        assert metrics.mongo_duration == pytest.approx(0.002)
+        assert 'mongo;dur=2.0;desc="2 commands"' in metrics.get_server_timing()
+
+    def test_cache_reads(self):
+        cache.set('request_metrics_test', 'foo')
+        with collect_metrics('test') as metrics:
+            assert cache.get('request_metrics_test') == 'foo'
+            assert cache.get('request_metrics_test_missing', 'bar') == 'bar'
+            cache.get_many(['request_metrics_test', 'request_metrics_test_missing'])
+
+        assert metrics.cache_hits == 2
+        assert metrics.cache_misses == 2
+
+    def test_server_timing_header(self):
+        self.client.login(username='adminuser', password='pass')
+        response = self.client.get(reverse('api_v2:asset-list'))
+        server_timing = response['Server-Timing']
+        assert 'db-default;dur=' in server_timing
+        assert 'render;dur=' in server_timing
+        assert 'total;dur=' in server_timing
+
+    def test_server_timing_header_for_superusers_only(self):
+        response = self.client.get(reverse('api_v2:asset-list'))
+        assert 'Server-Timing' not in response
+
+        self.client.login(username='someuser', password='someuser')
+        response = self.client.get(reverse('api_v2:asset-list'))
+        assert 'Server-Timing' not in response
+
+        with override_settings(REQUEST_METRICS_SERVER_TIMING=True):
+            response = self.client.get(reverse('api_v2:asset-list'))
+        assert 'total;dur=' in response['Server-Timing']
+
+    @override_settings(ENABLE_REQUEST_METRICS=False)
+    def test_server_timing_header_disabled(self):
+        self.client.login(username='someuser', password='someuser')
+        response = self.client.get(reverse('api_v2:asset-list'))
+        assert 'Server-Timing' not in response
@@ -14,6 +14,8 @@ from model_bakery import baker
 
 from kobo.apps.kobo_auth.shortcuts import User
 from kobo.apps.organizations.constants import UsageType, USAGE_TYPES_WITH_COUNTERS
+from kobo.apps.openrosa.apps.logger.models import SubmissionCounterDelta
+from kobo.apps.openrosa.apps.logger.tasks import flush_submission_counter_deltas
 from kobo.apps.organizations.models import Organization
 from kobo.apps.trackers.models import NLPUsageCounter
 from kpi.models import Asset
@@ -23,6 +25,7 @@ from kpi.utils.usage_calculator import (
     ServiceUsageCalculator,
     get_nlp_usage_for_current_billing_period_by_user_id,
     get_storage_usage_by_user_id,
+    get_submission_counts_in_date_range_by_user_id,
     get_submissions_for_current_billing_period_by_user_id,
 )
 
@@ -348,6 +351,32 @@ class ServiceUsageCalculatorTestCase(BaseServiceUsageTestCase):
         assert submission_counters['current_period'] == 5
         assert submission_counters['all_time'] == 5
 
+    def test_submission_counters_include_pending_deltas(self):
+        with override_settings(SUBMISSION_COUNTERS_WRITE_BEHIND=True):
+            self.add_submissions(count=2)
+            assert SubmissionCounterDelta.objects.filter(
+                user=self.anotheruser
+            ).exists()
+
+            calculator = ServiceUsageCalculator(
+                self.anotheruser, disable_cache=True
+            )
+            submission_counters = calculator.get_submission_counters()
+            assert submission_counters['current_period'] == 7
+            assert submission_counters['all_time'] == 7
+
+            today = timezone.now().date()
+            submissions_by_user = get_submission_counts_in_date_range_by_user_id(
+                {self.anotheruser.id: {'start': today, 'end': today}}
+            )
+            assert submissions_by_user[self.anotheruser.id] == 7
+
+            flush_submission_counter_deltas()
+
+            submission_counters = calculator.get_submission_counters()
+            assert submission_counters['current_period'] == 7
+            assert submission_counters['all_time'] == 7
+
     @pytest.mark.skipif(
         not settings.STRIPE_ENABLED, reason='Requires stripe functionality'
     )
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import wraps
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+BASELINE_PATH = os.path.join(
+    settings.BASE_DIR, 'kpi', 'tests', 'benchmark_baseline.json'
+)
+
+# Set this environment variable to record the results of the run as the new
+# baseline instead of comparing them with the current one
+UPDATE_BASELINE_ENV_VAR = 'UPDATE_BENCHMARK_BASELINE'
+
+# Only the metrics which do not vary from one run (or one machine) to another
+# are stored in the baseline. Wall time and peak memory are not compared.
+BASELINE_FIELDS = ('queries', 'mongo_operations')
+
+MONGO_OPERATIONS = [
+    'aggregate',
+    'count_documents',
+    'delete_many',
+    'delete_one',
+    'find',
+    'find_one',
+    'insert_many',
+    'insert_one',
+    'replace_one',
+    'update_many',
+    'update_one',
+]
+
+CHOICES = ['yes', 'no', 'maybe']
+
+
+@dataclass
+class BenchmarkResult:
+
+    name: str
+    wall_time: float = 0
+    peak_memory: int = 0
+    queries: dict[str, int] = field(default_factory=dict)
+    mongo_operations: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def mongo_operation_count(self) -> int:
+        return sum(self.mongo_operations.values())
+
+
+def assert_within_baseline(result: BenchmarkResult):
+    """
+    Compare `result` with the baseline stored under its name.
+
+    Query and MongoDB operation counts must not exceed the baseline. The test
+    fails if there is no baseline to compare with.
+
+    If `UPDATE_BENCHMARK_BASELINE` is set, `result` replaces the baseline
+    instead.
+    """
+    with open(BASELINE_PATH) as f:
+        baselines = json.load(f)
+
+    if os.environ.get(UPDATE_BASELINE_ENV_VAR):
+        baselines[result.name] = {
+            field_: getattr(result, field_) for field_ in BASELINE_FIELDS
+        }
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        return
+
+    try:
+        baseline = BenchmarkResult(name=result.name, **baselines[result.name])
+    except KeyError:
+        pytest.fail(
+            f'No baseline for `{result.name}`. Run the benchmarks with '
+            f'`{UPDATE_BASELINE_ENV_VAR}=1` to record it'
+        )
+
+    for alias, count in result.queries.items():
+        assert count <= baseline.queries.get(alias, 0), (
+            f'{result.name}: {count} queries on `{alias}`, '
+            f'baseline is {baseline.queries.get(alias, 0)}'
+        )
+    assert result.mongo_operation_count <= baseline.mongo_operation_count, (
+        f'{result.name}: {result.mongo_operations} MongoDB operations, '
+        f'baseline is {baseline.mongo_operations}'
+    )
+
+
+def get_synthetic_form(question_count: int) -> dict:
+    """
+    Return the content of a form with `question_count` questions, half of
+    them inside a group, cycling through the most common question types.
+    """
+    question_types = ['text', 'integer', 'select_one choices', 'date']
+    survey = []
+    for index in range(question_count):
+        if index == question_count // 2:
+            survey.append({'type': 'begin_group', 'name': 'group', 'label': 'Group'})
+        survey.append(
+            {
+                'type': question_types[index % len(question_types)],
+                'name': f'q{index}',
+                'label': f'Question {index}',
+            }
+        )
+    survey.append({'type': 'end_group'})
+
+    return {
+        'survey': survey,
+        'choices': [
+            {'list_name': 'choices', 'name': choice, 'label': choice.capitalize()}
+            for choice in CHOICES
+        ],
+        'settings': {},
+    }
+
+
+def get_synthetic_submissions(
+    question_count: int, submission_count: int, seed: int = 0
+) -> list[dict]:
+    """
+    Return `submission_count` submissions to the form returned by
+    `get_synthetic_form(question_count)`.
+
+    Values are random but, for a given `seed`, always the same ones.
+    """
+    random_ = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=ZoneInfo('UTC'))
+    submissions = []
+    for index in range(submission_count):
+        submission = {
+            '_submission_time': (start + timedelta(minutes=index)).isoformat(),
+        }
+        for question_index in range(question_count):
+            path = (
+                f'group/q{question_index}'
+                if question_index >= question_count // 2
+                else f'q{question_index}'
+            )
+            question_type = question_index % 4
+            if question_type == 0:
+                value = ''.join(
+                    random_.choices('abcdefghijklmnopqrstuvwxyz ', k=20)
+                ).strip()
+            elif question_type == 1:
+                value = random_.randint(0, 10000)
+            elif question_type == 2:
+                value = random_.choice(CHOICES)
+            else:
+                value = str(
+                    (start - timedelta(days=random_.randint(0, 3650))).date()
+                )
+            submission[path] = value
+        submissions.append(submission)
+
+    return submissions
+
+
+@contextmanager
+def measure(name: str):
+    """
+    Measure the wall time, the peak of memory allocated by Python, the number
+    of queries per database and the number of MongoDB operations of the code
+    run in the block, and store them in the yielded `BenchmarkResult`.
+
+    Memory is traced during the whole block, the wall time thus includes the
+    overhead of `tracemalloc`, consistently from one run to another.
+    """
+    result = BenchmarkResult(name=name)
+    mongo_operations = Counter()
+
+    with ExitStack() as stack:
+        query_contexts = {
+            alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+            for alias in settings.DATABASES
+        }
+        _count_mongo_operations(stack, mongo_operations)
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield result
+        finally:
+            result.wall_time = time.perf_counter() - start
+            _, result.peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    result.queries = {
+        alias: len(context.captured_queries)
+        for alias, context in query_contexts.items()
+    }
+    result.mongo_operations = dict(mongo_operations)
+
+
+def _count_mongo_operations(stack: ExitStack, counter: Counter):
+    collection_class = type(settings.MONGO_DB.instances)
+    # Some operations are implemented with others (e.g. `find_one()` with
+    # `find()`), only count the outermost call
+    depth = [0]
+
+    def counted(operation, method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            if not depth[0]:
+                counter[operation] += 1
+            depth[0] += 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                depth[0] -= 1
+
+        return wrapper
+
+    for operation in MONGO_OPERATIONS:
+        method = getattr(collection_class, operation, None)
+        if method is not None:
+            stack.enter_context(
+                patch.object(
+                    collection_class, operation, counted(operation, method)
+                )
+            )
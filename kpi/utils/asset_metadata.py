@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import QuerySet
+
+from kpi.utils.hash import calculate_hash
+from kpi.utils.user_assets_version import get_user_assets_version
+
+ASSET_METADATA_CACHE_KEY = 'asset_metadata:{user_id}:{version}:{query_hash}'
+
+# Each facet is a (facet, value, label) row. JSON values of unexpected types
+# are skipped, as are empty values.
+FACETS_SQL = """
+WITH assets AS MATERIALIZED (
+    SELECT summary, settings FROM kpi_asset WHERE id IN ({assets_sql})
+)
+SELECT DISTINCT 'languages', language, NULL
+FROM assets
+CROSS JOIN LATERAL jsonb_array_elements_text(
+    CASE jsonb_typeof(summary -> 'languages')
+        WHEN 'array' THEN summary -> 'languages'
+        ELSE '[]'::jsonb
+    END
+) AS language
+WHERE language <> ''
+UNION ALL
+SELECT 'countries', country ->> 'value', MIN(COALESCE(country ->> 'label', ''))
+FROM assets
+CROSS JOIN LATERAL jsonb_array_elements(
+    CASE jsonb_typeof(settings -> 'country')
+        WHEN 'array' THEN settings -> 'country'
+        ELSE '[]'::jsonb
+    END
+) AS country
+WHERE jsonb_typeof(country) = 'object'
+    AND country ? 'label'
+    AND country ->> 'value' <> ''
+GROUP BY country ->> 'value'
+UNION ALL
+SELECT
+    'sectors',
+    settings -> 'sector' ->> 'value',
+    MIN(COALESCE(settings -> 'sector' ->> 'label', ''))
+FROM assets
+WHERE jsonb_typeof(settings -> 'sector') = 'object'
+    AND settings -> 'sector' ? 'label'
+    AND settings -> 'sector' ->> 'value' <> ''
+GROUP BY settings -> 'sector' ->> 'value'
+UNION ALL
+SELECT DISTINCT 'organizations', settings ->> 'organization', NULL
+FROM assets
+WHERE settings ->> 'organization' <> ''
+"""
+
+
+def get_asset_metadata(queryset: QuerySet, user_id: int | None) -> dict:
+    """
+    Return the languages, countries, sectors and organizations of the assets
+    of `queryset`, as values to search for.
+
+    They are aggregated by PostgreSQL and cached for `user_id`, until the
+    version of their assets changes (see `get_user_assets_version()`).
+    """
+    metadata = {
+        'languages': [],
+        'countries': [],
+        'sectors': [],
+        'organizations': [],
+    }
+    try:
+        assets_sql, params = (
+            queryset.order_by().values('pk').query.sql_with_params()
+        )
+    except EmptyResultSet:
+        # e.g. the user cannot see any assets
+        return metadata
+
+    # The query contains the filters of the request and, in most cases, the
+    # ids of the assets the user is allowed to see
+    cache_key = ASSET_METADATA_CACHE_KEY.format(
+        user_id=user_id,
+        version=get_user_assets_version(user_id),
+        query_hash=calculate_hash(f'{assets_sql}{params}'),
+    )
+    if (cached_metadata := cache.get(cache_key)) is not None:
+        return cached_metadata
+
+    with connection.cursor() as cursor:
+        cursor.execute(FACETS_SQL.format(assets_sql=assets_sql), params)
+        for facet, value, label in cursor.fetchall():
+            if label is None:
+                metadata[facet].append(value)
+            else:
+                metadata[facet].append((value, label))
+
+    metadata['languages'].sort()
+    metadata['countries'].sort(key=itemgetter(1))
+    metadata['sectors'].sort(key=itemgetter(1))
+    metadata['organizations'].sort()
+
+    cache.set(cache_key, metadata, settings.USER_ASSETS_CACHE_TTL)
+    return metadata
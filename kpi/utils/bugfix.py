@@ -6,6 +6,7 @@ from django.db import transaction
 from formpack.utils.bugfix import repair_file_column_content_in_place
 
 from kpi.models import Asset, AssetVersion
+from kpi.utils.hash import calculate_content_hash
 
 
 def repair_file_column_content_and_save(asset, include_versions=True) -> bool:
@@ -15,8 +16,8 @@ def repair_file_column_content_and_save(asset, include_versions=True) -> bool:
     kobotoolbox/formpack#322, which wrongly transformed the `file` column into
     `media::file` and included it in the list of translated columns.
 
-    Writes only to the `content` (or `version_content`) field for each modified
-    model instance.
+    Writes only to the `content` (or `version_content` and `_content_hash`)
+    field for each modified model instance.
 
     Returns `True` if any change was made
     """
@@ -59,8 +60,11 @@ def repair_file_column_content_and_save(asset, include_versions=True) -> bool:
             .values_list('pk', 'version_content')
         ):
             if repair_file_column_content_in_place(version_content):
+                # Cached schemas and compiled formpacks are keyed by the
+                # content hash
                 AssetVersion.objects.filter(pk=pk).update(
-                    version_content=version_content
+                    version_content=version_content,
+                    _content_hash=calculate_content_hash(version_content),
                 )
                 any_change = True
 
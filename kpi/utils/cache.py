@@ -1,10 +1,18 @@
+import time
+from collections import OrderedDict
 from datetime import timedelta
 from functools import wraps
+from threading import Lock
 
 from django.utils import timezone
 from django_redis import get_redis_connection
+from django_redis.client import DefaultClient
 from django_request_cache import cache_for_request, get_request_cache
 
+from kpi.utils.request_metrics import record_cache_reads
+
+_missing = object()
+
 
 def void_cache_for_request(keys):
     """
@@ -36,6 +44,75 @@ def void_cache_for_request(keys):
     return _void_cache_for_request
 
 
+class LocalLRUCache:
+    """
+    Bounded in-process cache which evicts the least recently used entries
+    first.
+
+    Each worker process keeps its own copy, so it must only be used for values
+    that never change for a given key (e.g. data derived from an immutable
+    `AssetVersion`).
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class MetricsRedisClient(DefaultClient):
+    """
+    django-redis client which adds the hits and misses of the cache to the
+    metrics of the current request or task.
+    """
+
+    def get(self, key, default=None, version=None, client=None):
+        started_at = time.perf_counter()
+        value = super().get(key, default=_missing, version=version, client=client)
+        record_cache_reads(
+            hits=int(value is not _missing),
+            misses=int(value is _missing),
+            duration=time.perf_counter() - started_at,
+        )
+        return default if value is _missing else value
+
+    def get_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        started_at = time.perf_counter()
+        values = super().get_many(keys, version=version, client=client)
+        record_cache_reads(
+            hits=len(values),
+            misses=len(keys) - len(values),
+            duration=time.perf_counter() - started_at,
+        )
+        return values
+
+
 class CachedClass:
     """
     Handles a mapping cache for a class. It supports only getter methods that
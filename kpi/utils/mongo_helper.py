@@ -1,12 +1,23 @@
 from __future__ import annotations
 
 import re
+from collections.abc import Iterable
 from typing import Any, Optional, Union
 
+from bson import json_util
 from django.conf import settings
+from django.core.cache import cache
 
+from kobo.apps.reports.constants import REPORT_STATS_CACHE_KEY
 from kobo.celery import celery_app
-from kpi.constants import NESTED_MONGO_RESERVED_ATTRIBUTES
+from kpi.constants import (
+    NESTED_MONGO_RESERVED_ATTRIBUTES,
+    SUBMISSION_COUNT_STRATEGY_CACHED,
+    SUBMISSION_COUNT_STRATEGY_CAPPED,
+    SUBMISSION_COUNT_STRATEGY_EXACT,
+)
+from kpi.utils.hash import calculate_hash
+from kpi.utils.mongo_index_advisor import sample_query_shape
 from kpi.utils.strings import base64_encodestring
 
 PermissionFilter = dict[str, Any]
@@ -98,7 +109,19 @@ class MongoHelper:
 
     @classmethod
     def delete_many(cls, query: dict) -> int:
-        return cls._raw_delete(query, many=True)
+        mongo_userform_id = query.get(cls.USERFORM_ID)
+        if isinstance(mongo_userform_id, str):
+            mongo_userform_ids = [mongo_userform_id]
+        else:
+            mongo_userform_ids = settings.MONGO_DB.instances.distinct(
+                cls.USERFORM_ID, query
+            )
+
+        deleted_count = cls._raw_delete(query, many=True)
+        if deleted_count:
+            cls.invalidate_report_stats(mongo_userform_ids)
+
+        return deleted_count
 
     @classmethod
     def encode(cls, key: str) -> str:
@@ -117,6 +140,7 @@ class MongoHelper:
         query=None,
         submission_ids=None,
         permission_filters=None,
+        count_strategy: str = SUBMISSION_COUNT_STRATEGY_EXACT,
     ):
         _, total_count = cls._get_cursor_and_count(
             mongo_userform_id,
@@ -124,6 +148,7 @@ class MongoHelper:
             query=query,
             submission_ids=submission_ids,
             permission_filters=permission_filters,
+            count_strategy=count_strategy,
         )
 
         return total_count
@@ -140,7 +165,35 @@ class MongoHelper:
         submission_ids: Optional[list] = None,
         permission_filters: Optional[list] = None,
         skip_count=False,
+        after: Optional[dict] = None,
+        count_strategy: str = SUBMISSION_COUNT_STRATEGY_EXACT,
     ):
+        """
+        Return a cursor on the instances of `mongo_userform_id` and their
+        total count (`None` if `skip_count` is True).
+
+        `count_strategy` determines how the total count is computed:
+        - `exact`: count all matching instances
+        - `capped`: count up to `settings.SUBMISSION_COUNT_CAP + 1` instances,
+           or one more than `start + limit` if it is greater. A count greater
+           than the cap means "more than the cap", a count greater than
+           `start + limit` means there are instances after this page.
+        - `cached`: exact count kept in cache for
+           `settings.SUBMISSION_COUNT_CACHE_TTL` seconds, keyed by the query
+        - `counter`: resolved by the deployment back end from the XForm
+           counters. Behaves like `exact` here.
+
+        If `after` is provided, it must contain the values of the `sort` keys
+        of the last instance previously returned. Results resume right after
+        this instance with a range query (keyset pagination) instead of
+        skipping `start` documents.
+        """
+        if after:
+            keyset_query = cls.get_keyset_query(sort, after)
+            query = (
+                {cls.AND_OPERATOR: [query, keyset_query]} if query else keyset_query
+            )
+
         cursor, total_count = cls._get_cursor_and_count(
             mongo_userform_id,
             fields=fields,
@@ -148,6 +201,11 @@ class MongoHelper:
             submission_ids=submission_ids,
             permission_filters=permission_filters,
             skip_count=skip_count,
+            count_strategy=count_strategy,
+            count_cap=max(
+                settings.SUBMISSION_COUNT_CAP, (start or 0) + (limit or 0)
+            ),
+            sort=sort,
         )
 
         cursor.skip(start)
@@ -164,6 +222,40 @@ class MongoHelper:
 
         return cursor, total_count
 
+    @classmethod
+    def get_keyset_query(cls, sort: dict, last_values: dict) -> dict:
+        """
+        Build the query matching instances which come after `last_values`
+        in the order defined by `sort`.
+
+        Example:
+
+            >>> MongoHelper.get_keyset_query(
+                    {'_submission_time': -1, '_id': -1},
+                    {'_submission_time': '2025-01-01T00:00:00', '_id': 12},
+                )
+                {
+                    '$or': [
+                        {'_submission_time': {'$lt': '2025-01-01T00:00:00'}},
+                        {
+                            '_submission_time': '2025-01-01T00:00:00',
+                            '_id': {'$lt': 12},
+                        },
+                    ]
+                }
+        """
+        conditions = []
+        previous_keys = {}
+        for key, direction in sort.items():
+            operator = '$gt' if int(direction) > 0 else '$lt'
+            conditions.append({**previous_keys, key: {operator: last_values[key]}})
+            previous_keys[key] = last_values[key]
+
+        if len(conditions) == 1:
+            return conditions[0]
+
+        return {cls.OR_OPERATOR: conditions}
+
     @staticmethod
     def get_max_time_ms():
         """
@@ -184,6 +276,19 @@ class MongoHelper:
             key.startswith('$') or key.count('.') > 0
         )
 
+    @classmethod
+    def invalidate_report_stats(cls, mongo_userform_ids: Iterable[str]):
+        """
+        Delete the cached report counters of `mongo_userform_ids`, whose
+        submissions have been edited or deleted.
+        """
+        cache.delete_many(
+            [
+                REPORT_STATS_CACHE_KEY.format(mongo_userform_id=mongo_userform_id)
+                for mongo_userform_id in set(mongo_userform_ids)
+            ]
+        )
+
     @classmethod
     def replace_one(cls, document: dict) -> dict:
         """
@@ -198,28 +303,34 @@ class MongoHelper:
             result = settings.MONGO_DB.instances.replace_one(
                 {'_id': document['_id']}, document, upsert=True
             )
-            return {
+            result = {
                 'matched_count': result.matched_count,
                 'modified_count': result.modified_count,
                 'updated_existing': result.raw_result.get('updatedExisting', False)
             }
+        else:
+            command = {
+                'update': cls.COLLECTION,
+                'updates': [{
+                    'q': {'_id': document['_id']},
+                    'u': document,
+                    'upsert': True
+                }],
+                'maxTimeMS': cls.get_max_time_ms()
+            }
+            result = settings.MONGO_DB.command(command)
+            result = {
+                'matched_count': result.get('n', 0),
+                'modified_count': result.get('nModified', 0),
+                # `upserted` is only returned when the document is new
+                'updated_existing': 'upserted' not in result
+            }
 
-        command = {
-            'update': cls.COLLECTION,
-            'updates': [{
-                'q': {'_id': document['_id']},
-                'u': document,
-                'upsert': True
-            }],
-            'maxTimeMS': cls.get_max_time_ms()
-        }
-        result = settings.MONGO_DB.command(command)
+        if result['updated_existing']:
+            # Submissions which are only added are counted incrementally
+            cls.invalidate_report_stats([document[cls.USERFORM_ID]])
 
-        return {
-            'matched_count': result.get('n', 0),
-            'modified_count': result.get('nModified', 0),
-            'updated_existing': 'upserted' in result
-        }
+        return result
 
     @classmethod
     def to_readable_dict(cls, d: dict) -> dict:
@@ -381,6 +492,33 @@ class MongoHelper:
         else:
             return input_data
 
+    @classmethod
+    def _count_documents(
+        cls, query: dict, count_strategy: str, count_cap: Optional[int] = None
+    ) -> int:
+        if count_strategy == SUBMISSION_COUNT_STRATEGY_CAPPED:
+            # Count one extra document to tell whether the cap is exceeded
+            return settings.MONGO_DB.instances.count_documents(
+                query,
+                limit=(count_cap or settings.SUBMISSION_COUNT_CAP) + 1,
+                maxTimeMS=cls.get_max_time_ms(),
+            )
+
+        if count_strategy == SUBMISSION_COUNT_STRATEGY_CACHED:
+            query_hash = calculate_hash(json_util.dumps(query, sort_keys=True))
+            cache_key = f'mongo_count:{query_hash}'
+            count = cache.get(cache_key)
+            if count is None:
+                count = settings.MONGO_DB.instances.count_documents(
+                    query, maxTimeMS=cls.get_max_time_ms()
+                )
+                cache.set(cache_key, count, settings.SUBMISSION_COUNT_CACHE_TTL)
+            return count
+
+        return settings.MONGO_DB.instances.count_documents(
+            query, maxTimeMS=cls.get_max_time_ms()
+        )
+
     @classmethod
     def _get_cursor_and_count(
         cls,
@@ -390,7 +528,14 @@ class MongoHelper:
         submission_ids: Optional[list] = None,
         permission_filters=None,
         skip_count=False,
+        count_strategy: str = SUBMISSION_COUNT_STRATEGY_EXACT,
+        count_cap: Optional[int] = None,
+        sort: Optional[dict] = None,
     ):
+        """
+        `sort` is not applied to the cursor, it is only used to sample the
+        shape of the query. See `kpi.utils.mongo_index_advisor`
+        """
         if query is None:
             query = {}
 
@@ -438,14 +583,13 @@ class MongoHelper:
             # Retrieve all fields except `cls.USERFORM_ID`
             fields_to_select = {cls.USERFORM_ID: 0}
 
+        sample_query_shape(query, sort)
         cursor = settings.MONGO_DB.instances.find(
             query, fields_to_select, max_time_ms=cls.get_max_time_ms()
         )
         count = None
         if not skip_count:
-            count = settings.MONGO_DB.instances.count_documents(
-                query, maxTimeMS=cls.get_max_time_ms()
-            )
+            count = cls._count_documents(query, count_strategy, count_cap)
         return cursor, count
 
     @classmethod
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import json
+import random
+from collections import Counter
+
+from bson import json_util
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from kpi.utils.log import logging
+
+# Prefix of the names of the indexes managed by `sync_managed_indexes()`.
+# Other indexes of the collection are never dropped.
+MANAGED_INDEX_PREFIX = 'kpi_'
+
+# Compound indexes on `_userform_id`, which is part of every query sent by
+# `MongoHelper`, followed by the fields the data table filters and sorts on.
+MANAGED_INDEXES = {
+    f'{MANAGED_INDEX_PREFIX}userform_id_submission_time': [
+        ('_userform_id', 1),
+        ('_submission_time', 1),
+    ],
+    f'{MANAGED_INDEX_PREFIX}userform_id_validation_status': [
+        ('_userform_id', 1),
+        ('_validation_status.uid', 1),
+    ],
+    f'{MANAGED_INDEX_PREFIX}userform_id_submitted_by': [
+        ('_userform_id', 1),
+        ('_submitted_by', 1),
+    ],
+    f'{MANAGED_INDEX_PREFIX}userform_id_id': [
+        ('_userform_id', 1),
+        ('_id', 1),
+    ],
+}
+
+QUERY_SHAPES_KEY = 'mongo_query_shapes'
+
+EQUALITY_OPERATORS = {'$eq', '$in'}
+RANGE_OPERATORS = {'$gt', '$gte', '$lt', '$lte'}
+LOGICAL_OPERATORS = {'$and', '$or', '$nor'}
+
+
+def get_query_shape(query: dict, sort: dict | None = None) -> dict:
+    """
+    Return the shape of `query` and `sort`, i.e. which fields are matched by
+    equality, by range or otherwise, and which fields the results are sorted
+    on, regardless of the values.
+    """
+    shape = {'equality': set(), 'range': set(), 'other': set()}
+    _add_to_shape(shape, query)
+    # A field matched by equality does not need to be indexed for its range
+    shape['range'] -= shape['equality']
+    shape['other'] -= shape['equality'] | shape['range']
+    return {
+        **{key: sorted(fields) for key, fields in shape.items()},
+        'sort': [[key, int(direction)] for key, direction in (sort or {}).items()],
+    }
+
+
+def get_sampled_query_shapes() -> list[tuple[int, dict]]:
+    """
+    Return the number of occurrences and the most recent sample of each query
+    shape recorded by `sample_query_shape()`, the most frequent first.
+
+    A sample is a dict with the `shape`, and the `query` and `sort` it has been
+    computed from.
+    """
+    counts = Counter()
+    samples = {}
+    redis_client = get_redis_connection('default')
+    for sample in redis_client.lrange(QUERY_SHAPES_KEY, 0, -1):
+        sample = json_util.loads(sample)
+        shape_key = json.dumps(sample['shape'], sort_keys=True)
+        counts[shape_key] += 1
+        # Samples are stored the most recent first
+        samples.setdefault(shape_key, sample)
+
+    return [
+        (count, samples[shape_key]) for shape_key, count in counts.most_common()
+    ]
+
+
+def is_shape_indexed(shape: dict, index_keys: list) -> bool:
+    """
+    Return whether an index on `index_keys` can serve a query of `shape`
+    without scanning the whole collection or sorting in memory.
+
+    Following the equality, sort, range rule, the fields matched by equality
+    must come first, then the sort fields in the same (or fully reversed)
+    order.
+    """
+    keys = [(key, int(direction)) for key, direction in index_keys]
+    position = 0
+    while position < len(keys) and keys[position][0] in shape['equality']:
+        position += 1
+
+    if position == 0:
+        return False
+
+    sort = [(key, direction) for key, direction in shape['sort']]
+    if not sort:
+        return True
+
+    index_sort = keys[position: position + len(sort)]
+    if [key for key, _ in index_sort] != [key for key, _ in sort]:
+        return False
+
+    # The index can be walked backwards to sort in the opposite order
+    return len(
+        {
+            index_direction * direction
+            for (_, index_direction), (_, direction) in zip(index_sort, sort)
+        }
+    ) == 1
+
+
+def sample_query_shape(query: dict, sort: dict | None = None):
+    """
+    Record the shape of a query sent to the `instances` collection, for
+    `settings.MONGO_QUERY_SHAPES_SAMPLE_RATE` of the calls.
+
+    Samples are kept in a Redis list bounded to the
+    `settings.MONGO_QUERY_SHAPES_MAX_SAMPLES` most recent ones. Submission
+    data must not end up in Redis, thus the values of the query are redacted.
+    """
+    if random.random() >= settings.MONGO_QUERY_SHAPES_SAMPLE_RATE:
+        return
+
+    try:
+        sample = {
+            'shape': get_query_shape(query, sort),
+            'query': _redact_values(query),
+            'sort': sort,
+        }
+        redis_client = get_redis_connection('default')
+        pipeline = redis_client.pipeline()
+        pipeline.lpush(QUERY_SHAPES_KEY, json_util.dumps(sample))
+        pipeline.ltrim(
+            QUERY_SHAPES_KEY, 0, settings.MONGO_QUERY_SHAPES_MAX_SAMPLES - 1
+        )
+        pipeline.execute()
+    except Exception as e:
+        # Sampling must never prevent submissions from being read, even if the
+        # query is malformed
+        logging.warning(f'Could not sample MongoDB query shape: {e!r}')
+
+
+def sync_managed_indexes(drop: bool = False) -> tuple[list[str], list[str]]:
+    """
+    Create the indexes of `MANAGED_INDEXES` which do not exist yet and, if
+    `drop` is `True`, drop the managed indexes which are not listed anymore.
+
+    Return the names of the created and dropped indexes.
+    """
+    collection = settings.MONGO_DB.instances
+    existing_indexes = collection.index_information()
+
+    created = []
+    for name, keys in MANAGED_INDEXES.items():
+        if name not in existing_indexes:
+            collection.create_index(keys, name=name)
+            created.append(name)
+
+    dropped = []
+    if drop:
+        for name in existing_indexes:
+            if name.startswith(MANAGED_INDEX_PREFIX) and name not in MANAGED_INDEXES:
+                collection.drop_index(name)
+                dropped.append(name)
+
+    return created, dropped
+
+
+def _add_to_shape(shape: dict, query: dict, in_or: bool = False):
+    for key, value in query.items():
+        if key in LOGICAL_OPERATORS:
+            for sub_query in value:
+                # An index cannot use a field of a single `$or` branch to
+                # narrow down the whole query
+                _add_to_shape(shape, sub_query, in_or or key != '$and')
+            continue
+
+        if key.startswith('$'):
+            # e.g. `$expr`
+            shape['other'].add(key)
+            continue
+
+        if in_or:
+            shape['other'].add(key)
+        elif not isinstance(value, dict) or not value:
+            shape['equality'].add(key)
+        elif not any(operator.startswith('$') for operator in value):
+            # Match on a whole embedded document
+            shape['equality'].add(key)
+        elif set(value) <= EQUALITY_OPERATORS:
+            shape['equality'].add(key)
+        elif set(value) <= RANGE_OPERATORS:
+            shape['range'].add(key)
+        else:
+            shape['other'].add(key)
+
+
+def _redact_values(value, key: str | None = None):
+    """
+    Replace the values of a query with placeholders of the same type, except
+    the form id, which `--explain` of the `mongo_index_advisor` command needs
+    to run the query against the right submissions.
+    """
+    if key == '_userform_id':
+        return value
+    if isinstance(value, dict):
+        return {
+            sub_key: _redact_values(
+                sub_value, key if sub_key.startswith('$') else sub_key
+            )
+            for sub_key, sub_value in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_redact_values(item, key) for item in value]
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return ''
+    if isinstance(value, (int, float)):
+        return 0
+    return None
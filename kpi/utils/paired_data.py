@@ -1,15 +1,28 @@
+import hashlib
 import re
-from typing import Optional
+from datetime import datetime, timedelta
+from itertools import islice
+from tempfile import SpooledTemporaryFile
+from typing import Iterable, Optional
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
 
-from kpi.constants import SUBMISSION_FORMAT_TYPE_XML
+from kpi.constants import PERM_VIEW_SUBMISSIONS, SUBMISSION_FORMAT_TYPE_XML
 from kpi.models.asset_file import AssetFile
-from kpi.models.paired_data import PairedData
+from kpi.models.paired_data import PairedData, PairedDataFragment
 from kpi.renderers import SubmissionXMLRenderer
-from kpi.utils.hash import calculate_hash
 from kpi.utils.xml import add_xml_declaration, strip_nodes
 
+# Submissions modified shortly before the previous build are read again, in
+# case their transaction was not committed yet when that build ran.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Keep the XML in memory up to this size before spilling it to disk
+SPOOLED_FILE_MAX_SIZE = 10 * 1024 * 1024
+
 
 def build_and_save_paired_data_xml(
     asset,
@@ -25,60 +38,242 @@ def build_and_save_paired_data_xml(
     backend if there are submissions and the content has changed. Returns the
     generated XML string regardless (including the empty-submissions case,
     which is returned as-is without saving so it is not cached).
+
+    The stripped XML of each source submission is stored as a
+    `PairedDataFragment`. When a previous build exists, only the submissions
+    modified since then are parsed again.
     """
-    submissions = source_asset.deployment.get_submissions(
-        asset.owner,
-        format_type=SUBMISSION_FORMAT_TYPE_XML,
-    )
-    parsed_submissions = []
     allowed_fields = paired_data.allowed_fields
     # `allowed_fields` semantics (see `PairedData.allowed_fields`):
     #   None  → no restriction from either side; keep all fields.
     #   []    → source and destination restrictions do not overlap;
     #           no data should be exposed — skip submission parsing.
     #   [...]  → keep only the listed fields.
-    if allowed_fields is None or allowed_fields:
-        for submission in submissions:
-            # Use `rename_root_node_to='data'` to rename the root node of
-            # each submission to `data` so that form authors do not have to
-            # rewrite their `xml-external` formulas any time the asset UID
-            # changes, e.g. when cloning a form or creating a project from
-            # a template. Set `use_xpath=True` because `paired_data.fields`
-            # uses full group hierarchies, not just question names.
-            parsed_submissions.append(
-                strip_nodes(
-                    submission,
-                    allowed_fields,
-                    use_xpath=True,
-                    rename_root_node_to='data',
-                )
-            )
+    if allowed_fields is not None and not allowed_fields:
+        return _get_empty_xml()
 
-    root_tag_name = SubmissionXMLRenderer.root_tag_name
-    xml_ = add_xml_declaration(
-        f'<{root_tag_name}>' f'{"".join(parsed_submissions)}' f'</{root_tag_name}>'
+    if (
+        source_asset.get_filters_for_partial_perm(
+            asset.owner.pk, perm=PERM_VIEW_SUBMISSIONS
+        )
+        is not None
+    ):
+        # Which submissions the owner can see depends on the content of the
+        # submissions, which is only queryable from MongoDB. Rebuild everything.
+        return _build_and_save_from_submissions(
+            asset, asset_file, paired_data, source_asset, old_hash
+        )
+
+    build_started_at = timezone.now()
+    metadata = asset_file.metadata
+    fields = sorted(allowed_fields) if allowed_fields is not None else None
+    watermark = metadata.get('paired_data_watermark')
+    can_resume = (
+        asset_file.pk
+        and asset_file.content
+        and watermark
+        and metadata.get('paired_data_fields') == fields
     )
 
-    if not parsed_submissions:
-        # Do not cache an empty file; return the empty structure as-is.
-        return xml_
+    if can_resume:
+        modified_since = datetime.fromisoformat(watermark) - WATERMARK_OVERLAP
+        has_changed = _sync_fragments(
+            asset_file, source_asset, allowed_fields, modified_since
+        )
+        metadata['paired_data_watermark'] = build_started_at.isoformat()
+        if not has_changed:
+            # Nothing to rebuild, but refresh `date_modified` to postpone the
+            # next build for another `PAIRED_DATA_EXPIRATION` seconds.
+            asset_file.save(update_fields=['metadata', 'date_modified'])
+            with asset_file.content.open('rb') as content:
+                return content.read().decode()
 
-    # Minify once here so the stored bytes, the hash, and the served bytes
-    # are all consistent — avoiding a redundant O(n) regex on every request.
-    xml_ = re.sub(r'>\s+<', '><', xml_).strip()
+        fragments = asset_file.paired_data_fragments.order_by(
+            'submission_id'
+        ).values_list('xml', flat=True)
+        xml_ = _save_xml(
+            asset_file,
+            paired_data,
+            fragments.iterator(chunk_size=settings.PAIRED_DATA_CHUNK_SIZE),
+        )
+    else:
+        fragments = {
+            submission_id: _strip_submission(xml, allowed_fields)
+            for submission_id, xml in (
+                source_asset.deployment.get_submissions_xml_modified_since()
+            )
+        }
+        if not fragments:
+            # Do not cache an empty file; return the empty structure as-is.
+            return _get_empty_xml()
+
+        metadata['paired_data_fields'] = fields
+        metadata['paired_data_watermark'] = build_started_at.isoformat()
+        xml_ = _save_xml(asset_file, paired_data, fragments.values())
+        with transaction.atomic():
+            asset_file.paired_data_fragments.all().delete()
+            PairedDataFragment.objects.bulk_create(
+                (
+                    PairedDataFragment(
+                        asset_file=asset_file, submission_id=submission_id, xml=xml
+                    )
+                    for submission_id, xml in fragments.items()
+                ),
+                batch_size=settings.PAIRED_DATA_CHUNK_SIZE,
+            )
+
+    if old_hash != asset_file.md5_hash:
+        asset.deployment.sync_media_files(AssetFile.PAIRED_DATA)
+
+    return xml_
 
-    filename = paired_data.filename
 
-    # Delete the current file when the filename has changed to avoid leaving
-    # an orphan file on storage.
-    if asset_file.pk and asset_file.content and asset_file.content.name != filename:
-        asset_file.content.delete()
+def _build_and_save_from_submissions(
+    asset,
+    asset_file: AssetFile,
+    paired_data: PairedData,
+    source_asset,
+    old_hash: Optional[str] = None,
+) -> str:
+    submissions = source_asset.deployment.get_submissions(
+        asset.owner,
+        format_type=SUBMISSION_FORMAT_TYPE_XML,
+    )
+    fragments = [
+        _strip_submission(submission, paired_data.allowed_fields)
+        for submission in submissions
+    ]
+    if not fragments:
+        return _get_empty_xml()
 
-    asset_file.content = ContentFile(xml_.encode(), name=filename)
-    asset_file.set_md5_hash(calculate_hash(xml_, prefix=True))
-    asset_file.save()
+    # Fragments are only kept for full builds, do not resume from this one.
+    asset_file.metadata.pop('paired_data_watermark', None)
+    xml_ = _save_xml(asset_file, paired_data, fragments)
+    asset_file.paired_data_fragments.all().delete()
 
     if old_hash != asset_file.md5_hash:
         asset.deployment.sync_media_files(AssetFile.PAIRED_DATA)
 
     return xml_
+
+
+def _get_empty_xml() -> str:
+    root_tag_name = SubmissionXMLRenderer.root_tag_name
+    return add_xml_declaration(f'<{root_tag_name}></{root_tag_name}>')
+
+
+def _save_xml(
+    asset_file: AssetFile, paired_data: PairedData, fragments: Iterable[str]
+) -> str:
+    """
+    Write the XML document made of `fragments` to `asset_file` and save it.
+    The document is written (and hashed) fragment by fragment, never as a
+    whole string, until it is read back to be returned.
+    """
+    root_tag_name = SubmissionXMLRenderer.root_tag_name
+    md5 = hashlib.md5()
+
+    with SpooledTemporaryFile(max_size=SPOOLED_FILE_MAX_SIZE) as xml_file:
+
+        def write(string: str):
+            chunk = string.encode()
+            md5.update(chunk)
+            xml_file.write(chunk)
+
+        write(add_xml_declaration(f'<{root_tag_name}>'))
+        for fragment in fragments:
+            write(fragment)
+        write(f'</{root_tag_name}>')
+
+        filename = paired_data.filename
+        # Delete the current file when the filename has changed to avoid
+        # leaving an orphan file on storage.
+        if (
+            asset_file.pk
+            and asset_file.content
+            and asset_file.content.name != filename
+        ):
+            asset_file.content.delete(save=False)
+
+        xml_file.seek(0)
+        asset_file.content = File(xml_file, name=filename)
+        asset_file.set_md5_hash(f'md5:{md5.hexdigest()}')
+        asset_file.save()
+
+        xml_file.seek(0)
+        return xml_file.read().decode()
+
+
+def _sync_fragments(
+    asset_file: AssetFile,
+    source_asset,
+    allowed_fields: Optional[list],
+    modified_since: datetime,
+) -> bool:
+    """
+    Update the fragments of submissions modified since `modified_since` and
+    delete the ones of submissions which do not exist anymore.
+
+    Return whether any fragment has changed.
+    """
+    deployment = source_asset.deployment
+    has_changed = False
+    submissions = deployment.get_submissions_xml_modified_since(modified_since)
+
+    while chunk := list(islice(submissions, settings.PAIRED_DATA_CHUNK_SIZE)):
+        fragments = {
+            submission_id: _strip_submission(xml, allowed_fields)
+            for submission_id, xml in chunk
+        }
+        current_fragments = dict(
+            asset_file.paired_data_fragments.filter(
+                submission_id__in=fragments.keys()
+            ).values_list('submission_id', 'xml')
+        )
+        changed_fragments = [
+            PairedDataFragment(
+                asset_file=asset_file, submission_id=submission_id, xml=xml
+            )
+            for submission_id, xml in fragments.items()
+            if current_fragments.get(submission_id) != xml
+        ]
+        if changed_fragments:
+            has_changed = True
+            PairedDataFragment.objects.bulk_create(
+                changed_fragments,
+                update_conflicts=True,
+                unique_fields=['asset_file', 'submission_id'],
+                update_fields=['xml'],
+            )
+
+    deleted_submission_ids = iter(
+        set(
+            asset_file.paired_data_fragments.values_list('submission_id', flat=True)
+        )
+        - deployment.get_submission_ids()
+    )
+    while chunk := list(
+        islice(deleted_submission_ids, settings.PAIRED_DATA_CHUNK_SIZE)
+    ):
+        has_changed = True
+        asset_file.paired_data_fragments.filter(submission_id__in=chunk).delete()
+
+    return has_changed
+
+
+def _strip_submission(xml: str, allowed_fields: Optional[list]) -> str:
+    # Use `rename_root_node_to='data'` to rename the root node of
+    # each submission to `data` so that form authors do not have to
+    # rewrite their `xml-external` formulas any time the asset UID
+    # changes, e.g. when cloning a form or creating a project from
+    # a template. Set `use_xpath=True` because `paired_data.fields`
+    # uses full group hierarchies, not just question names.
+    fragment = strip_nodes(
+        xml,
+        allowed_fields,
+        use_xpath=True,
+        rename_root_node_to='data',
+    )
+    # Minify once here so the stored bytes, the hash, and the served bytes
+    # are all consistent — avoiding a redundant O(n) regex on every request.
+    return re.sub(r'>\s+<', '><', fragment).strip()
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+from prometheus_client import Counter, Histogram
+from pymongo import monitoring
+
+from kpi.utils.log import logging
+
+_current_metrics: ContextVar[RequestMetrics | None] = ContextVar(
+    'request_metrics', default=None
+)
+
+DB_QUERIES = Histogram(
+    'kpi_db_queries',
+    'Number of database queries per request or task',
+    ['kind', 'alias'],
+    buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+DB_DURATION = Histogram(
+    'kpi_db_duration_seconds',
+    'Time spent in database queries per request or task',
+    ['kind', 'alias'],
+)
+MONGO_COMMANDS = Histogram(
+    'kpi_mongo_commands',
+    'Number of MongoDB commands per request or task',
+    ['kind'],
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100),
+)
+MONGO_DURATION = Histogram(
+    'kpi_mongo_duration_seconds',
+    'Time spent in MongoDB commands per request or task',
+    ['kind'],
+)
+CACHE_REQUESTS = Counter(
+    'kpi_cache_requests',
+    'Number of keys read from the default cache',
+    ['kind', 'result'],
+)
+
+
+@dataclass
+class RequestMetrics:
+    """
+    Time spent by a request (or a Celery task) in each of its dependencies.
+    Durations are in seconds.
+    """
+
+    name: str
+    kind: str = 'request'
+    started_at: float = field(default_factory=time.perf_counter)
+    db_queries: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    db_duration: dict[str, float] = field(
+        default_factory=lambda: defaultdict(float)
+    )
+    mongo_commands: int = 0
+    mongo_duration: float = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    cache_duration: float = 0
+    render_duration: float = 0
+
+    @property
+    def duration(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def as_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'duration_ms': _to_ms(self.duration),
+            'db': {
+                alias: {
+                    'queries': count,
+                    'duration_ms': _to_ms(self.db_duration[alias]),
+                }
+                for alias, count in self.db_queries.items()
+            },
+            'mongo': {
+                'commands': self.mongo_commands,
+                'duration_ms': _to_ms(self.mongo_duration),
+            },
+            'cache': {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'duration_ms': _to_ms(self.cache_duration),
+            },
+            'render_ms': _to_ms(self.render_duration),
+        }
+
+    def get_server_timing(self) -> str:
+        """
+        Return the value of the `Server-Timing` header, e.g.
+        `db-default;dur=12.3;desc="4 queries", mongo;dur=2.1;desc="1 command"`
+        """
+        metrics = [
+            (
+                f'db-{alias}',
+                self.db_duration[alias],
+                f'{count} {"query" if count == 1 else "queries"}',
+            )
+            for alias, count in self.db_queries.items()
+        ]
+        if count := self.mongo_commands:
+            metrics.append(
+                (
+                    'mongo',
+                    self.mongo_duration,
+                    f'{count} {"command" if count == 1 else "commands"}',
+                )
+            )
+        if self.cache_hits or self.cache_misses:
+            metrics.append(
+                (
+                    'cache',
+                    self.cache_duration,
+                    f'{self.cache_hits} hits, {self.cache_misses} misses',
+                )
+            )
+        if self.render_duration:
+            metrics.append(('render', self.render_duration, None))
+        metrics.append(('total', self.duration, None))
+
+        return ', '.join(
+            f'{name};dur={_to_ms(duration)}' + (f';desc="{desc}"' if desc else '')
+            for name, duration, desc in metrics
+        )
+
+
+class MongoCommandMetricsListener(monitoring.CommandListener):
+    """
+    Add the commands sent to MongoDB to the metrics of the current request
+    or task.
+
+    Pymongo calls listeners from the thread which sends the command.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        if metrics := _current_metrics.get():
+            metrics.mongo_commands += 1
+            metrics.mongo_duration += event.duration_micros / 1_000_000
+
+
+@contextmanager
+def collect_metrics(name: str, kind: str = 'request'):
+    """
+    Collect the metrics of the code run in the block and yield them.
+
+    When the block exits, the metrics are logged if they last longer than
+    `settings.REQUEST_METRICS_LOG_THRESHOLD` milliseconds, and exported to
+    Prometheus if `settings.ENABLE_METRICS` is `True`.
+
+    Blocks do not nest: the metrics of an inner block (e.g. a Celery task run
+    eagerly by a request) are added to the outer one.
+    """
+    if metrics := _current_metrics.get():
+        yield metrics
+        return
+
+    metrics = RequestMetrics(name=name, kind=kind)
+    token = _current_metrics.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for alias in settings.DATABASES:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(
+                        _DatabaseQueryRecorder(metrics, alias)
+                    )
+                )
+            yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+    _report(metrics)
+
+
+def get_current_metrics() -> RequestMetrics | None:
+    return _current_metrics.get()
+
+
+def record_cache_reads(hits: int, misses: int, duration: float):
+    if metrics := _current_metrics.get():
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+        metrics.cache_duration += duration
+
+
+class _DatabaseQueryRecorder:
+
+    def __init__(self, metrics: RequestMetrics, alias: str):
+        self.metrics = metrics
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.db_queries[self.alias] += 1
+            self.metrics.db_duration[self.alias] += time.perf_counter() - start
+
+
+def _report(metrics: RequestMetrics):
+    if metrics.duration * 1000 >= settings.REQUEST_METRICS_LOG_THRESHOLD:
+        logging.info(f'Request metrics: {json.dumps(metrics.as_dict())}')
+
+    if not settings.ENABLE_METRICS:
+        return
+
+    for alias, count in metrics.db_queries.items():
+        DB_QUERIES.labels(metrics.kind, alias).observe(count)
+        DB_DURATION.labels(metrics.kind, alias).observe(metrics.db_duration[alias])
+    MONGO_COMMANDS.labels(metrics.kind).observe(metrics.mongo_commands)
+    MONGO_DURATION.labels(metrics.kind).observe(metrics.mongo_duration)
+    if metrics.cache_hits:
+        CACHE_REQUESTS.labels(metrics.kind, 'hit').inc(metrics.cache_hits)
+    if metrics.cache_misses:
+        CACHE_REQUESTS.labels(metrics.kind, 'miss').inc(metrics.cache_misses)
+
+
+def _to_ms(duration: float) -> float:
+    return round(duration * 1000, 1)
@@ -11,6 +11,10 @@ from django.utils import timezone
 
 from kobo.apps.kobo_auth.shortcuts import User
 from kobo.apps.openrosa.apps.logger.models import DailyXFormSubmissionCounter
+from kobo.apps.openrosa.apps.logger.utils.counters import (
+    get_pending_num_of_submissions_by_user_id,
+    get_pending_storage_bytes_by_user_id,
+)
 from kobo.apps.openrosa.apps.main.models import UserProfile
 from kobo.apps.organizations.constants import UsageType
 from kobo.apps.organizations.models import Organization
@@ -112,7 +116,16 @@ def get_storage_usage_by_user_id(user_ids: list[int] = None) -> dict[int, int]:
     else:
         query = query.exclude(user_id=settings.ANONYMOUS_USER_ID)
 
-    return {res['user_id']: res['attachment_storage_bytes'] for res in query.iterator()}
+    storage_usage = {
+        res['user_id']: res['attachment_storage_bytes'] for res in query.iterator()
+    }
+    for user_id, pending_bytes in get_pending_storage_bytes_by_user_id(
+        user_ids
+    ).items():
+        if user_id in storage_usage:
+            storage_usage[user_id] += pending_bytes
+
+    return storage_usage
 
 
 def get_submission_counts_in_date_range_by_user_id(
@@ -137,6 +150,10 @@ def get_submission_counts_in_date_range_by_user_id(
             )
             for row in rows:
                 results[row['user_id']] = row['total']
+            for user_id, count in get_pending_num_of_submissions_by_user_id(
+                chunk, (start, end)
+            ).items():
+                results[user_id] = results.get(user_id, 0) + count
     return results
 
 
@@ -345,6 +362,19 @@ class ServiceUsageCalculator(CachedClass):
         for submission_key, count in submission_count.items():
             total_submission_count[submission_key] = count if count is not None else 0
 
+        # Add the submissions which have not been folded into the daily
+        # counters yet, when `SUBMISSION_COUNTERS_WRITE_BEHIND` is enabled
+        total_submission_count['all_time'] += (
+            get_pending_num_of_submissions_by_user_id([self._user_id]).get(
+                self._user_id, 0
+            )
+        )
+        total_submission_count['current_period'] += (
+            get_pending_num_of_submissions_by_user_id(
+                [self._user_id], (self.current_period_start, timezone.now())
+            ).get(self._user_id, 0)
+        )
+
         return total_submission_count
 
     def _get_cache_hash(self):
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+ASSETS_HASH_CACHE_KEY = 'assets_hash:{user_id}:{version}'
+USER_ASSETS_VERSION_CACHE_KEY = 'user_assets_version:{user_id}'
+# Version shared by all users, e.g. for public assets
+ALL_USERS = 'all'
+
+
+def get_user_assets_version(user_id: int | None) -> str:
+    """
+    Return the version of the assets `user_id` can see. It changes when one
+    of them is saved or deleted, or when the permissions of the user change.
+
+    Include it in the cache keys of data derived from these assets, to
+    invalidate them all at once.
+    """
+    cache_keys = [
+        USER_ASSETS_VERSION_CACHE_KEY.format(user_id=user_id_)
+        for user_id_ in (ALL_USERS, user_id)
+    ]
+    versions = cache.get_many(cache_keys)
+    for cache_key in cache_keys:
+        if cache_key not in versions:
+            versions[cache_key] = cache.get_or_set(
+                cache_key, time.time_ns, settings.USER_ASSETS_CACHE_TTL
+            )
+
+    return '.'.join(str(versions[cache_key]) for cache_key in cache_keys)
+
+
+def get_asset_user_ids(asset) -> list[int | str]:
+    """
+    Return the ids of the users who can see `asset`, and `ALL_USERS` if it is
+    public
+    """
+    user_ids = set(
+        asset.permissions.filter(deny=False).values_list('user_id', flat=True)
+    )
+    user_ids.add(asset.owner_id)
+    if settings.ANONYMOUS_USER_ID in user_ids:
+        user_ids.add(ALL_USERS)
+    return list(user_ids)
+
+
+def invalidate_user_assets_version(user_ids: list[int | str]):
+    """
+    Change the version of the assets of `user_ids`. Pass `ALL_USERS` to
+    change it for every user.
+
+    Within a transaction, the version is changed again once it is committed,
+    because data cached in the meantime are computed from the previous state.
+    """
+    cache_keys = [
+        USER_ASSETS_VERSION_CACHE_KEY.format(user_id=user_id)
+        for user_id in user_ids
+    ]
+    cache.delete_many(cache_keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(partial(cache.delete_many, cache_keys))
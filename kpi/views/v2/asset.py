@@ -1,10 +1,10 @@
 import copy
 import json
-from collections import OrderedDict, defaultdict
-from operator import itemgetter
+from collections import defaultdict
 
 from django.conf import settings
-from django.db.models import Count, F
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, Subquery
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import (
@@ -40,8 +40,16 @@ from kpi.filters import (
 )
 from kpi.highlighters import highlight_xform
 from kpi.mixins.asset import AssetViewSetListMixin
-from kpi.mixins.object_permission import ObjectPermissionViewSetMixin
-from kpi.models import Asset, AssetUserPartialPermission, UserAssetSubscription
+from kpi.mixins.object_permission import (
+    ObjectPermissionViewSetMixin,
+    PermissionMatrix,
+)
+from kpi.models import (
+    Asset,
+    AssetUserPartialPermission,
+    AssetVersion,
+    UserAssetSubscription,
+)
 from kpi.models.object_permission import ObjectPermission
 from kpi.paginators import AssetPagination, NoCountPagination
 from kpi.permissions import (
@@ -94,6 +102,7 @@ from kpi.serializers.v2.asset import (
 )
 from kpi.serializers.v2.deployment import DeploymentSerializer
 from kpi.serializers.v2.reports import ReportsDetailSerializer
+from kpi.utils.asset_metadata import get_asset_metadata
 from kpi.utils.autoname import HandleDuplicatesOptions
 from kpi.utils.bugfix import repair_file_column_content_and_save
 from kpi.utils.hash import calculate_hash
@@ -109,6 +118,10 @@ from kpi.utils.schema_extensions.response import (
 )
 from kpi.utils.ss_structure_to_mdtable import ss_structure_to_mdtable
 from kpi.utils.strings import strtobool
+from kpi.utils.user_assets_version import (
+    ASSETS_HASH_CACHE_KEY,
+    get_user_assets_version,
+)
 
 
 @extend_schema(
@@ -697,77 +710,7 @@ class AssetViewSet(
 
         :return: dict
         """
-        metadata = {
-            'languages': set(),
-            'countries': OrderedDict(),
-            'sectors': OrderedDict(),
-            'organizations': set(),
-        }
-
-        records = queryset.values('summary', 'settings').exclude(
-            summary__languages=[],
-            settings__country_codes=[],
-            settings__sector={},
-            settings__organization='',
-        )
-
-        # Languages
-        records = records.order_by()
-
-        for record in records.all():
-            try:
-                languages = record['summary']['languages']
-            except (ValueError, KeyError):
-                pass
-            else:
-                for language in languages:
-                    if language:
-                        metadata['languages'].add(language)
-
-            try:
-                # "country" is actually a list of countries
-                countries = record['settings'].get('country') or []
-            except (KeyError, TypeError, AttributeError):
-                pass
-            else:
-                for country_record in countries:
-                    try:
-                        value = country_record['value']
-                        label = country_record['label']
-                    except (KeyError, TypeError):
-                        continue
-                    if value and value not in metadata['countries']:
-                        metadata['countries'][value] = label
-
-            try:
-                sector = record['settings'].get('sector') or {}
-                value = sector['value']
-                label = sector['label']
-            except (KeyError, TypeError, AttributeError):
-                pass
-            else:
-                if value and value not in metadata['sectors']:
-                    metadata['sectors'][value] = label
-
-            try:
-                organization = record['settings']['organization']
-            except KeyError:
-                pass
-            else:
-                if organization:
-                    metadata['organizations'].add(organization)
-
-        metadata['languages'] = sorted(list(metadata['languages']))
-
-        metadata['countries'] = sorted(metadata['countries'].items(),
-                                       key=itemgetter(1))
-
-        metadata['sectors'] = sorted(metadata['sectors'].items(),
-                                     key=itemgetter(1))
-
-        metadata['organizations'] = sorted(list(metadata['organizations']))
-
-        return metadata
+        return get_asset_metadata(queryset, self.request.user.pk)
 
     def get_paginated_response(self, data, metadata=None):
         """
@@ -931,6 +874,9 @@ class AssetViewSet(
             for asset in page:
                 self._serializer_context['asset_ids_cache'].append(asset.pk)
                 self._serializer_context['asset_uids_cache'].append(asset.uid)
+            self._serializer_context['permission_matrix'] = PermissionMatrix(
+                page, [request.user]
+            )
 
             serializer = self.get_serializer(
                 self._attach_xforms_to_assets(page), many=True
@@ -973,24 +919,33 @@ class AssetViewSet(
         Creates an hash of `version_id` of all accessible assets by the user.
         Useful to detect changes between each request.
 
+        The hash is cached until the version of the assets of the user changes
+        (see `get_user_assets_version()`).
+
         :param request:
         :return: JSON
         """
         user = self.request.user
         if user.is_anonymous:
             raise exceptions.NotAuthenticated()
-        else:
-            accessible_assets = (
+
+        cache_key = ASSETS_HASH_CACHE_KEY.format(
+            user_id=user.pk, version=get_user_assets_version(user.pk)
+        )
+        if (hash_ := cache.get(cache_key)) is None:
+            latest_version_uid = (
+                AssetVersion.objects.filter(asset=OuterRef('pk'))
+                .order_by('-date_modified')
+                .values('uid')[:1]
+            )
+            assets_version_ids = list(
                 get_objects_for_user(user, 'view_asset', Asset)
                 .filter(asset_type=ASSET_TYPE_SURVEY)
-                .order_by('uid')
+                .annotate(version_uid=Subquery(latest_version_uid))
+                .filter(version_uid__isnull=False)
+                .order_by()
+                .values_list('version_uid', flat=True)
             )
-
-            assets_version_ids = [
-                asset.version_id
-                for asset in accessible_assets
-                if asset.version_id is not None
-            ]
             # Sort alphabetically
             assets_version_ids.sort()
 
@@ -998,10 +953,11 @@ class AssetViewSet(
                 hash_ = calculate_hash(''.join(assets_version_ids), algorithm='md5')
             else:
                 hash_ = ''
+            cache.set(cache_key, hash_, settings.USER_ASSETS_CACHE_TTL)
 
-            return Response({
-                'hash': hash_
-            })
+        return Response({
+            'hash': hash_
+        })
 
     @action(detail=False, methods=['GET'])
     def metadata(self, request):
@@ -347,6 +347,16 @@ class AssetPermissionAssignmentViewSet(
                 'asset': self.asset,
             }
         )
+        # Actions which respond with the list of assignments: retrieve partial
+        # permissions of all users at once instead of one query per assignment.
+        if self.action in ('list', 'bulk_actions', 'clone'):
+            context_['partial_perms_per_asset'] = {
+                self.asset.pk: dict(
+                    AssetUserPartialPermission.objects.filter(
+                        asset_id=self.asset.pk
+                    ).values_list('user_id', 'permissions')
+                )
+            }
         return context_
 
     def get_queryset(self):
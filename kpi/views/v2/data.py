@@ -5,7 +5,7 @@ from typing import Union
 import jsonschema
 import requests
 from django.conf import settings
-from django.http import Http404, HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.utils.translation import gettext_lazy as t
 from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 from pymongo.errors import OperationFailure
@@ -59,6 +59,7 @@ from kpi.exceptions import (
     ObjectDeploymentDoesNotExist,
 )
 from kpi.models import Asset
+from kpi.paginators import SubmissionCursorPagination
 from kpi.permissions import (
     DuplicateSubmissionPermission,
     EditLinkSubmissionPermission,
@@ -69,6 +70,7 @@ from kpi.permissions import (
 from kpi.renderers import (
     BasicHTMLRenderer,
     SubmissionGeoJsonRenderer,
+    SubmissionJSONRenderer,
     SubmissionXMLRenderer,
 )
 from kpi.schema_extensions.v2.data.examples import get_data_supplement_examples
@@ -192,6 +194,16 @@ from kpi.utils.xml import (
                 required=False,
                 description='Include only given list of fields in results',
             ),
+            OpenApiParameter(
+                name='cursor',
+                type=str,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description=(
+                    'Use keyset pagination instead of `start`. Pass an empty '
+                    'value to get the first page, then follow `next`'
+                ),
+            ),
         ],
     ),
     retrieve=extend_schema(
@@ -262,7 +274,7 @@ class DataViewSet(
 
     parent_model = Asset
     renderer_classes = (
-        renderers.JSONRenderer,
+        SubmissionJSONRenderer,
         BasicHTMLRenderer,
         SubmissionGeoJsonRenderer,
         SubmissionXMLRenderer,
@@ -459,6 +471,21 @@ class DataViewSet(
         format_type = kwargs.get('format', request.GET.get('format', 'json'))
         deployment = self._get_deployment()
         filters = self._filter_mongo_query(request)
+        filters['count_strategy'] = settings.SUBMISSION_LIST_COUNT_STRATEGY
+
+        # Opt-in keyset pagination. See `SubmissionCursorPagination`
+        cursor_paginator = None
+        if SubmissionCursorPagination.is_requested(request):
+            if format_type in ['geojson', SUBMISSION_FORMAT_TYPE_XML]:
+                raise serializers.ValidationError(
+                    {
+                        'cursor': t(
+                            'This param is not supported in `##format##` format'
+                        ).replace('##format##', format_type.upper())
+                    }
+                )
+            cursor_paginator = SubmissionCursorPagination()
+            filters = cursor_paginator.get_mongo_params(request, filters)
 
         if format_type == 'geojson':
             # For GeoJSON, get the submissions as JSON and let
@@ -487,13 +514,25 @@ class DataViewSet(
                 raise serializers.ValidationError(message)
             logging.warning(message, exc_info=True)
             raise serializers.ValidationError('Unsupported query')
+
+        if cursor_paginator is not None:
+            # Not streamed: `next` comes before `results` and can only be built
+            # once the extra submission of the page has been read.
+            return cursor_paginator.get_paginated_response(
+                cursor_paginator.paginate_submissions(submissions)
+            )
+
         # Create a dummy list to let the Paginator do all the calculation
         # for pagination because it does not need the list of real objects.
         # It avoids retrieving all the objects from MongoDB
         dummy_submissions_list = [None] * deployment.current_submission_count
         page = self.paginate_queryset(dummy_submissions_list)
         if page is not None:
-            return self.get_paginated_response(submissions)
+            response = self.get_paginated_response(submissions)
+            if deployment.current_submission_count_is_capped:
+                # Let clients know that there are more submissions than counted
+                response.data['count'] = f'{settings.SUBMISSION_COUNT_CAP}+'
+            return self._get_streaming_response(response)
 
         return Response(list(submissions))
 
@@ -1058,6 +1097,37 @@ class DataViewSet(
             }
         )
 
+    def _get_streaming_response(
+        self, response: Response
+    ) -> Response | StreamingHttpResponse:
+        """
+        Stream the paginated `response` if `settings.SUBMISSION_LIST_STREAMING`
+        is enabled and the negotiated renderer supports it.
+
+        Submissions are rendered one by one while they are read from MongoDB,
+        instead of rendering the whole page in memory before sending it.
+        """
+        renderer = self.request.accepted_renderer
+        if not (
+            settings.SUBMISSION_LIST_STREAMING
+            and hasattr(renderer, 'render_stream')
+        ):
+            return response
+
+        content_type = self.request.accepted_media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+
+        return StreamingHttpResponse(
+            renderer.render_stream(
+                response.data,
+                self.request.accepted_media_type,
+                self.get_renderer_context(),
+            ),
+            status=response.status_code,
+            content_type=content_type,
+        )
+
     def _get_submission_by_id_or_root_uuid(
         self,
         submission_id_or_root_uuid: Union[str, int],